@@ -7,8 +7,9 @@ the validator validate the ast by doing the following:
 """
 
 from Parser.mtcc_c_ast import *
-from Parser.mtcc_parser import CParser
+from Parser.mtcc_parser import CParser, TypedefTable
 import Parser.mtcc_error_handler as eh
+import Parser.mtcc_token as tk
 import enum
 
 
@@ -20,27 +21,29 @@ class IdentifierKind(enum.Enum):
 class AstValidator:
     def __init__(self, parser: CParser, translation_unit: list[CDeclarator]):
         self.__parser = parser
-        self.typedefs: list[CTypedef] = parser.typedefs
+        self.typedefs: TypedefTable = parser.typedefs
         self.translation_unit: list[CDeclarator] = translation_unit
         self.identifiers_stack: list[tuple[CIdentifier, IdentifierKind]] = []
+        self.identifiers_count: dict[int, int] = {}  # symbol to the number of its identifiers in the stack
+
+    def push_identifier(self, identifier: CIdentifier, kind: IdentifierKind):
+        self.identifiers_stack.append((identifier, kind))
+        self.identifiers_count[identifier.symbol] = self.identifiers_count.get(identifier.symbol, 0) + 1
 
     def drop_stack_by_amount(self, amount: int):
         if amount > len(self.identifiers_stack):
             raise RuntimeError("amount is bigger than the stack size")
 
         for _ in range(amount):
-            self.identifiers_stack.pop()
+            identifier, kind = self.identifiers_stack.pop()
+            self.identifiers_count[identifier.symbol] -= 1
 
     def look_for_identifier(self, identifier: CIdentifier) -> CIdentifier | None:
-        if identifier is None:
-            return None
-
-        for declarator_, kind in self.identifiers_stack:
-            if declarator_.token.string == "" or identifier.token.string == "":
-                continue  # we shouldn't really check for empty identifiers
+        if identifier is None or identifier.symbol == tk.NO_SYMBOL:
+            return None  # we shouldn't really check for empty identifiers
 
-            if identifier.token.string in declarator_.token.string:
-                return identifier
+        if self.identifiers_count.get(identifier.symbol, 0) > 0:
+            return identifier
 
         return None
 
@@ -53,6 +56,6 @@ class AstValidator:
             if identifier_in_stack is not None:
                 raise self.__parser.fatal_token(external_declaration.identifier.token.index, "Duplicate identifier", eh.DuplicateIdentifier)
 
-            self.identifiers_stack.append((external_declaration.identifier, IdentifierKind.Regular))
+            self.push_identifier(external_declaration.identifier, IdentifierKind.Regular)
 
         self.drop_stack_by_amount(drop_amount)
@@ -63,6 +63,20 @@ class NoneNode:
         return ''
 
 
+class CError:
+    """a declaration or a statement with an error, in the tree of a parse that recovers from its errors"""
+
+    def __init__(self, message: str, token: tk.Token):
+        self.message: str = message
+        self.token: tk.Token = token  # the token of the error
+
+    def to_dict(self):
+        return {
+            "node": "CError",
+            "message": self.message
+        }
+
+
 class CStruct:
     def __init__(self, identifier: CIdentifier, members: list[list[CDeclarator]]):
         self.identifier: CIdentifier = identifier
@@ -168,11 +182,14 @@ class CBinaryOp:
         self.right: Node = right
 
     def to_dict(self):
+        return to_dict(self)
+
+    def generate_dict(self):
         return {
             "node": "CBinaryOp",
             "kind": self.kind.name,
-            "left": self.left.to_dict(),
-            "right": self.right.to_dict()
+            "left": (yield self.left),
+            "right": (yield self.right)
         }
 
 
@@ -200,10 +217,13 @@ class CUnaryOp:
         self.expression: Node | CTypeName = expression
 
     def to_dict(self):
+        return to_dict(self)
+
+    def generate_dict(self):
         return {
             "node": "CUnaryOp",
             "kind": self.kind.name,
-            "expression": self.expression.to_dict()
+            "expression": (yield self.expression)
         }
 
 
@@ -214,11 +234,14 @@ class CTernaryOp:
         self.false_value: Node = false_value
 
     def to_dict(self):
+        return to_dict(self)
+
+    def generate_dict(self):
         return {
             "node": "CTernaryOp",
-            "condition": self.condition.to_dict(),
-            "true_value": self.true_value.to_dict(),
-            "false_value": self.false_value.to_dict()
+            "condition": (yield self.condition),
+            "true_value": (yield self.true_value),
+            "false_value": (yield self.false_value)
         }
 
 
@@ -228,10 +251,13 @@ class CArrayAccess:
         self.index: Node = index
 
     def to_dict(self):
+        return to_dict(self)
+
+    def generate_dict(self):
         return {
             "node": "CArrayAccess",
-            "expression": self.expression.to_dict(),
-            "index": self.index.to_dict()
+            "expression": (yield self.expression),
+            "index": (yield self.index)
         }
 
 
@@ -243,9 +269,12 @@ class CMemberAccess:
         self.member: CIdentifier = member
 
     def to_dict(self):
+        return to_dict(self)
+
+    def generate_dict(self):
         return {
             "node": "CMemberAccess",
-            "expression": self.expression.to_dict(),
+            "expression": (yield self.expression),
             "member": self.member.to_dict()
         }
 
@@ -256,10 +285,13 @@ class CCast:
         self.cast_expression: Node = cast_expression
 
     def to_dict(self):
+        return to_dict(self)
+
+    def generate_dict(self):
         return {
             "node": "CCast",
             "cast_to": self.cast_to.to_dict(),
-            "cast_expression": self.cast_expression.to_dict()
+            "cast_expression": (yield self.cast_expression)
         }
 
 
@@ -316,6 +348,7 @@ class CString:
 class CIdentifier:
     def __init__(self, token: tk.Token | None):
         self.token: tk.Token | None = token
+        self.symbol: int = token.symbol if token is not None else tk.NO_SYMBOL  # the interned name
 
     def to_dict(self):
         return {
@@ -489,11 +522,17 @@ class CFunctionCall:
         self.parameters_type: list = parameters_type
 
     def to_dict(self):
-        return {
+        return to_dict(self)
+
+    def generate_dict(self):
+        dict_ = {
             "node": "CFunctionCall",
-            "expression": self.expression.to_dict(),
-            "parameters_type": [parameter_type.to_dict() for parameter_type in self.parameters_type]
+            "expression": (yield self.expression),
+            "parameters_type": []
         }
+        for parameter_type in self.parameters_type:
+            dict_["parameters_type"].append((yield parameter_type))
+        return dict_
 
 
 class CSizeof:
@@ -501,9 +540,12 @@ class CSizeof:
         self.expression: Node = expression
 
     def to_dict(self):
+        return to_dict(self)
+
+    def generate_dict(self):
         return {
             "node": "CSizeof",
-            "expression": self.expression.to_dict()
+            "expression": (yield self.expression)
         }
 
 
@@ -543,9 +585,12 @@ class CReturn:
         self.value: Node = value
 
     def to_dict(self):
+        return to_dict(self)
+
+    def generate_dict(self):
         return {
             "node": "CReturn",
-            "value": self.value.to_dict()
+            "value": (yield self.value)
         }
 
 
@@ -555,10 +600,13 @@ class CLabel:
         self.value: Node = value
 
     def to_dict(self):
+        return to_dict(self)
+
+    def generate_dict(self):
         return {
             "node": "CLabel",
             "identifier": self.identifier.to_dict(),
-            "value": self.value.to_dict()
+            "value": (yield self.value)
         }
 
 
@@ -568,10 +616,13 @@ class CCase:
         self.value: Node = value
 
     def to_dict(self):
+        return to_dict(self)
+
+    def generate_dict(self):
         return {
             "node": "CCase",
-            "case": self.expression_case.to_dict(),
-            "value": self.value.to_dict()
+            "case": (yield self.expression_case),
+            "value": (yield self.value)
         }
 
 
@@ -580,9 +631,12 @@ class CDefault:
         self.value: Node = value
 
     def to_dict(self):
+        return to_dict(self)
+
+    def generate_dict(self):
         return {
             "node": "CDefault",
-            "value": self.value.to_dict()
+            "value": (yield self.value)
         }
 
 
@@ -592,11 +646,19 @@ class CCompound:
         self.statements: list[Node] = statements
 
     def to_dict(self):
-        return {
+        return to_dict(self)
+
+    def generate_dict(self):
+        dict_ = {
             "node": "CCompound",
-            "declarations": [declarator.to_dict() for declarator in self.declarations],
-            "statements": [statement.to_dict() for statement in self.statements]
+            "declarations": [],
+            "statements": []
         }
+        for declarator in self.declarations:
+            dict_["declarations"].append((yield declarator))
+        for statement in self.statements:
+            dict_["statements"].append((yield statement))
+        return dict_
 
 
 class CIf:
@@ -606,11 +668,14 @@ class CIf:
         self.else_: Node = else_
 
     def to_dict(self):
+        return to_dict(self)
+
+    def generate_dict(self):
         return {
             "node": "CIf",
-            "condition": self.condition.to_dict(),
-            "then": self.then.to_dict(),
-            "else": self.else_.to_dict()
+            "condition": (yield self.condition),
+            "then": (yield self.then),
+            "else": (yield self.else_)
         }
 
 
@@ -620,10 +685,13 @@ class CSwitch:
         self.statement: Node = statement
 
     def to_dict(self):
+        return to_dict(self)
+
+    def generate_dict(self):
         return {
             "node": "CSwitch",
-            "expression": self.expression.to_dict(),
-            "statement": self.statement.to_dict()
+            "expression": (yield self.expression),
+            "statement": (yield self.statement)
         }
 
 
@@ -634,10 +702,13 @@ class CWhile:
         self.do: bool = do
 
     def to_dict(self):
+        return to_dict(self)
+
+    def generate_dict(self):
         return {
             "node": "CWhile",
-            "expression": self.expression.to_dict(),
-            "statement": self.statement.to_dict(),
+            "expression": (yield self.expression),
+            "statement": (yield self.statement),
             "do": self.do
         }
 
@@ -650,21 +721,51 @@ class CFor:
         self.statement: Node = statement
 
     def to_dict(self):
+        return to_dict(self)
+
+    def generate_dict(self):
         return {
             "node": "CFor",
-            "init": self.init.to_dict(),
-            "condition": self.condition.to_dict(),
-            "increment": self.increment.to_dict(),
-            "statement": self.statement.to_dict()
+            "init": (yield self.init),
+            "condition": (yield self.condition),
+            "increment": (yield self.increment),
+            "statement": (yield self.statement)
         }
 
 
+def to_dict(node: Node) -> dict:
+    """
+    the dict of a node that nests nodes (an expression or a statement), a node of them yields its nested nodes
+    from its generate_dict and is sent their dicts, the generators are kept on an explicit stack,
+    so a deep tree (a long sum, a long else if chain) is not bound by the recursion limit
+    """
+    generators: list = [node.generate_dict()]
+    nested_dict: dict | str | None = None  # the dict the innermost generator waits for (None to start it)
+
+    while True:
+        try:
+            nested_node = generators[-1].send(nested_dict)
+        except StopIteration as stop:
+            generators.pop()
+            if len(generators) == 0:
+                return stop.value
+            nested_dict = stop.value
+            continue
+
+        if hasattr(nested_node, 'generate_dict'):
+            generators.append(nested_node.generate_dict())
+            nested_dict = None
+        else:
+            nested_dict = nested_node.to_dict()
+
+
 CSpecifierType = Union[CPrimitiveDataTypes, CStruct, CUnion, CEnum, CTypedef, NoneNode]
 CType = Union[CFunction, CPointer, CArray, CPrimitiveDataTypes, CStruct, CUnion, CEnum, CTypedef, NoneNode]
 CParameter = CDeclarator
 
 Node = Union[
     NoneNode,
+    CError,
     Block,
     CEnum,
     CEnumMember,
@@ -0,0 +1,107 @@
+import concurrent.futures
+import itertools
+import json
+import os
+
+import Parser.mtcc_lexer as lx
+import Parser.mtcc_preprocessor as pp
+
+# the chars of a path that are special in a Makefile, a '$' is written '$$' and the rest with a backslash before them
+make_escapes: dict[int, str] = str.maketrans({'$': '$$', ' ': '\\ ', '#': '\\#'})
+
+# the #include paths that were resolved in this process by the search paths they were resolved with,
+# shared by all the scans of a worker (a header is looked for once, not once in every translation unit)
+resolved_include_caches: dict[tuple[str, ...], dict[tuple[str, str, bool, int], tuple[str, int] | None]] = {}
+
+
+class DependencyScan:
+    """the #include files of a translation unit, sent back from a worker process (so it only keeps strings)"""
+
+    def __init__(self, main_file_path: str, files: list[str], includes: dict[str, list[str]]):
+        self.main_file_path: str = main_file_path
+        self.files: list[str] = files  # every file of the translation unit (the main file first), in the order they are read
+        self.includes: dict[str, list[str]] = includes  # the files a file #includes (its edges of the graph)
+
+
+def scan_file(main_file_path: str, include_paths: list[str] | None = None, system_include_paths: list[str] | None = None,
+              engine: lx.LexerEngine = lx.LexerEngine.CHARACTER) -> DependencyScan:
+    """
+    follow the #include files of a file, only the directive lines are read (the #if conditions are evaluated
+    and the macros are defined), the files are shared with the other scans of the process through the source file cache
+    """
+    preprocessor: pp.Preprocessor = pp.Preprocessor(main_file_path, include_paths, system_include_paths, engine,
+                                                    directives_only=True)
+    preprocessor.resolved_includes = resolved_include_caches.setdefault(tuple(preprocessor.search_paths), {})
+    preprocessor.preprocess()
+    return DependencyScan(os.path.normpath(main_file_path),
+                          [source_file.path for source_file in preprocessor.included_files.values()],
+                          preprocessor.dependencies)
+
+
+def scan_files(main_file_paths: list[str], include_paths: list[str] | None = None,
+               system_include_paths: list[str] | None = None, workers: int | None = None,
+               engine: lx.LexerEngine = lx.LexerEngine.CHARACTER) -> list[DependencyScan]:
+    """
+    scan the files across a process pool, a worker scans a batch of files one after another,
+    so a header shared by the files of a batch is read once in the worker
+    """
+    workers = workers or os.cpu_count() or 1
+    arguments: tuple = (main_file_paths, itertools.repeat(include_paths), itertools.repeat(system_include_paths),
+                        itertools.repeat(engine))
+    if workers == 1 or len(main_file_paths) == 1:  # no process is worth starting
+        return list(map(scan_file, *arguments))
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(scan_file, *arguments, chunksize=max(len(main_file_paths) // (workers * 4), 1)))
+
+
+def escape_make_path(path: str) -> str:
+    return path.translate(make_escapes)
+
+
+def make_depfile(scan: DependencyScan, target: str | None = None) -> str:
+    """
+    the Make rule of a translation unit (like the one of cc -MD), its target is the object file of the main file,
+    every header also gets an empty rule, so a Makefile does not fail once a header is removed
+    """
+    if target is None:
+        target = os.path.splitext(os.path.basename(scan.main_file_path))[0] + '.o'
+
+    depfile: str = f"{escape_make_path(target)}:"
+    for path in scan.files:
+        depfile += f" \\\n {escape_make_path(path)}"
+    depfile += '\n'
+
+    for path in scan.files[1:]:
+        depfile += f"\n{escape_make_path(path)}:\n"
+    return depfile
+
+
+def make_dependency_graph(scans: list[DependencyScan]) -> dict:
+    """
+    the dependency graph of the scans as a JSON object: every translation unit and all of its files,
+    and every file and the files it #includes
+    """
+    includes: dict[str, list[str]] = {}
+    for scan in scans:
+        for path, included_paths in scan.includes.items():
+            file_includes: list[str] = includes.setdefault(path, [])
+            file_includes.extend(included_path for included_path in included_paths if included_path not in file_includes)
+
+    return {
+        "translation_units": {scan.main_file_path: scan.files for scan in scans},
+        "includes": includes,
+    }
+
+
+def write_dependencies(scans: list[DependencyScan], graph_path: str, depfile_directory: str | None = None) -> None:
+    """write the JSON dependency graph and a depfile for every translation unit (next to its file by default)"""
+    with open(graph_path, 'w') as graph_file:
+        json.dump(make_dependency_graph(scans), graph_file, indent=2)
+
+    for scan in scans:
+        depfile_path: str = os.path.splitext(scan.main_file_path)[0] + '.d'
+        if depfile_directory is not None:
+            depfile_path = os.path.join(depfile_directory, os.path.basename(depfile_path))
+        with open(depfile_path, 'w') as depfile:
+            depfile.write(make_depfile(scan))
@@ -68,3 +68,33 @@ class DuplicateIdentifier(Exception):
     def __init__(self, message):
         self.message = message
         super().__init__(self.message)
+
+
+class TokenWindowExceeded(Exception):
+    def __init__(self, message):
+        self.message = message
+        super().__init__(self.message)
+
+
+class IncludeFileNotFound(Exception):
+    def __init__(self, message):
+        self.message = message
+        super().__init__(self.message)
+
+
+class InvalidDirective(Exception):
+    def __init__(self, message):
+        self.message = message
+        super().__init__(self.message)
+
+
+class InvalidMacroInvocation(Exception):
+    def __init__(self, message):
+        self.message = message
+        super().__init__(self.message)
+
+
+class TooManyErrors(Exception):
+    def __init__(self, message):
+        self.message = message
+        super().__init__(self.message)
@@ -1,25 +1,259 @@
+import array
+import bisect
+import concurrent.futures
+import enum
+import itertools
+import mmap
+import os
+import re
+from typing import Iterator
+
+import Parser.mtcc_source as src
 import Parser.mtcc_token as tk
 
+try:
+    import numpy
+except ImportError:  # LexerEngine.VECTORIZED falls back to LexerEngine.CHARACTER
+    numpy = None
+
 END_OF_FILE = '\0'
 
 
+class LexerEngine(enum.Enum):
+    CHARACTER = enum.auto()  # walk the source one character at a time
+    MASTER_PATTERN = enum.auto()  # match a whole token at a time with a single compiled pattern
+    # cut tokens from char class runs found by numpy, needs numpy and a latin-1 source (see generate_vectorized_tokens)
+    VECTORIZED = enum.auto()
+
+
+class CharClass(enum.IntEnum):
+    OTHER = 0
+    WHITESPACE = 1
+    NUMERIC = 2
+    IDENTIFIER_STARTER = 3
+
+
+def build_char_class_table() -> list[CharClass]:
+    # the same checks as Lexer.is_char_whitespace, Lexer.is_char_numeric and Lexer.is_char_identifier_starter,
+    # a numeric or an identifier starter char is an identifier char
+    char_class_table: list[CharClass] = []
+    for code in range(256):
+        char: str = chr(code)
+        if char in "\n\t\r ":
+            char_class_table.append(CharClass.WHITESPACE)
+        elif char.isnumeric():
+            char_class_table.append(CharClass.NUMERIC)
+        elif char.isalpha() or char == '_':
+            char_class_table.append(CharClass.IDENTIFIER_STARTER)
+        else:
+            char_class_table.append(CharClass.OTHER)
+    return char_class_table
+
+
+char_class_table: list[CharClass] = build_char_class_table()
+
+
+def get_run_ends(mask) -> list[int]:
+    """get the end (exclusive) of every run of True in a numpy bool array, the last item of the mask must be False"""
+    return (numpy.flatnonzero(mask[:-1] & ~mask[1:]) + 1).tolist()
+
+
+def build_master_pattern(binary: bool = False) -> re.Pattern:
+    # the alternation is tried from left to right, so the separators and operators are ordered by length
+    # to get the longest match, the single char ones are folded into one char class.
+    # Lexer.peek_operator_or_separator grows a separator or operator one char at a time, so one that has a prefix
+    # which is not a separator or operator ('...') is never lexed and is left out here too
+    separators_and_operators: list[str] = sorted(
+        [string for string in tk.string_to_separator_or_operator.keys()
+         if all(string[:length] in tk.string_to_separator_or_operator for length in range(1, len(string)))],
+        key=len, reverse=True)
+    multi_char: list[str] = [re.escape(string) for string in separators_and_operators if len(string) > 1]
+    single_char: str = ''.join(re.escape(string) for string in separators_and_operators if len(string) == 1)
+
+    # every match skips the whitespace before the token, so a match is never spent on whitespace only,
+    # the most common tokens come first
+    # a non ascii char is classed by the checks of the character engine (str.isnumeric and str.isalpha),
+    # so a str pattern leaves a token that starts with one to Lexer.generate_master_pattern_tokens,
+    # a binary pattern lexes utf-8 bytes, so every non ascii byte is taken as an identifier char
+    pattern: str = r"[\n\t\r ]*(?:" + '|'.join([
+        r"(?P<IDENTIFIER>[A-Za-z_]\w*)" if not binary else r"(?P<IDENTIFIER>[A-Za-z_\x80-\xff][\w\x80-\xff]*)",
+        r"(?P<NUMBER>[0-9]+(?:\.[0-9]*)?)",
+        *([r"(?P<NON_ASCII>[^\x00-\x7f])"] if not binary else []),
+        r"(?P<LINE_COMMENT>//[^\n]*\n?)",
+        r"(?P<BLOCK_COMMENT>/\*[^*]*\*+(?:[^/*][^*]*\*+)*/|/\*.*)",  # an unterminated block comment runs to the end
+        "(?P<SEPARATOR_OR_OPERATOR>" + '|'.join(multi_char) + f"|[{single_char}])",
+        r"(?P<STRING_LITERAL>\"[^\"\\]*(?:\\.[^\"\\]*)*\"|'[^'\\]*(?:\\.[^'\\]*)*')",
+        r"(?P<END>\Z)",  # whitespace at the end of the source
+    ]) + ")"
+
+    return re.compile(pattern if not binary else pattern.encode('latin-1'), re.DOTALL)
+
+
+master_pattern: re.Pattern = build_master_pattern()
+binary_master_pattern: re.Pattern = build_master_pattern(binary=True)
+
+# the token kind codes of the tokens that have a symbol (see tk.SymbolTable)
+symbol_kind_codes: set[int] = {tk.token_kind_to_code[kind] for kind in [tk.TokenKind.IDENTIFIER, *tk.string_to_keyword.values()]}
+bytes_to_separator_or_operator: dict[bytes, tk.TokenKind] = {
+    string.encode(): kind for string, kind in tk.string_to_separator_or_operator.items()}
+
+# escape sequence char to the char it stands for
+escape_sequences: dict[str, str] = {
+    '\'': '\'',  # single quote
+    '\"': '\"',  # double quote
+    '?': '?',  # question mark
+    '\\': '\\',  # backslash
+    'a': '\a',  # alert (bell) character
+    'b': '\b',  # backspace
+    'f': '\f',  # form feed
+    'n': '\n',  # newline (line feed)
+    'r': '\r',  # carriage return
+    't': '\t',  # horizontal tab
+    'v': '\v',  # vertical tab
+    '0': '\0',  # null character
+}
+
+# an escape sequence is a hexadecimal one (\x41), an octal one (\101) or a single char one (\n)
+escape_sequence_pattern: re.Pattern = re.compile(r"\\(x[0-9A-Fa-f]+|[0-7]{1,3}|.)", re.DOTALL)
+
+# a string/char literal opener to the pattern of the whole literal
+string_literal_patterns: dict[str, re.Pattern] = {
+    # the loop is unrolled, so every run of plain chars is taken by one char class repeat
+    opener: re.compile(f"{opener}[^{opener}\\\\{END_OF_FILE}]*(?:\\\\[^{END_OF_FILE}][^{opener}\\\\{END_OF_FILE}]*)*{opener}")
+    for opener in '\'\"'
+}
+
+
+def decode_escape_sequence(escape_sequence_match: re.Match) -> str:
+    escape_sequence: str = escape_sequence_match.group(1)
+
+    char: str | None = escape_sequences.get(escape_sequence)
+    if char is not None:
+        return char
+
+    if escape_sequence[0] == 'x' and len(escape_sequence) > 1:  # hexadecimal representation of a character
+        code: int = int(escape_sequence[1:], 16)
+        if code > 0x10FFFF:
+            raise SyntaxError(f"Hexadecimal escape sequence out of range: \\{escape_sequence}")
+        return chr(code)
+
+    if escape_sequence[0] in '01234567':  # octal representation of a character
+        return chr(int(escape_sequence, 8))
+
+    return escape_sequence_match.group(0)  # unknown escape sequences are kept as is
+
+
+def decode_escape_sequences(string: str) -> str:
+    if '\\' not in string:
+        return string
+
+    return escape_sequence_pattern.sub(decode_escape_sequence, string)
+
+
+# a linemarker of a preprocessed source: # 12 "file.h" 1 3 (or #line 12 "file.h"), the flags follow the file name
+linemarker_pattern: re.Pattern = re.compile(
+    r'#[\t ]*(?:line[\t ]+)?([0-9]+)(?:[\t ]+"((?:[^"\\\n]|\\.)*)")?((?:[\t ]+[0-9]+)*)[\t\r ]*')
+
+# comments and string literals, a chunk of a parallel lex can not start inside one that has a newline
+chunk_prescan_pattern: re.Pattern = re.compile(
+    r"\"[^\"\\]*(?:\\.[^\"\\]*)*\"|'[^'\\]*(?:\\.[^'\\]*)*'|//[^\n]*|/\*.*?\*/|/\*.*", re.DOTALL)
+
+
+def find_chunk_splits(file_string: str, chunk_count: int) -> list[int]:
+    """find the starts of about chunk_count chunks of the source, every chunk starts after a newline outside a token"""
+    span_starts: list[int] = []
+    span_ends: list[int] = []
+    for span_match in chunk_prescan_pattern.finditer(file_string):
+        if file_string.find('\n', span_match.start(), span_match.end()) != -1:
+            span_starts.append(span_match.start())
+            span_ends.append(span_match.end())
+
+    splits: list[int] = []
+    for chunk in range(1, chunk_count):
+        newline: int = file_string.find('\n', max(len(file_string) * chunk // chunk_count, splits[-1] if splits else 0))
+        while newline != -1:
+            span: int = bisect.bisect_right(span_starts, newline) - 1
+            if span < 0 or span_ends[span] <= newline:
+                break
+            newline = file_string.find('\n', span_ends[span])  # the newline is in a comment or a string literal
+
+        if newline == -1:
+            break
+        if not splits or newline + 1 > splits[-1]:
+            splits.append(newline + 1)
+
+    return splits
+
+
+def lex_chunk(chunk: str, start: int, line: int, engine: LexerEngine, preprocessed: bool = False) \
+        -> tuple[tuple, list[tuple[int, int, int]], list[tuple[int, str | None, int, bool]]]:
+    """
+    lex a chunk of a parallel lex (in a worker process), the tokens go back as columns moved to the chunk place
+    in the source (a list of token objects is slow to send between processes)
+    """
+    # the file a chunk starts in is not known in the worker, the lines before its first linemarker are in file None
+    lexer: Lexer = Lexer.from_string(chunk, engine, preprocessed, main_file_name=None)
+    lexer.lex()
+
+    linemarkers: list[tuple[int, str | None, int, bool]] = []
+    if preprocessed:
+        locations: src.LocationMap = lexer.locations
+        linemarkers = [(offset + start, locations.get_file_name(file_id), marker_line, locations.is_system_file(file_id))
+                       for offset, file_id, marker_line in zip(locations.offsets, locations.entry_file_ids, locations.lines)]
+
+    token_columns: tuple = (array.array('B', [tk.token_kind_to_code[token.kind] for token in lexer.tokens]),
+                            array.array('Q', [token.start + start for token in lexer.tokens]),
+                            array.array('Q', [token.line + line for token in lexer.tokens]),
+                            [token.string for token in lexer.tokens])
+
+    # a comment goes back as its (start, line, length) in the source, not with its chunk
+    return token_columns, [(comment.start + start, comment.line + line,
+                            comment.length if isinstance(comment, tk.SourceToken) else len(comment.string))
+                           for comment in lexer.comments], linemarkers
+
+
 class Lexer:
-    def __init__(self, main_file_path: str) -> None:
+    def __init__(self, main_file_path: str, engine: LexerEngine = LexerEngine.CHARACTER, preprocessed: bool = False) -> None:
         main_file = open(main_file_path)
         self.file_string: str = main_file.read()
         self.file_string += END_OF_FILE
         main_file.close()
 
+        self.main_file_name: str = main_file_path
+        self.init_source_state(engine, preprocessed)
+
+    @staticmethod
+    def from_string(source: str, engine: LexerEngine = LexerEngine.CHARACTER, preprocessed: bool = False,
+                    main_file_name: str = "<string>") -> 'Lexer':
+        """make a lexer over a source string instead of a source file"""
+        lexer: Lexer = Lexer.__new__(Lexer)
+        lexer.file_string = source + END_OF_FILE
+        lexer.main_file_name = main_file_name
+        lexer.init_source_state(engine, preprocessed)
+        return lexer
+
+    def init_source_state(self, engine: LexerEngine, preprocessed: bool = False) -> None:
+        # the source is lexed with its line splices removed, the tokens are moved back to the physical source
+        self.physical_file_string: str = self.file_string  # pass it to CParser, the token starts are in it
+        self.file_string, self.offset_map = src.splice_lines(self.file_string)
+
+        self.line_index: src.LineIndex = src.LineIndex(self.file_string)
+        self.physical_line_index: src.LineIndex = \
+            self.line_index if self.offset_map is None else src.LineIndex(self.physical_file_string)
+
         self.index: int = 0
         self.current_char: str = self.file_string[self.index]
-        self.current_line: int = 0  # the first line is 0
+        self.current_line: int = 0  # the first line is 0, the lines of the tokens are found with the line index
         self.tokens: list[tk.Token] = []
         self.comments: list[tk.Token] = []
 
-    def peek_char(self):
-        if self.is_char('\n'):
-            self.current_line += 1
+        self.engine: LexerEngine = engine
+
+        # a preprocessed source (cc -E output) has linemarkers, they are lexed into the location map
+        self.preprocessed: bool = preprocessed
+        self.locations: src.LocationMap | None = src.LocationMap(self.main_file_name) if preprocessed else None
 
+    def peek_char(self):
         self.index += 1
         self.current_char = self.file_string[self.index]
 
@@ -27,9 +261,6 @@ class Lexer:
         self.index -= 1
         self.current_char = self.file_string[self.index]
 
-        if self.is_char('\n'):
-            self.current_line -= 1
-
     def is_char(self, string: str) -> bool:
         return self.current_char in string
 
@@ -49,49 +280,25 @@ class Lexer:
         return self.is_char("+-*/%&|^~<>!=?:,.;{}[]()")
 
     def peek_comment(self):
-
+        """peek a comment, only its offsets are kept, the comment body is skipped with str.find"""
         index_: int = self.index
-        str_: str = ""
-
-        if self.is_char('/'):  # a one line comment
-            str_ += self.current_char
-            self.peek_char()  # peek / char
-
-            if self.is_char('/'):  # a one line comment
-                while not self.is_char(END_OF_FILE):
-                    if self.is_char('\n'):  # check for comment end
-                        str_ += self.current_char
-                        self.peek_char()  # peek \n char
-
-                        break
-
-                    str_ += self.current_char
-                    self.peek_char()  # peek comment char
+        comment_starter: str = self.file_string[index_:index_ + 2]
 
-            elif self.is_char('*'):  # a block comment
-                str_ += self.current_char
-                self.peek_char()  # peek * char
-
-                while not self.is_char(END_OF_FILE):
-                    if self.is_char('*'):  # check for block comment end
-                        str_ += self.current_char
-                        self.peek_char()  # peek * char
-
-                        if not self.is_char(END_OF_FILE):
-                            if self.is_char('/'):
-                                str_ += self.current_char
-                                self.peek_char()  # peek / char
+        if comment_starter == '//':  # a one line comment, ends after its '\n'
+            end: int = self.file_string.find('\n', index_ + 2) + 1
+        elif comment_starter == '/*':  # a block comment, ends after its '*/'
+            end: int = self.file_string.find('*/', index_ + 2)
+            end = end + 2 if end != -1 else 0
+        else:
+            raise SyntaxError(f"An comment starter in needed, file index: {self.index + 1}")
 
-                                break
-                        else:
-                            raise SyntaxError(f"An block comment ender in needed, file index: {self.index}")
+        if end == 0:  # an unterminated comment runs to the end of the source
+            end = len(self.file_string) - 1
 
-                    str_ += self.current_char
-                    self.peek_char()  # peek comment's char
-            else:
-                raise SyntaxError(f"An comment starter in needed, file index: {self.index}")
+        self.index = end
+        self.current_char = self.file_string[self.index]
 
-        return tk.Token(tk.TokenKind.COMMENT, index_, self.current_line - 1, str_)
+        return tk.SourceToken(tk.TokenKind.COMMENT, index_, self.line_index.get_line(end) - 1, self.file_string, end - index_)
 
     def peek_number(self):
         index_: int = self.index
@@ -111,9 +318,9 @@ class Lexer:
             self.peek_char()  # peek numeric/dot char
 
         if dot_count == 0:  # An integer
-            return tk.Token(tk.TokenKind.INTEGER_LITERAL, index_, self.current_line, str_)
+            return tk.Token(tk.TokenKind.INTEGER_LITERAL, index_, self.line_index.get_line(index_), str_)
         else:
-            return tk.Token(tk.TokenKind.FLOAT_LITERAL, index_, self.current_line, str_)
+            return tk.Token(tk.TokenKind.FLOAT_LITERAL, index_, self.line_index.get_line(index_), str_)
 
     def peek_identifier(self):
         index_: int = self.index
@@ -128,101 +335,27 @@ class Lexer:
             str_ += self.current_char
             self.peek_char()  # peek identifier char
 
-        return tk.Token(tk.TokenKind.IDENTIFIER, index_, self.current_line, str_)
+        # every token of a spelling shares the interned string, a keyword is told by its symbol
+        symbol: int = tk.symbol_table.intern(str_)
+        return tk.Token(tk.symbol_table.get_kind(symbol), index_, self.line_index.get_line(index_),
+                        tk.symbol_table.strings[symbol], symbol)
 
     def peek_string_literal(self):
         index_: int = self.index
-        str_: str = self.current_char
-        opener: str = self.current_char
-        start_line: int = self.current_line
-
-        self.peek_char()  # peek first char
-
-        while True:
-            if self.is_char(opener):
-                str_ += self.current_char
-                self.peek_char()  # peek "opener" char
-                break
+        start_line: int = self.line_index.get_line(index_)
 
-            if self.is_char(END_OF_FILE):
-                raise SyntaxError(f"An string/char literal ender in needed, file index: {self.index}")
+        # the whole literal is matched at once, an END_OF_FILE char ends the scan
+        literal_match: re.Match | None = string_literal_patterns[self.current_char].match(self.file_string, index_)
+        if literal_match is None:
+            raise SyntaxError(f"An string/char literal ender in needed, file index: {self.file_string.find(END_OF_FILE, index_)}")
 
-            if self.is_char('\\'):  # escape sequences
-                str_ += self.current_char
-                self.peek_char()  # peek / char
+        str_: str = decode_escape_sequences(literal_match.group())
 
-                if self.is_char(END_OF_FILE):
-                    raise SyntaxError(f"An string/char literal ender in needed, file index: {self.index}")
-
-                if self.is_char('\''):  # single quote
-                    str_ = str_[0:-1]  # remove the \ char
-                    str_ += self.current_char
-                    self.peek_char()  # peek ' char
-
-                elif self.is_char('\"'):  # double  quote
-                    str_ = str_[0:-1]  # remove the \ char
-                    str_ += self.current_char
-                    self.peek_char()  # peek " char
-
-                elif self.is_char('?'):  # question mark
-                    str_ = str_[0:-1]  # remove the \ char
-                    str_ += self.current_char
-                    self.peek_char()  # peek ? char
-
-                elif self.is_char('\\'):  # backslash
-                    str_ = str_[0:-1]  # remove the \ char
-                    str_ += self.current_char
-                    self.peek_char()  # peek \ char
-
-                elif self.is_char('a'):  # alert (bell) character
-                    str_ = str_[0:-1]  # remove the \ char
-                    str_ += '\a'
-                    self.peek_char()  # peek a char
-
-                elif self.is_char('b'):  # backspace
-                    str_ = str_[0:-1]  # remove the \ char
-                    str_ += '\b'
-                    self.peek_char()  # peek b char
-
-                elif self.is_char('f'):  # form feed
-                    str_ = str_[0:-1]  # remove the \ char
-                    str_ += '\f'
-                    self.peek_char()  # peek f char
-
-                elif self.is_char('n'):  # newline (line feed)
-                    str_ = str_[0:-1]  # remove the \ char
-                    str_ += '\n'
-                    self.peek_char()  # peek n char
-
-                elif self.is_char('r'):  # carriage return
-                    str_ = str_[0:-1]  # remove the \ char
-                    str_ += '\r'
-                    self.peek_char()  # peek r char
-
-                elif self.is_char('t'):  # horizontal tab
-                    str_ = str_[0:-1]  # remove the \ char
-                    str_ += '\t'
-                    self.peek_char()  # peek t char
-
-                elif self.is_char('v'):  # vertical tab
-                    str_ = str_[0:-1]  # remove the \ char
-                    str_ += '\v'
-                    self.peek_char()  # peek v char
-
-                elif self.is_char('0'):  # null character
-                    str_ = str_[0:-1]  # remove the \ char
-                    str_ += '\0'
-                    self.peek_char()  # peek 0 char
-
-                elif self.is_char('x'):  # hexadecimal representation of a character
-                    # TODO: Implement escape sequences of hexadecimal representation of a character
-                    assert False, "Not implemented"
-                continue
-
-            str_ += self.current_char
-            self.peek_char()  # peek char
+        self.index = literal_match.end()
+        self.current_char = self.file_string[self.index]
 
-        return tk.Token(tk.TokenKind.STRING_LITERAL, index_, self.current_line if start_line == self.current_line else self.current_line - 1, str_)
+        end_line: int = self.line_index.get_line(self.index)
+        return tk.Token(tk.TokenKind.STRING_LITERAL, index_, start_line if start_line == end_line else end_line - 1, str_)
 
     def peek_operator_or_separator(self) -> tk.Token:
         index_: int = self.index
@@ -239,42 +372,591 @@ class Lexer:
                 self.drop_char()  # drop the last char
                 break
 
-        return tk.Token(tk.string_to_separator_or_operator[str_], index_, self.current_line, str_)
+        return tk.Token(tk.string_to_separator_or_operator[str_], index_, self.line_index.get_line(index_), str_)
 
-    def lex(self):
+    def is_directive_start(self, index: int) -> bool:
+        """check if the char at index is a '#' that only whitespace comes before in its line"""
+        line_start: int = self.file_string.rfind('\n', 0, index) + 1
+        return self.file_string[index] == '#' and self.file_string[line_start:index].strip('\t\r ') == ''
+
+    def peek_directive_line(self) -> None:
+        """peek a directive line of a preprocessed source, a linemarker is added to the location map, the rest are skipped"""
+        end: int = self.file_string.find('\n', self.index)
+        if end == -1:
+            end = len(self.file_string) - 1
+
+        linemarker_match: re.Match | None = linemarker_pattern.fullmatch(self.file_string, self.index, end)
+        if linemarker_match is not None:
+            file_name: str | None = linemarker_match.group(2)
+            self.add_linemarker(end + 1, decode_escape_sequences(file_name) if file_name is not None else None,
+                                int(linemarker_match.group(1)) - 1, '3' in linemarker_match.group(3).split())
+
+        self.index = end
+        self.current_char = self.file_string[self.index]
+
+    def add_linemarker(self, offset: int, file_name: str | None, line: int, system: bool) -> None:
+        """the line that starts at offset (in the lexed source) is line of file_name"""
+        if self.offset_map is not None:
+            offset = self.offset_map.to_physical(offset)
+        self.locations.add_entry(offset, self.physical_line_index.get_line(offset), file_name, line, system)
+
+    def generate_master_pattern_tokens(self) -> Iterator[tk.Token]:
+        file_string: str = self.file_string
+        end: int = len(file_string) - 1  # the END_OF_FILE char is not a part of the source
+        match = master_pattern.match
+        index: int = 0
+        line: int = 0
+
+        while index < end:
+            token_match: re.Match | None = match(file_string, index, end)
+
+            if token_match is None:
+                whitespace_end: int = end - len(file_string[index:end].lstrip('\n\t\r '))  # skip the whitespace
+                if self.preprocessed and self.is_directive_start(whitespace_end):
+                    line += file_string.count('\n', index, whitespace_end)
+                    self.index = whitespace_end
+                    self.peek_directive_line()
+                    index = self.index
+                    continue
+
+                index = whitespace_end
+                if file_string[index] in '\'\"':
+                    raise SyntaxError(f"An string/char literal ender in needed, file index: {end}")
+                raise SyntaxError(f"Unexpected character: {file_string[index]}, file index: {index}")
+
+            group: str = token_match.lastgroup
+            group_index: int = token_match.lastindex
+            start: int = token_match.start(group_index)
+            if start != index:
+                line += file_string.count('\n', index, start)
+            index = start
+            str_: str = token_match.group(group_index)
+
+            if group == 'IDENTIFIER':
+                symbol: int = tk.symbol_table.intern(str_)
+                yield tk.Token(tk.symbol_table.get_kind(symbol), index, line, tk.symbol_table.strings[symbol], symbol)
+            elif group == 'SEPARATOR_OR_OPERATOR':
+                yield tk.Token(tk.string_to_separator_or_operator[str_], index, line, str_)
+            elif group == 'NUMBER' and file_string[token_match.end()].isascii():
+                kind: tk.TokenKind = tk.TokenKind.FLOAT_LITERAL if '.' in str_ else tk.TokenKind.INTEGER_LITERAL
+                yield tk.Token(kind, index, line, str_)
+            elif group == 'NUMBER' or group == 'NON_ASCII':  # a number that goes on in a non ascii numeric char
+                self.index = index
+                self.current_char = file_string[index]
+                if self.is_char_numeric():
+                    yield self.peek_number()
+                elif self.is_char_identifier_starter():
+                    yield self.peek_identifier()
+                else:
+                    raise SyntaxError(f"Unexpected character: {self.current_char}, file index: {index}")
+                index = self.index
+                continue
+            elif group == 'STRING_LITERAL':
+                # a string literal that spans lines gets the line before its last one
+                newlines: int = str_.count('\n')
+                yield tk.Token(tk.TokenKind.STRING_LITERAL, index, line if newlines == 0 else line + newlines - 1,
+                               decode_escape_sequences(str_))
+                line += newlines
+            elif group == 'END':
+                break
+            else:  # a line or a block comment, the comment gets the line before the one it ends on
+                line += str_.count('\n')
+                self.comments.append(tk.Token(tk.TokenKind.COMMENT, index, line - 1, str_))
+
+            index = token_match.end()
+
+        self.index = end
+        self.current_char = END_OF_FILE
+        self.current_line = line
+
+        yield tk.Token(tk.TokenKind.END, end, line, '\0')
+
+    def peek_slash(self) -> tk.Token | None:
+        """peek a comment into the comments list or, if the '/' does not start one, return a separator or operator"""
+        if self.file_string[self.index + 1] in '/*':  # the char after the '/' tells a comment from an operator
+            self.comments.append(self.peek_comment())
+            return None
+
+        return self.peek_operator_or_separator()
+
+    def generate_vectorized_tokens(self) -> Iterator[tk.Token]:
+        """
+        lex the source from the char class runs numpy finds in one pass, comments and string literals are still
+        lexed char by char. it only beats the character engine when the runs pay for the fixed numpy setup:
+        it is slower on a source under about 1 KB, about 1.3x faster on ordinary code of a few KB or more
+        (a small gain, a busy machine can lose it) and up to 2.5x faster on long identifiers, numbers
+        and whitespace runs (generated tables)
+        """
+        try:
+            codes = numpy.frombuffer(self.file_string.encode('latin-1'), dtype=numpy.uint8)
+        except UnicodeEncodeError:  # the char class table only covers latin-1
+            yield from self.generate_character_tokens()
+            return
+
+        # classify the whole source at once and find where every whitespace, numeric and identifier run ends,
+        # the END_OF_FILE char is an OTHER char, so every run ends before it
+        char_classes = numpy.array(char_class_table, dtype=numpy.uint8)[codes]
+        whitespace_ends: list[int] = get_run_ends(char_classes == CharClass.WHITESPACE)
+        numeric_ends: list[int] = get_run_ends(char_classes == CharClass.NUMERIC)
+        identifier_ends: list[int] = get_run_ends(char_classes >= CharClass.NUMERIC)
+        newlines: array.array = self.line_index.newlines
+        char_classes: bytes = char_classes.tobytes()
+
+        # the tokens are cut in order, so every run end list is walked once with its own cursor
+        whitespace_cursor: int = 0
+        numeric_cursor: int = 0
+        identifier_cursor: int = 0
+        newline_cursor: int = 0
+
+        file_string: str = self.file_string
+        end: int = len(file_string) - 1  # the END_OF_FILE char is not a part of the source
+        index: int = 0
+
+        while index < end:
+            char_class: int = char_classes[index]
+
+            if char_class == CharClass.WHITESPACE:
+                while whitespace_ends[whitespace_cursor] <= index:
+                    whitespace_cursor += 1
+                index = whitespace_ends[whitespace_cursor]
+                continue
+
+            while newline_cursor < len(newlines) and newlines[newline_cursor] < index:
+                newline_cursor += 1
+            line: int = newline_cursor
+
+            if char_class == CharClass.IDENTIFIER_STARTER:
+                while identifier_ends[identifier_cursor] <= index:
+                    identifier_cursor += 1
+                token_end: int = identifier_ends[identifier_cursor]
+                str_: str = file_string[index:token_end]
+                symbol: int = tk.symbol_table.intern(str_)
+                yield tk.Token(tk.symbol_table.get_kind(symbol), index, line, tk.symbol_table.strings[symbol], symbol)
+            elif char_class == CharClass.NUMERIC:
+                while numeric_ends[numeric_cursor] <= index:
+                    numeric_cursor += 1
+                token_end: int = numeric_ends[numeric_cursor]
+                kind: tk.TokenKind = tk.TokenKind.INTEGER_LITERAL
+                if file_string[token_end] == '.':  # a float, the fraction is the numeric run after the dot
+                    kind = tk.TokenKind.FLOAT_LITERAL
+                    token_end += 1
+                    if char_classes[token_end] == CharClass.NUMERIC:
+                        while numeric_ends[numeric_cursor] <= token_end:
+                            numeric_cursor += 1
+                        token_end = numeric_ends[numeric_cursor]
+                yield tk.Token(kind, index, line, file_string[index:token_end])
+            elif file_string[index] in tk.string_to_separator_or_operator and file_string[index:index + 2] not in ('//', '/*'):
+                # grow the separator or operator like Lexer.peek_operator_or_separator does
+                token_end: int = index + 1
+                while file_string[index:token_end + 1] in tk.string_to_separator_or_operator:
+                    token_end += 1
+                str_: str = file_string[index:token_end]
+                yield tk.Token(tk.string_to_separator_or_operator[str_], index, line, str_)
+            else:  # string literals and comments are lexed char by char
+                self.index = index
+                self.current_char = file_string[index]
+
+                if self.is_char('\'\"'):
+                    yield self.peek_string_literal()
+                elif self.is_char('/'):
+                    token: tk.Token | None = self.peek_slash()
+                    if token is not None:
+                        yield token
+                elif self.preprocessed and self.is_directive_start(index):
+                    self.peek_directive_line()
+                else:
+                    raise SyntaxError(f"Unexpected character: {self.current_char}, file index: {self.index}")
+
+                token_end: int = self.index
+
+            index = token_end
+
+        self.index = end
+        self.current_char = END_OF_FILE
+        self.current_line = len(newlines)
+
+        yield tk.Token(tk.TokenKind.END, end, self.current_line, '\0')
+
+    def generate_character_tokens(self) -> Iterator[tk.Token]:
         while not self.is_char(END_OF_FILE):
             if self.is_char_whitespace():
                 self.peek_char()
             elif self.is_char_numeric():
                 token: tk.Token = self.peek_number()
-                self.tokens.append(token)
+                yield token
             elif self.is_char_identifier_starter():
-                token: tk.Token = self.peek_identifier()
-                if token.string in tk.string_to_keyword.keys():
-                    keyword_kind: tk.TokenKind = tk.string_to_keyword[token.string]
-                    token.kind = keyword_kind
-                self.tokens.append(token)
+                token: tk.Token = self.peek_identifier()  # an identifier or a keyword
+                yield token
             elif self.is_char('\'\"'):
                 token: tk.Token = self.peek_string_literal()
-                self.tokens.append(token)
+                yield token
             elif self.is_char('/'):  # comment
-                index: int = self.index
-                line: int = self.current_line
-                try:
-                    token: tk.Token = self.peek_comment()
-                    self.comments.append(token)
-                except SyntaxError:  # operator
-                    self.index = index
-                    self.current_line = line
-                    self.current_char = self.file_string[self.index]
-                    token: tk.Token = self.peek_operator_or_separator()
-                    self.tokens.append(token)
+                token: tk.Token | None = self.peek_slash()
+                if token is not None:
+                    yield token
             elif self.is_char_operator_or_separator():
                 token: tk.Token = self.peek_operator_or_separator()
-                self.tokens.append(token)
+                yield token
+            elif self.preprocessed and self.is_directive_start(self.index):
+                self.peek_directive_line()
             else:
                 if self.is_char(END_OF_FILE):
                     break
                 raise SyntaxError(f"Unexpected character: {self.current_char}, file index: {self.index}")
 
-        self.tokens.append(tk.Token(tk.TokenKind.END, len(self.file_string) - 1, self.current_line, '\0'))
+        self.current_line = self.line_index.get_line(self.index)
+
+        yield tk.Token(tk.TokenKind.END, len(self.file_string) - 1, self.current_line, '\0')
+
+    def generate_tokens(self) -> Iterator[tk.Token]:
+        """lazily lex the source, the last token is an END token"""
+        if self.engine == LexerEngine.MASTER_PATTERN:
+            tokens: Iterator[tk.Token] = self.generate_master_pattern_tokens()
+        elif self.engine == LexerEngine.VECTORIZED and numpy is not None:
+            tokens: Iterator[tk.Token] = self.generate_vectorized_tokens()
+        else:
+            tokens: Iterator[tk.Token] = self.generate_character_tokens()
+
+        if self.offset_map is not None:
+            tokens = self.generate_physical_tokens(tokens)
+        if self.preprocessed:
+            tokens = self.generate_located_tokens(tokens)
+        return tokens
+
+    def generate_physical_tokens(self, tokens: Iterator[tk.Token]) -> Iterator[tk.Token]:
+        """move the tokens and the comments lexed from the spliced source to their place in the physical source"""
+        mapped_comments: int = len(self.comments)
+        for token in tokens:
+            for comment in self.comments[mapped_comments:]:  # the comments before the token
+                self.map_to_physical(comment)
+            mapped_comments = len(self.comments)
+
+            self.map_to_physical(token)
+            yield token
+
+    def generate_located_tokens(self, tokens: Iterator[tk.Token]) -> Iterator[tk.Token]:
+        """tag the tokens and the comments of a preprocessed source with the file the last linemarker is in"""
+        located_comments: int = len(self.comments)
+        for token in tokens:
+            # the comments before the token, a linemarker between a comment and the token is already read
+            for comment in self.comments[located_comments:]:
+                comment.file_id = self.locations.get_offset_file_id(comment.start)
+            located_comments = len(self.comments)
+
+            token.file_id = self.locations.get_current_file_id()
+            yield token
+
+    def locate_tokens(self, tokens: list[tk.Token]) -> None:
+        """tag lexed tokens (in source order) with the file of the last linemarker before them"""
+        offsets: array.array = self.locations.offsets
+        entry: int = 0
+        file_id: int = src.MAIN_FILE_ID
+        for token in tokens:
+            while entry < len(offsets) and offsets[entry] <= token.start:
+                file_id = self.locations.entry_file_ids[entry]
+                entry += 1
+            token.file_id = file_id
+
+    def map_to_physical(self, token: tk.Token) -> None:
+        if isinstance(token, tk.SourceToken):
+            token.detach()  # the text is read from the spliced source before the start is moved
+
+        if token.kind == tk.TokenKind.COMMENT:  # a comment gets the line before the physical line it ends on
+            end: int = self.offset_map.to_physical(token.start + len(token.string))
+            token.start = self.offset_map.to_physical(token.start)
+            token.line = self.physical_line_index.get_line(end) - 1
+            return
+
+        # a token keeps its line relative to its start line (a string literal that spans lines)
+        start_line: int = self.line_index.get_line(token.start)
+        token.start = self.offset_map.to_physical(token.start)
+        token.line += self.physical_line_index.get_line(token.start) - start_line
+
+    def stream_tokens(self, window: int = tk.DEFAULT_TOKEN_WINDOW) -> tk.TokenStream:
+        """lex on demand, keeping at most window tokens around for the parser to backtrack into"""
+        return tk.TokenStream(self.generate_tokens(), window)
+
+    def lex(self):
+        self.tokens.extend(self.generate_tokens())
+
+    def lex_token_buffer(self) -> tk.TokenBuffer:
+        """lex the source into a token buffer instead of the tokens list"""
+        token_buffer: tk.TokenBuffer = tk.TokenBuffer(self.get_token_buffer_source())
+        token_buffer.extend(self.generate_tokens())
+        return token_buffer
+
+    def get_token_buffer_source(self) -> str | bytes:
+        return self.physical_file_string
+
+    def lex_parallel(self, workers: int | None = None, chunk_count: int | None = None) -> None:
+        """
+        lex the source in chunks across a process pool, the chunks are split at newlines outside
+        comments and string literals, the tokens and comments are the same as Lexer.lex makes
+        """
+        workers = workers or os.cpu_count() or 1
+        end: int = len(self.file_string) - 1  # the END_OF_FILE char is not a part of the source
+
+        chunk_starts: list[int] = [0] + find_chunk_splits(self.file_string, chunk_count or workers * 4)
+        chunk_ends: list[int] = chunk_starts[1:] + [end]
+        chunk_lines: list[int] = list(itertools.accumulate(
+            [self.file_string.count('\n', chunk_start, chunk_end) for chunk_start, chunk_end in zip(chunk_starts, chunk_ends)],
+            initial=0))
+
+        chunk_results: list[tuple[tuple, list[tuple[int, int, int]], list[tuple[int, str | None, int, bool]]]] | None = None
+        try:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+                chunk_results = list(executor.map(
+                    lex_chunk, [self.file_string[chunk_start:chunk_end] for chunk_start, chunk_end in zip(chunk_starts, chunk_ends)],
+                    chunk_starts, chunk_lines, itertools.repeat(self.engine), itertools.repeat(self.preprocessed)))
+        except SyntaxError:
+            pass
+
+        if chunk_results is None:  # the error index is in its chunk, so the whole source is lexed to raise it
+            self.lex()
+            return
+
+        for chunk_index, (token_columns, comments, linemarkers) in enumerate(chunk_results):
+            # the symbols of a worker are not the symbols of this process, so the spellings are interned here
+            tokens: list[tk.Token] = []
+            for kind, start, line, string in zip(*token_columns):
+                if kind in symbol_kind_codes:
+                    symbol: int = tk.symbol_table.intern(string)
+                    tokens.append(tk.Token(tk.token_kinds[kind], start, line, tk.symbol_table.strings[symbol], symbol))
+                else:
+                    tokens.append(tk.Token(tk.token_kinds[kind], start, line, string))
+            if chunk_index != len(chunk_results) - 1:
+                tokens.pop()  # only the last chunk END token ends the source
+            self.tokens.extend(tokens)
+            self.comments.extend(tk.SourceToken(tk.TokenKind.COMMENT, start, line, self.file_string, length)
+                                 for start, line, length in comments)
+            for offset, file_name, marker_line, system in linemarkers:  # a file None is the file the chunk starts in
+                self.add_linemarker(offset, file_name, marker_line, system)
+
+        if self.offset_map is not None:
+            for token in itertools.chain(self.tokens, self.comments):
+                self.map_to_physical(token)
+
+        if self.preprocessed:
+            self.locate_tokens(self.tokens)
+            self.locate_tokens(self.comments)
+
+        self.index = end
+        self.current_char = END_OF_FILE
+        self.current_line = chunk_lines[-1]
+
+    def relex(self, offset: int, removed_length: int, inserted_text: str) -> range:
+        """
+        apply an edit (the removed_length chars at offset are replaced by inserted_text) to a lexed source
+        and lex again only the tokens around it, the tokens and comments are the same as a fresh lex of the
+        edited source, return the indexes of the tokens that were lexed again
+        """
+        if offset < 0 or removed_length < 0 or offset + removed_length > len(self.physical_file_string) - 1:
+            raise ValueError(f"The edit is out of the source, file index: {offset}")
+
+        shift: int = len(inserted_text) - removed_length
+        removed_end: int = offset + removed_length  # the end of the edit in the old source
+        inserted_end: int = offset + len(inserted_text)  # the end of the edit in the new source
+
+        old_file_string: str = self.physical_file_string
+        new_file_string: str = old_file_string[:offset] + inserted_text + old_file_string[removed_end:]
+
+        # a spliced source (its offsets are not the offsets of the edit) and a preprocessed source
+        # (its linemarkers are not patched) are lexed again in full
+        if self.offset_map is not None or self.preprocessed or \
+                '\\\n' in new_file_string[max(offset - 1, 0):inserted_end + 1]:
+            return self.relex_in_full(new_file_string)
+
+        self.file_string = new_file_string
+        self.physical_file_string = new_file_string
+        line_shift: int = self.line_index.apply_edit(self.file_string, offset, removed_length, len(inserted_text))
+
+        # the last token that starts before the edit may grow into it, so the lex starts again from it,
+        # no token before it looks further than its own end, so they are all kept
+        first_token: int = max(bisect.bisect_left(self.tokens, offset, key=lambda token: token.start) - 1, 0)
+        restart: int = self.tokens[first_token].start if first_token > 0 else 0
+
+        first_comment: int = bisect.bisect_left(self.comments, restart, key=lambda comment: comment.start)
+        old_comments: list[tk.Token] = self.comments[first_comment:]
+        del self.comments[first_comment:]
+
+        self.index = restart
+        self.current_char = self.file_string[self.index]
+
+        # lex until a token starts at the same place in the unchanged source after the edit,
+        # the lexer keeps no state between tokens, so from there on the old tokens are the new ones
+        new_tokens: list[tk.Token] = []
+        old_token: int = first_token
+        try:
+            for token in self.generate_character_tokens():
+                if token.start >= inserted_end:
+                    while old_token < len(self.tokens) and self.tokens[old_token].start < token.start - shift:
+                        old_token += 1
+                    if old_token < len(self.tokens) and self.tokens[old_token].start == token.start - shift:
+                        break
+                new_tokens.append(token)
+            else:
+                old_token = len(self.tokens)
+        except SyntaxError:  # the edited source does not lex (an unterminated literal), so the edit is undone
+            self.file_string = old_file_string
+            self.physical_file_string = old_file_string
+            self.line_index.apply_edit(self.file_string, offset, len(inserted_text), removed_length)
+            self.comments[first_comment:] = old_comments
+            self.index = len(self.file_string) - 1
+            self.current_char = END_OF_FILE
+            raise
+
+        for token in self.tokens[old_token:]:
+            token.start += shift
+            token.line += line_shift
+
+        resync_start: int = self.tokens[old_token].start if old_token < len(self.tokens) else len(self.file_string)
+        for comment in old_comments:
+            if comment.start + shift >= resync_start:
+                comment.start += shift
+                comment.line += line_shift
+                if isinstance(comment, tk.SourceToken):
+                    comment.source = self.file_string
+                self.comments.append(comment)
+
+        self.tokens[first_token:old_token] = new_tokens
+
+        self.index = len(self.file_string) - 1
+        self.current_char = END_OF_FILE
+        self.current_line = self.line_index.get_line(self.index)
+
+        return range(first_token, first_token + len(new_tokens))
+
+    def relex_in_full(self, new_file_string: str) -> range:
+        """lex the edited source in full, on a SyntaxError the old source and tokens are kept"""
+        old_state: dict = self.__dict__.copy()
+        self.file_string = new_file_string
+        self.init_source_state(self.engine, self.preprocessed)
+        try:
+            self.lex()
+        except SyntaxError:
+            self.__dict__.update(old_state)
+            raise
+
+        return range(len(self.tokens))
+
+
+class MappedLexer:
+    """
+    a lexer over a memory mapped source file, the source is never copied into a str,
+    the end of the source is found by its length (no END_OF_FILE char is appended),
+    every token keeps its (start, length) in the source and decodes its string when it is first read,
+    start is a byte offset into the utf-8 source, the tokens are lexed with the binary master pattern,
+    the binary master pattern has no line splices and no linemarkers, so a source with a line splice or a
+    preprocessed source is decoded and lexed by a Lexer, its source is then the physical source of that Lexer
+    """
+
+    def __init__(self, main_file_path: str, preprocessed: bool = False) -> None:
+        with open(main_file_path, 'rb') as main_file:
+            try:
+                self.source: mmap.mmap | bytes | str = mmap.mmap(main_file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # an empty file can not be mapped
+                self.source = b''
+
+        self.main_file_name: str = main_file_path
+        self.__file_string: str | None = None
+
+        self.index: int = 0
+        self.current_line: int = 0  # the first line is 0
+        self.tokens: list[tk.Token] = []
+        self.comments: list[tk.Token] = []
+
+        self.engine: LexerEngine = LexerEngine.MASTER_PATTERN
+        self.preprocessed: bool = preprocessed
+
+        # the Lexer of a source the binary master pattern can not lex, its source state is the one of this lexer
+        self.lexer: Lexer | None = None
+        if preprocessed or self.source.find(b'\\\n') != -1:
+            self.lexer = Lexer.from_string(bytes(self.source).decode(), self.engine, preprocessed, main_file_path)
+            self.source = self.lexer.physical_file_string
+            self.tokens = self.lexer.tokens
+            self.comments = self.lexer.comments
+        self.locations: src.LocationMap | None = None if self.lexer is None else self.lexer.locations
+
+    @property
+    def file_string(self) -> str:
+        """the decoded source, only made (once) when asked for, CParser can take the source itself instead"""
+        if self.lexer is not None:
+            return self.lexer.file_string
+        if self.__file_string is None:
+            self.__file_string = bytes(self.source).decode() + END_OF_FILE
+        return self.__file_string
+
+    def stream_tokens(self, window: int = tk.DEFAULT_TOKEN_WINDOW) -> tk.TokenStream:
+        """lex on demand, keeping at most window tokens around for the parser to backtrack into"""
+        return tk.TokenStream(self.generate_tokens(), window)
+
+    def lex(self):
+        self.tokens.extend(self.generate_tokens())
+
+    def lex_token_buffer(self) -> tk.TokenBuffer:
+        """lex the source into a token buffer instead of the tokens list"""
+        token_buffer: tk.TokenBuffer = tk.TokenBuffer(self.source)
+        token_buffer.extend(self.generate_tokens())
+        return token_buffer
+
+    def generate_tokens(self) -> Iterator[tk.Token]:
+        """lazily lex the source, the last token is an END token"""
+        if self.lexer is not None:
+            return self.lexer.generate_tokens()
+        return self.generate_mapped_tokens()
+
+    def generate_mapped_tokens(self) -> Iterator[tk.Token]:
+        source: mmap.mmap | bytes = self.source
+        end: int = len(source)
+        match = binary_master_pattern.match
+        index: int = 0
+        line: int = 0
+
+        while index < end:
+            token_match: re.Match | None = match(source, index, end)
+
+            if token_match is None:
+                index = end - len(source[index:end].lstrip(b'\n\t\r '))  # skip the whitespace
+                if source[index:index + 1] in (b'\'', b'\"'):
+                    raise SyntaxError(f"An string/char literal ender in needed, file index: {end}")
+                raise SyntaxError(f"Unexpected character: {source[index:index + 1].decode(errors='replace')}, "
+                                  f"file index: {index}")
+
+            group: str = token_match.lastgroup
+            group_index: int = token_match.lastindex
+            start: int = token_match.start(group_index)
+            if start != index:
+                line += source[index:start].count(b'\n')  # a mapped source has no count, the slice is a short copy
+            index = start
+            token_end: int = token_match.end()
+
+            if group == 'IDENTIFIER':
+                symbol: int = tk.symbol_table.intern_bytes(token_match.group(group_index))
+                yield tk.SourceToken(tk.symbol_table.get_kind(symbol), index, line, source, token_end - index,
+                                     tk.symbol_table.strings[symbol], symbol)
+            elif group == 'SEPARATOR_OR_OPERATOR':
+                kind: tk.TokenKind = bytes_to_separator_or_operator[token_match.group(group_index)]
+                yield tk.SourceToken(kind, index, line, source, token_end - index)
+            elif group == 'NUMBER':
+                kind: tk.TokenKind = tk.TokenKind.INTEGER_LITERAL
+                if source.find(b'.', index, token_end) != -1:
+                    kind = tk.TokenKind.FLOAT_LITERAL
+                yield tk.SourceToken(kind, index, line, source, token_end - index)
+            elif group == 'STRING_LITERAL':  # the escape sequences are decoded right away
+                str_: str = token_match.group(group_index).decode()
+                newlines: int = str_.count('\n')
+                yield tk.SourceToken(tk.TokenKind.STRING_LITERAL, index, line if newlines == 0 else line + newlines - 1,
+                                     source, token_end - index, decode_escape_sequences(str_))
+                line += newlines
+            elif group == 'END':
+                break
+            else:  # a line or a block comment, the comment gets the line before the one it ends on
+                line += source[index:token_end].count(b'\n')
+                self.comments.append(tk.SourceToken(tk.TokenKind.COMMENT, index, line - 1, source, token_end - index))
+
+            index = token_end
+
+        self.index = end
+        self.current_line = line
+
+        yield tk.Token(tk.TokenKind.END, end, line, '\0')
@@ -0,0 +1,407 @@
+import re
+
+import Parser.mtcc_error_handler as eh
+import Parser.mtcc_lexer as lx
+import Parser.mtcc_token as tk
+
+VARIADIC_PARAMETER: str = '__VA_ARGS__'
+
+# a '#' or a '##' in a replacement list, a string or a char literal is matched so a '#' in it is skipped
+hash_pattern: re.Pattern = re.compile(r'"(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\'|(##|#)')
+macro_name_pattern: re.Pattern = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+# a parameter of a function-like macro: x, ... or x... (a named variadic parameter)
+parameter_pattern: re.Pattern = re.compile(r'[\t ]*([A-Za-z_][A-Za-z0-9_]*)?[\t ]*(\.\.\.)?[\t ]*')
+
+# the hide set of a token is the symbols of the macros it was expanded from, the macros are not expanded in it again
+EMPTY_HIDE_SET: frozenset[int] = frozenset()
+
+# a char of a string literal to its escape sequence, the spelling of a string literal is made from its decoded string
+char_to_escape_sequence: dict[str, str] = {char: '\\' + escape for escape, char in lx.escape_sequences.items() if escape != '?'}
+
+
+class Macro:
+    """
+    a macro and its replacement list, the replacement list is lexed once when the macro is defined,
+    a parameter in it is an IDENTIFIER token and a '#' and a '##' are HASH and HASH_HASH tokens
+    """
+
+    def __init__(self, name: str, parameters: list[str] | None, variadic: bool, body: tuple[tk.Token, ...]):
+        self.name: str = name
+        self.symbol: int = tk.symbol_table.intern(name)
+        self.parameters: tuple[str, ...] | None = tuple(parameters) if parameters is not None else None  # None if object-like
+        self.variadic: bool = variadic  # the last parameter takes the rest of the arguments
+        self.body: tuple[tk.Token, ...] = body
+
+        self.parameter_indexes: dict[int, int] = {}  # the symbol of a parameter to its index
+        for parameter_index, parameter in enumerate(self.parameters or ()):
+            self.parameter_indexes[tk.symbol_table.intern(parameter)] = parameter_index
+
+        # the identifiers (and keywords) of the replacement list, when none of them is a macro
+        # and there is no '##' an object-like macro expands to its replacement list as it is
+        self.symbols: tuple[int, ...] = tuple({token.symbol for token in body if token.symbol != tk.NO_SYMBOL})
+        self.has_paste: bool = any(token.kind == tk.TokenKind.HASH_HASH for token in body)
+
+    def is_function_like(self) -> bool:
+        return self.parameters is not None
+
+
+def lex_replacement_list(text: str, start: int, line: int, file_id: int,
+                         engine: lx.LexerEngine = lx.LexerEngine.CHARACTER) -> tuple[tk.Token, ...]:
+    """lex the replacement list of a macro, the tokens are put at start (the replacement list start in its file)"""
+    tokens: list[tk.Token] = []
+    piece_start: int = 0
+    for hash_match in hash_pattern.finditer(text):
+        if hash_match.group(1) is None:  # a string or a char literal
+            continue
+
+        tokens.extend(lex_piece(text[piece_start:hash_match.start()], start + piece_start, line, file_id, engine))
+        kind: tk.TokenKind = tk.TokenKind.HASH_HASH if hash_match.group(1) == '##' else tk.TokenKind.HASH
+        hash_token: tk.Token = tk.Token(kind, start + hash_match.start(), line, hash_match.group(1))
+        hash_token.file_id = file_id
+        tokens.append(hash_token)
+        piece_start = hash_match.end()
+
+    tokens.extend(lex_piece(text[piece_start:], start + piece_start, line, file_id, engine))
+    return tuple(tokens)
+
+
+def lex_piece(piece: str, start: int, line: int, file_id: int, engine: lx.LexerEngine) -> list[tk.Token]:
+    if piece.isspace() or not piece:
+        return []
+
+    lexer: lx.Lexer = lx.Lexer.from_string(piece, engine)
+    lexer.lex()
+    tokens: list[tk.Token] = lexer.tokens[:-1]
+    for token in tokens:
+        token.start += start
+        token.line = line
+        token.file_id = file_id
+    return tokens
+
+
+def parse_macro_definition(operands: str, start: int, line: int, file_id: int,
+                           engine: lx.LexerEngine = lx.LexerEngine.CHARACTER) -> Macro:
+    """
+    make the macro of the operands of a #define (start is where the operands start in their file),
+    a '(' right after the name (no whitespace before it) makes a function-like macro
+    """
+    name_match: re.Match | None = macro_name_pattern.match(operands)
+    if name_match is None:
+        raise eh.InvalidDirective("Macro name missing in #define")
+    name: str = name_match.group()
+
+    parameters: list[str] | None = None
+    variadic: bool = False
+    body_start: int = name_match.end()
+    if operands.startswith('(', body_start):
+        parameters_end: int = operands.find(')', body_start)
+        if parameters_end == -1:
+            raise eh.InvalidDirective(f"Missing ')' in the parameter list of macro '{name}'")
+
+        parameters = []
+        parameters_string: str = operands[body_start + 1:parameters_end]
+        for parameter in parameters_string.split(',') if parameters_string.strip() else []:
+            parameter_match: re.Match | None = parameter_pattern.fullmatch(parameter)
+            if variadic or parameter_match is None or parameter_match.group() == '' or \
+                    parameter_match.group(1) is None and parameter_match.group(2) is None:
+                raise eh.InvalidDirective(f"Invalid parameter '{parameter.strip()}' of macro '{name}'")
+
+            variadic = parameter_match.group(2) is not None
+            parameter_name: str = parameter_match.group(1) or VARIADIC_PARAMETER
+            if parameter_name in parameters:
+                raise eh.InvalidDirective(f"Duplicate parameter '{parameter_name}' of macro '{name}'")
+            parameters.append(parameter_name)
+        body_start = parameters_end + 1
+
+    body_text: str = operands[body_start:]
+    body: tuple[tk.Token, ...] = lex_replacement_list(body_text, start + body_start, line, file_id, engine)
+
+    if body and (body[0].kind == tk.TokenKind.HASH_HASH or body[-1].kind == tk.TokenKind.HASH_HASH):
+        raise eh.InvalidDirective("'##' cannot appear at either end of a macro expansion")
+    if parameters is not None:
+        parameter_symbols: set[int] = {tk.symbol_table.intern(parameter) for parameter in parameters}
+        for token_index, token in enumerate(body):
+            if token.kind == tk.TokenKind.HASH and \
+                    (token_index + 1 == len(body) or body[token_index + 1].symbol not in parameter_symbols):
+                raise eh.InvalidDirective("'#' is not followed by a macro parameter")
+
+    return Macro(name, parameters, variadic, body)
+
+
+def get_spelling(token: tk.Token) -> str:
+    """the source text of a token, the string of a string literal is decoded so it is escaped again"""
+    if token.kind != tk.TokenKind.STRING_LITERAL:
+        return token.string
+
+    quote: str = token.string[0]
+    other_quote: str = '"' if quote == '\'' else '\''  # a '"' in a char literal (or a '\'' in a string) is not escaped
+    return quote + ''.join(char if char == other_quote else char_to_escape_sequence.get(char, char)
+                           for char in token.string[1:-1]) + quote
+
+
+class TokenReader:
+    """
+    the tokens a macro expansion reads, the tokens an expansion makes are pushed in front of
+    the rest of the tokens, so they are read again (rescanned) before them
+    """
+
+    def __init__(self, tokens: list[tk.Token] | tuple[tk.Token, ...]):
+        self.tokens: list[tk.Token] | tuple[tk.Token, ...] = tokens
+        self.index: int = 0
+        self.pushed: list[tuple[tk.Token, frozenset[int]]] = []  # the next token is the last one
+
+    def read(self) -> tuple[tk.Token, frozenset[int]] | None:
+        if self.pushed:
+            return self.pushed.pop()
+        if self.index < len(self.tokens):
+            self.index += 1
+            return self.tokens[self.index - 1], EMPTY_HIDE_SET
+        return None
+
+    def peek(self) -> tk.Token | None:
+        if self.pushed:
+            return self.pushed[-1][0]
+        if self.index < len(self.tokens):
+            return self.tokens[self.index]
+        return None
+
+    def push(self, items: list[tuple[tk.Token, frozenset[int]]]) -> None:
+        self.pushed.extend(reversed(items))
+
+
+class MacroExpander:
+    """
+    expand the macros of a token list with hide sets (Prosser's algorithm), the tokens that are not macros
+    and the replacement list tokens are put in the output as they are, only a '#' or a '##' makes new tokens
+    """
+
+    def __init__(self, source_files: list, engine: lx.LexerEngine = lx.LexerEngine.CHARACTER):
+        self.source_files: list = source_files  # the files of the tokens by their file id (for the diagnostics)
+        self.engine: lx.LexerEngine = engine
+
+        self.macros: dict[int, Macro] = {}  # the defined macros by the symbol of their name
+        self.expansion_counts: dict[str, int] = {}  # the expansions of every macro name
+        self.pasted_tokens: dict[str, tuple[tk.TokenKind, str, int]] = {}  # the (kind, string, symbol) of a pasted spelling
+
+    def define(self, macro: Macro) -> None:
+        self.macros[macro.symbol] = macro
+
+    def undefine(self, name: str) -> None:
+        self.macros.pop(tk.symbol_table.lookup(name), None)
+
+    def is_defined(self, name: str) -> bool:
+        return tk.symbol_table.lookup(name) in self.macros
+
+    def get_expansion_hotspots(self, count: int | None = None) -> list[tuple[str, int]]:
+        """the macros that were expanded the most and their expansion counts"""
+        return sorted(self.expansion_counts.items(), key=lambda item: item[1], reverse=True)[:count]
+
+    def fatal_token(self, token: tk.Token, error_string: str, raise_exception) -> None:
+        source_file = self.source_files[token.file_id]
+        line, column = source_file.line_index.get_location(token.start)
+        full_error_string: str = f"\nMTCC:{source_file.path}:{line + 1}:{column + 1}: "
+        full_error_string += error_string + '\n'
+        full_error_string += f"    | {source_file.line_index.get_line_string(line)}"
+        raise raise_exception(full_error_string)
+
+    def expand(self, tokens: list[tk.Token] | tuple[tk.Token, ...], output: list[tk.Token]) -> None:
+        """expand the tokens into output"""
+        macros: dict[int, Macro] = self.macros
+        reader: TokenReader = TokenReader(tokens)
+
+        while True:
+            # the tokens that are not macros are put in the output with no hide set, right from the token list
+            if not reader.pushed:
+                index: int = reader.index
+                while index < len(tokens) and tokens[index].symbol not in macros:
+                    index += 1
+                output.extend(tokens[reader.index:index])
+                reader.index = index
+
+            item: tuple[tk.Token, frozenset[int]] | None = reader.read()
+            if item is None:
+                return
+
+            token, hide_set = item
+            if token.symbol not in macros or token.symbol in hide_set or not self.expand_macro(token, hide_set, reader, output):
+                output.append(token)
+
+    def expand_items(self, items: list[tuple[tk.Token, frozenset[int]]]) -> list[tuple[tk.Token, frozenset[int]]]:
+        """expand the tokens of a macro argument, the hide sets are kept for the rescan of the expansion"""
+        reader: TokenReader = TokenReader(())
+        reader.push(items)
+        output: list[tuple[tk.Token, frozenset[int]]] = []
+        expanded_tokens: list[tk.Token] = []
+
+        item: tuple[tk.Token, frozenset[int]] | None = reader.read()
+        while item is not None:
+            token, hide_set = item
+            if token.symbol in self.macros and token.symbol not in hide_set and \
+                    self.expand_macro(token, hide_set, reader, expanded_tokens):
+                output.extend((expanded_token, EMPTY_HIDE_SET) for expanded_token in expanded_tokens)
+                expanded_tokens.clear()
+            else:
+                output.append(item)
+            item = reader.read()
+
+        return output
+
+    def expand_macro(self, token: tk.Token, hide_set: frozenset[int], reader: TokenReader, output: list[tk.Token]) -> bool:
+        """
+        expand the macro of the token, the expansion is pushed back to the reader (or put right in the output when
+        it can not be expanded any more), return False for a function-like macro name with no '(' after it
+        """
+        macro: Macro = self.macros[token.symbol]
+
+        if not macro.is_function_like():
+            self.expansion_counts[macro.name] = self.expansion_counts.get(macro.name, 0) + 1
+            if not macro.has_paste and not any(symbol in self.macros for symbol in macro.symbols):
+                output.extend(macro.body)  # nothing in the replacement list is a macro, so its tokens are shared
+                return True
+
+            reader.push(self.substitute(macro, None, hide_set | {macro.symbol}, token))
+            return True
+
+        next_token: tk.Token | None = reader.peek()
+        if next_token is None or next_token.kind != tk.TokenKind.OPENING_PARENTHESIS:
+            return False
+        self.expansion_counts[macro.name] = self.expansion_counts.get(macro.name, 0) + 1
+
+        arguments, closing_hide_set = self.read_arguments(macro, token, reader)
+        reader.push(self.substitute(macro, arguments, (hide_set & closing_hide_set) | {macro.symbol}, token))
+        return True
+
+    def read_arguments(self, macro: Macro, token: tk.Token,
+                       reader: TokenReader) -> tuple[list[list[tuple[tk.Token, frozenset[int]]]], frozenset[int]]:
+        """read the arguments of a function-like macro, return them and the hide set of the closing ')'"""
+        reader.read()  # the '('
+        arguments: list[list[tuple[tk.Token, frozenset[int]]]] = [[]]
+        depth: int = 0
+
+        while True:
+            item: tuple[tk.Token, frozenset[int]] | None = reader.read()
+            if item is None:
+                self.fatal_token(token, f"Unterminated argument list invoking macro '{macro.name}'",
+                                 eh.InvalidMacroInvocation)
+
+            kind: tk.TokenKind = item[0].kind
+            if kind == tk.TokenKind.OPENING_PARENTHESIS:
+                depth += 1
+            elif kind == tk.TokenKind.CLOSING_PARENTHESIS:
+                if depth == 0:
+                    break
+                depth -= 1
+            elif kind == tk.TokenKind.COMMA and depth == 0 and \
+                    not (macro.variadic and len(arguments) == len(macro.parameters)):  # the variadic argument has commas
+                arguments.append([])
+                continue
+            arguments[-1].append(item)
+
+        if not macro.parameters and arguments == [[]]:  # F() has no arguments
+            arguments = []
+        elif macro.variadic and len(arguments) == len(macro.parameters) - 1:  # no variadic argument
+            arguments.append([])
+
+        if len(arguments) != len(macro.parameters):
+            self.fatal_token(token, f"Macro '{macro.name}' requires {len(macro.parameters)} arguments, "
+                                    f"but {len(arguments)} given", eh.InvalidMacroInvocation)
+        return arguments, item[1]
+
+    def substitute(self, macro: Macro, arguments: list[list[tuple[tk.Token, frozenset[int]]]] | None,
+                   hide_set: frozenset[int], token: tk.Token) -> list[tuple[tk.Token, frozenset[int]]]:
+        """
+        the replacement list with its parameters replaced by their arguments, an argument is expanded unless it is
+        next to a '#' or a '##', every token gets the hide set (token is the macro name, for the diagnostics)
+        """
+        body: tuple[tk.Token, ...] = macro.body
+        # an empty argument next to a '##' is a placemarker (None) that is removed at the end
+        output: list[tuple[tk.Token, frozenset[int]] | None] = []
+        expanded_arguments: dict[int, list[tuple[tk.Token, frozenset[int]]]] = {}
+        paste: bool = False
+
+        body_index: int = 0
+        while body_index < len(body):
+            body_token: tk.Token = body[body_index]
+            parameter_index: int | None = macro.parameter_indexes.get(body_token.symbol) if arguments is not None else None
+            body_index += 1
+
+            if body_token.kind == tk.TokenKind.HASH_HASH:
+                paste = True
+                continue
+
+            if body_token.kind == tk.TokenKind.HASH and arguments is not None:
+                items: list = [(self.stringize(arguments[macro.parameter_indexes[body[body_index].symbol]], body_token),
+                                EMPTY_HIDE_SET)]
+                body_index += 1
+            elif parameter_index is not None:
+                if paste or (body_index < len(body) and body[body_index].kind == tk.TokenKind.HASH_HASH):
+                    items = arguments[parameter_index] or [None]
+                else:
+                    if parameter_index not in expanded_arguments:
+                        expanded_arguments[parameter_index] = self.expand_items(arguments[parameter_index])
+                    items = expanded_arguments[parameter_index]
+            else:
+                items = [(body_token, EMPTY_HIDE_SET)]
+
+            if not paste:
+                output.extend(items)
+                continue
+
+            paste = False
+            left: tuple[tk.Token, frozenset[int]] | None = output.pop()
+            if left is not None and left[0].kind == tk.TokenKind.COMMA and \
+                    macro.variadic and parameter_index == len(macro.parameters) - 1:
+                # , ## __VA_ARGS__ drops the comma when there is no variadic argument, and pastes nothing when there is
+                if items[0] is not None:
+                    output.append(left)
+                    output.extend(items)
+                continue
+            if left is None:
+                output.extend(items)
+            elif items[0] is None:
+                output.append(left)
+            else:
+                output.append(self.paste(left, items[0], token))
+                output.extend(items[1:])
+
+        return [(output_token, output_hide_set | hide_set) for output_token, output_hide_set in filter(None, output)]
+
+    def stringize(self, argument: list[tuple[tk.Token, frozenset[int]]], hash_token: tk.Token) -> tk.Token:
+        """the string literal of the spelling of an argument, whitespace between its tokens is one space"""
+        spellings: list[str] = []
+        for argument_token, _ in argument:
+            # the tokens of an argument may come from anywhere (an expansion), so the whitespace is found in the file
+            # of every token, right before it
+            if spellings and argument_token.start > 0 and \
+                    self.source_files[argument_token.file_id].source[argument_token.start - 1] in ' \t\n\r\v\f':
+                spellings.append(' ')
+            spellings.append(get_spelling(argument_token))
+
+        string_token: tk.Token = tk.Token(tk.TokenKind.STRING_LITERAL, hash_token.start, hash_token.line,
+                                          '"' + ''.join(spellings) + '"')
+        string_token.file_id = hash_token.file_id
+        return string_token
+
+    def paste(self, left: tuple[tk.Token, frozenset[int]], right: tuple[tk.Token, frozenset[int]],
+              token: tk.Token) -> tuple[tk.Token, frozenset[int]]:
+        """the token of the spellings of two tokens, the spelling must be lexed to one token"""
+        spelling: str = get_spelling(left[0]) + get_spelling(right[0])
+
+        pasted_token: tuple[tk.TokenKind, str, int] | None = self.pasted_tokens.get(spelling)
+        if pasted_token is None:
+            lexer: lx.Lexer = lx.Lexer.from_string(spelling, self.engine)
+            try:
+                lexer.lex()
+            except SyntaxError:
+                lexer.tokens = []
+            if len(lexer.tokens) != 2:
+                self.fatal_token(token, f"Pasting \"{get_spelling(left[0])}\" and \"{get_spelling(right[0])}\" "
+                                        f"does not give a valid preprocessing token", eh.InvalidMacroInvocation)
+
+            pasted_token = (lexer.tokens[0].kind, lexer.tokens[0].string, lexer.tokens[0].symbol)
+            self.pasted_tokens[spelling] = pasted_token
+
+        kind, string, symbol = pasted_token
+        new_token: tk.Token = tk.Token(kind, left[0].start, left[0].line, string, symbol)
+        new_token.file_id = left[0].file_id
+        return new_token, left[1] & right[1]
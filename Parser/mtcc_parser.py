@@ -1,93 +1,530 @@
 from __future__ import annotations
 
+import concurrent.futures
+import io
+import itertools
+import os
+import pickle
+from typing import Callable, Generator, Iterator
+
 import Parser.mtcc_error_handler as eh
+import Parser.mtcc_preprocessor as pp
+import Parser.mtcc_source as src
 from Parser.mtcc_c_ast import *
 
 
-class CParser:
-    def __init__(self, tokens: list[tk.Token], source_string: str):
+# the rule of a statement that nests statements, it yields when it needs a statement and is sent the statement
+# (see CParser.run_statement_rules), it returns its node
+StatementRule = Generator[None, Node, Node]
+
+
+# the kinds of the frames of CParser.peek_operator_expression, a frame is a tuple of its kind and its fields
+# (ints and not an Enum, an Enum member is slow to look up for every token)
+PREFIX_FRAME: int = 0  # (PREFIX_FRAME, unary op kind) a unary operator waits for its operand
+CAST_FRAME: int = 1  # (CAST_FRAME, type name) a cast waits for its operand
+BINARY_FRAME: int = 2  # (BINARY_FRAME, left, binary op kind, precedence) a binary operator waits for its right operand
+ASSIGNMENT_FRAME: int = 3  # (ASSIGNMENT_FRAME, left, binary op kind, precedence) the same for an assignment
+CONDITIONAL_TRUE_FRAME: int = 4  # (CONDITIONAL_TRUE_FRAME, condition, precedence) a ?: waits for its true value
+CONDITIONAL_FALSE_FRAME: int = 5  # (CONDITIONAL_FALSE_FRAME, condition, true value, precedence) and for its false value
+EXPRESSION_FRAME: int = 6  # (EXPRESSION_FRAME, assignment expressions) an expression waits for its next , operand
+PARENTHESES_FRAME: int = 7  # (PARENTHESES_FRAME, precedence) a "(" expression ")" waits for its expression
+SUBSCRIPT_FRAME: int = 8  # (SUBSCRIPT_FRAME, expression, precedence) a subscript waits for its index
+ARGUMENTS_FRAME: int = 9  # (ARGUMENTS_FRAME, function, arguments, precedence) a function call waits for an argument
+
+# the states of CParser.peek_operator_expression
+OPERAND_STATE: int = 0  # the operand or its prefix operators are next
+POSTFIX_STATE: int = 1  # the primary expression of the operand is parsed, its postfix operator may be next
+OPERATOR_STATE: int = 2  # the operand is parsed, a binary, ?: or assignment operator may be next
+
+# the errors the parser raises for a source that does not parse (see fatal_token)
+PARSE_ERRORS: tuple[type[Exception], ...] = (
+    eh.PrimaryExpressionNotFound, eh.SpecifierQualifierListInvalid, eh.TokenExpected, eh.TypeQualifierNotFound,
+    eh.TypeSpecifierNotFound, eh.TypedefNameNotFound, eh.InvalidTypedef, SyntaxError)
+
+
+class TypedefTable:
+    """
+    the typedef names in scope by the symbol of their identifier, a block scope is pushed and popped around every
+    function body and compound statement, a typedef declared in a block and an ordinary identifier that hides
+    a typedef there are undone when the block ends
+    """
+
+    def __init__(self):
+        self.typedefs: dict[int, CTypedef | None] = {}  # None for an ordinary identifier that hides a typedef
+        # the names every open block scope declared, with what they hid (and if there was anything to hide)
+        self.scopes: list[list[tuple[int, CTypedef | None, bool]]] = []
+
+    def append(self, typedef: CTypedef) -> None:
+        symbol: int = typedef.declarator.identifier.symbol
+        if not self.scopes:
+            # the first typedef of a name at file scope is the one that is found
+            self.typedefs.setdefault(symbol, typedef)
+        else:
+            self.declare(symbol, typedef)
+
+    def hide(self, symbol: int) -> None:
+        """an ordinary identifier (a variable, a function or a parameter) declared in a block hides a typedef in it"""
+        if self.scopes and self.typedefs.get(symbol) is not None:
+            self.declare(symbol, None)
+
+    def declare(self, symbol: int, typedef: CTypedef | None) -> None:
+        self.scopes[-1].append((symbol, self.typedefs.get(symbol), symbol in self.typedefs))
+        self.typedefs[symbol] = typedef
+
+    def push_scope(self) -> None:
+        self.scopes.append([])
+
+    def pop_scope(self) -> None:
+        for symbol, hidden_typedef, was_declared in reversed(self.scopes.pop()):
+            if was_declared:
+                self.typedefs[symbol] = hidden_typedef
+            else:
+                del self.typedefs[symbol]
+
+    def get(self, symbol: int) -> CTypedef | None:
+        return self.typedefs.get(symbol)
+
+    def __contains__(self, symbol: int) -> bool:
+        return self.typedefs.get(symbol) is not None
+
+    def __iter__(self) -> Iterator[CTypedef]:
+        return (typedef for typedef in self.typedefs.values() if typedef is not None)
+
+    def __len__(self) -> int:
+        return sum(typedef is not None for typedef in self.typedefs.values())
+
+
+class TagTable:
+    """the struct, union and enum tags of a translation unit that were defined (with a member list) by their symbol"""
+
+    def __init__(self):
+        self.tags: dict[int, CStruct | CUnion | CEnum] = {}
+        # the index of the identifier token of a tag in the tokens of the parser (-1 for a tag from before them),
+        # a token object of a macro or a cached header is shared by its uses, so its own index can not be used
+        self.indexes: dict[int, int] = {}
+
+    def append(self, tag: CStruct | CUnion | CEnum, index: int = -1) -> None:
+        # the first definition of a tag is the one that is found
+        if tag.identifier.symbol not in self.tags:
+            self.tags[tag.identifier.symbol] = tag
+            self.indexes[tag.identifier.symbol] = index
+
+    def get(self, symbol: int) -> CStruct | CUnion | CEnum | None:
+        return self.tags.get(symbol)
+
+    def __contains__(self, symbol: int) -> bool:
+        return symbol in self.tags
+
+    def __iter__(self) -> Iterator[CStruct | CUnion | CEnum]:
+        return iter(self.tags.values())
+
+    def __len__(self) -> int:
+        return len(self.tags)
+
+
+class FunctionBody:
+    """
+    a function body the first pass of CParser.peek_translation_unit_parallel skipped,
+    it is parsed in a worker process with the typedef names that are in scope at it
+    """
+
+    def __init__(self, function: CFunction, start_index: int, end_index: int, typedef_count: int,
+                 scope_typedefs: list[tuple[int, CTypedef | None]]):
+        self.function: CFunction = function  # the function the body is of
+        self.start_index: int = start_index  # the index of its { token
+        self.end_index: int = end_index  # the index of the token after its } token
+        self.typedef_count: int = typedef_count  # the file scope typedefs before it
+        self.scope_typedefs: list[tuple[int, CTypedef | None]] = scope_typedefs  # its parameters (see TypedefTable.declare)
+
+
+class FunctionBodyToken(tk.Token):
+    """a token of a worker, it is pickled as the token of the parser that sent it (see FunctionBodyPickler)"""
+
+    def __init__(self, kind: tk.TokenKind, string: str, symbol: int, parser_index: int):  # made for every token of a chunk
+        self.kind: tk.TokenKind = kind
+        self.start: int = 0  # a worker does not make diagnostics
+        self.line: int = 0
+        self.string: str = string
+        self.symbol: int = symbol
+        self.index: int = 0
+        self.parser_index: int = parser_index  # the index of the token in the tokens of the parser
+
+
+class FunctionBodyTypedef(CTypedef):
+    """a stand-in for a typedef of the parser in a worker, it is pickled as the typedef of its key"""
+
+    def __init__(self, key: int):
+        super().__init__(NoneNode())
+        self.key: int = key
+
+
+class FunctionBodyPickler(pickle.Pickler):
+    """pickle the function bodies of a worker, a token is its index in the parser and a typedef is its key"""
+
+    def persistent_id(self, obj) -> int | tuple[str, int] | None:
+        if obj.__class__ is FunctionBodyToken:
+            return obj.parser_index
+        if obj.__class__ is FunctionBodyTypedef:
+            return 'typedef', obj.key
+        return None
+
+
+class FunctionBodyUnpickler(pickle.Unpickler):
+    """unpickle the function bodies of a worker, its tokens and typedefs are the ones of the parser"""
+
+    def __init__(self, file: io.BytesIO, tokens: list[tk.Token], typedefs: list[CTypedef]):
+        super().__init__(file)
         self.tokens: list[tk.Token] = tokens
-        for token_index in range(len(self.tokens)):
-            self.tokens[token_index].index = token_index
+        self.typedefs: list[CTypedef] = typedefs  # the typedefs by their key
+
+    def persistent_load(self, pid: int | tuple[str, int]) -> tk.Token | CTypedef:
+        if isinstance(pid, int):
+            return self.tokens[pid]
+        return self.typedefs[pid[1]]
+
+
+def parse_function_bodies(token_kinds: list[int], token_strings: list[str], token_symbols: list[int], first_index: int,
+                          typedef_symbols: list[int], bodies: list[tuple[int, int, int, list[tuple[int, int]]]],
+                          precedence_climbing: bool) -> bytes:
+    """
+    parse the function bodies of a chunk of tokens in a worker process (see CParser.peek_translation_unit_parallel),
+    the symbols are the ones of the parser, a typedef is a key: the file scope typedefs by their order and then
+    the typedefs of parameters, a body is its start and end index, the count of the file scope typedefs before it
+    and the (symbol, key) of its parameters (a key -1 for a parameter that hides a typedef)
+    :return: the pickle of the compound statements of the bodies and the tags they defined (with their index)
+    """
+    tokens: list[tk.Token] = [FunctionBodyToken(tk.token_kinds[kind_code], string, symbol, first_index + index)
+                              for index, (kind_code, string, symbol) in enumerate(zip(token_kinds, token_strings, token_symbols))]
+    tokens.append(tk.Token(tk.TokenKind.END, 0, 0, '\0'))
+    parser: CParser = CParser(tokens, '', precedence_climbing=precedence_climbing)
+
+    typedefs: dict[int, FunctionBodyTypedef] = {}
+    for key in itertools.chain(range(len(typedef_symbols)), (key for body in bodies for _, key in body[3] if key >= 0)):
+        typedefs.setdefault(key, FunctionBodyTypedef(key))
+
+    compound_statements: list[CCompound] = []
+    typedef_count: int = 0
+    for start_index, end_index, body_typedef_count, scope_typedefs in bodies:
+        for key in range(typedef_count, body_typedef_count):  # the file scope typedefs only grow from body to body
+            parser.typedefs.typedefs[typedef_symbols[key]] = typedefs[key]
+        typedef_count = body_typedef_count
+
+        parser.typedefs.push_scope()
+        for symbol, key in scope_typedefs:
+            parser.typedefs.declare(symbol, typedefs[key] if key >= 0 else None)
+        parser.set_index_token(start_index - first_index)
+        compound_statements.append(parser.peek_compound_statement())
+        parser.typedefs.pop_scope()
+
+        if parser.index != end_index - first_index:
+            parser.fatal_token(parser.index, "A function body is not the tokens of its curly braces", eh.TokenExpected)
+
+    tags: list[tuple[int, CStruct | CUnion | CEnum]] = [(parser.tags.indexes[tag.identifier.symbol] + first_index, tag)
+                                                        for tag in parser.tags]
+    file: io.BytesIO = io.BytesIO()
+    FunctionBodyPickler(file, pickle.HIGHEST_PROTOCOL).dump((compound_statements, tags))
+    return file.getvalue()
+
+
+class CParser:
+    # the FIRST sets of the predicates, the token kinds a construct can start with
+    storage_class_specifier_kinds: frozenset[tk.TokenKind] = frozenset({
+        tk.TokenKind.TYPEDEF, tk.TokenKind.EXTERN, tk.TokenKind.STATIC, tk.TokenKind.AUTO, tk.TokenKind.REGISTER})
+    type_specifier_kinds: frozenset[tk.TokenKind] = frozenset({  # and a typedef name (an IDENTIFIER)
+        tk.TokenKind.VOID, tk.TokenKind.CHAR, tk.TokenKind.SHORT, tk.TokenKind.INT, tk.TokenKind.LONG, tk.TokenKind.FLOAT,
+        tk.TokenKind.DOUBLE, tk.TokenKind.SIGNED, tk.TokenKind.UNSIGNED, tk.TokenKind.STRUCT, tk.TokenKind.UNION,
+        tk.TokenKind.ENUM})
+    type_qualifier_kinds: frozenset[tk.TokenKind] = frozenset({tk.TokenKind.CONST, tk.TokenKind.VOLATILE})
+    # the kinds a declaration specifier can start with (without the typedef names)
+    declaration_specifier_kinds: frozenset[tk.TokenKind] = \
+        storage_class_specifier_kinds | type_specifier_kinds | type_qualifier_kinds
+    labeled_statement_kinds: frozenset[tk.TokenKind] = frozenset({tk.TokenKind.CASE, tk.TokenKind.DEFAULT})  # and IDENTIFIER ':'
+    selection_statement_kinds: frozenset[tk.TokenKind] = frozenset({tk.TokenKind.IF, tk.TokenKind.SWITCH})
+    iteration_statement_kinds: frozenset[tk.TokenKind] = frozenset({tk.TokenKind.WHILE, tk.TokenKind.DO, tk.TokenKind.FOR})
+    jump_statement_kinds: frozenset[tk.TokenKind] = frozenset({
+        tk.TokenKind.GOTO, tk.TokenKind.CONTINUE, tk.TokenKind.BREAK, tk.TokenKind.RETURN})
+    abstract_declarator_kinds: frozenset[tk.TokenKind] = frozenset({
+        tk.TokenKind.ASTERISK, tk.TokenKind.OPENING_PARENTHESIS, tk.TokenKind.OPENING_BRACKET})
+    direct_abstract_declarator_kinds: frozenset[tk.TokenKind] = frozenset({
+        tk.TokenKind.OPENING_PARENTHESIS, tk.TokenKind.OPENING_BRACKET})
+    direct_declarator_kinds: frozenset[tk.TokenKind] = frozenset({
+        tk.TokenKind.IDENTIFIER, tk.TokenKind.OPENING_PARENTHESIS, tk.TokenKind.OPENING_BRACKET})
+    declarator_kinds: frozenset[tk.TokenKind] = frozenset({
+        tk.TokenKind.ASTERISK, tk.TokenKind.IDENTIFIER, tk.TokenKind.OPENING_PARENTHESIS, tk.TokenKind.OPENING_BRACKET})
+    primary_expression_kinds: frozenset[tk.TokenKind] = frozenset({  # and a "(" expression ")"
+        tk.TokenKind.IDENTIFIER, tk.TokenKind.INTEGER_LITERAL, tk.TokenKind.FLOAT_LITERAL, tk.TokenKind.STRING_LITERAL})
+    postfix_operator_kinds: frozenset[tk.TokenKind] = frozenset({
+        tk.TokenKind.OPENING_BRACKET, tk.TokenKind.OPENING_PARENTHESIS, tk.TokenKind.PERIOD, tk.TokenKind.PTR_OP,
+        tk.TokenKind.INC_OP, tk.TokenKind.DEC_OP})
+
+    # the unary operators that apply to a cast expression and the ones that apply to a unary expression
+    cast_unary_operators: dict[tk.TokenKind, CUnaryOpKind] = {
+        tk.TokenKind.AMPERSAND: CUnaryOpKind.Reference,
+        tk.TokenKind.ASTERISK: CUnaryOpKind.Dereference,
+        tk.TokenKind.PLUS: CUnaryOpKind.Plus,
+        tk.TokenKind.HYPHEN: CUnaryOpKind.Minus,
+        tk.TokenKind.TILDE: CUnaryOpKind.BitwiseNOT,
+        tk.TokenKind.EXCLAMATION: CUnaryOpKind.LogicalNOT,
+    }
+    increment_unary_operators: dict[tk.TokenKind, CUnaryOpKind] = {
+        tk.TokenKind.INC_OP: CUnaryOpKind.PreIncrease,
+        tk.TokenKind.DEC_OP: CUnaryOpKind.PreDecrease,
+    }
+
+    # the binding powers of the operators of an expression (see peek_operator_expression),
+    # the operators of a higher precedence bind first, an assignment and a ?: are right associative
+    ASSIGNMENT_PRECEDENCE: int = 1
+    CONDITIONAL_PRECEDENCE: int = 2
+    binary_operators: dict[tk.TokenKind, tuple[int, CBinaryOpKind]] = {
+        tk.TokenKind.OR_OP: (3, CBinaryOpKind.LogicalOR),
+        tk.TokenKind.AND_OP: (4, CBinaryOpKind.LogicalAND),
+        tk.TokenKind.VERTICAL_BAR: (5, CBinaryOpKind.BitwiseOR),
+        tk.TokenKind.CIRCUMFLEX: (6, CBinaryOpKind.BitwiseXOR),
+        tk.TokenKind.AMPERSAND: (7, CBinaryOpKind.BitwiseAND),
+        tk.TokenKind.EQ_OP: (8, CBinaryOpKind.EqualTo),
+        tk.TokenKind.NE_OP: (8, CBinaryOpKind.NotEqualTo),
+        tk.TokenKind.LESS_THAN: (9, CBinaryOpKind.LessThan),
+        tk.TokenKind.GREATER_THAN: (9, CBinaryOpKind.GreaterThan),
+        tk.TokenKind.LE_OP: (9, CBinaryOpKind.LessThanOrEqualTo),
+        tk.TokenKind.GE_OP: (9, CBinaryOpKind.GreaterThanOrEqualTo),
+        tk.TokenKind.LEFT_OP: (10, CBinaryOpKind.LeftShift),
+        tk.TokenKind.RIGHT_OP: (10, CBinaryOpKind.RightShift),
+        tk.TokenKind.PLUS: (11, CBinaryOpKind.Addition),
+        tk.TokenKind.HYPHEN: (11, CBinaryOpKind.Subtraction),
+        tk.TokenKind.ASTERISK: (12, CBinaryOpKind.Multiplication),
+        tk.TokenKind.SLASH: (12, CBinaryOpKind.Division),
+        tk.TokenKind.PERCENTAGE: (12, CBinaryOpKind.Modulus),
+    }
+    assignment_operators: dict[tk.TokenKind, CBinaryOpKind] = {
+        tk.TokenKind.EQUALS: CBinaryOpKind.Assignment,
+        tk.TokenKind.MUL_ASSIGN: CBinaryOpKind.MultiplicationAssignment,
+        tk.TokenKind.DIV_ASSIGN: CBinaryOpKind.DivisionAssignment,
+        tk.TokenKind.MOD_ASSIGN: CBinaryOpKind.ModulusAssignment,
+        tk.TokenKind.ADD_ASSIGN: CBinaryOpKind.AdditionAssignment,
+        tk.TokenKind.SUB_ASSIGN: CBinaryOpKind.SubtractionAssignment,
+        tk.TokenKind.LEFT_ASSIGN: CBinaryOpKind.LeftShiftAssignment,
+        tk.TokenKind.RIGHT_ASSIGN: CBinaryOpKind.RightShiftAssignment,
+        tk.TokenKind.AND_ASSIGN: CBinaryOpKind.BitwiseAndAssignment,
+        tk.TokenKind.XOR_ASSIGN: CBinaryOpKind.BitwiseXorAssignment,
+        tk.TokenKind.OR_ASSIGN: CBinaryOpKind.BitwiseOrAssignment,
+    }
+
+    def __init__(self, tokens: list[tk.Token] | tk.TokenStream | tk.TokenBuffer, source_string: str | bytes,
+                 line_index: src.LineIndex | None = None, locations: src.LocationMap | None = None,
+                 source_files: list[pp.SourceFile] | None = None, precedence_climbing: bool = True,
+                 count_reparses: bool = False, recover_errors: bool = False, max_errors: int = 50):
+        self.tokens: list[tk.Token] | tk.TokenStream | tk.TokenBuffer = tokens
+        if isinstance(self.tokens, list):  # a token stream or a token buffer indexes its tokens itself
+            for token_index in range(len(self.tokens)):
+                self.tokens[token_index].index = token_index
         self.index: int = 0
         self.current_token: tk.Token = self.tokens[self.index]
 
-        self.source_string: str = source_string
+        self.source_string: str | bytes = source_string  # a bytes source may be memory mapped (see MappedLexer)
+        self.line_index: src.LineIndex | None = line_index  # the lexer line index of the source can be passed in
+        self.locations: src.LocationMap | None = locations  # the linemarkers of a preprocessed source
+        self.source_files: list[pp.SourceFile] | None = source_files  # the files of the tokens of a Preprocessor
 
         self.current_block: Block | None = None
 
-        self.typedefs: list[CTypedef] = []
+        self.typedefs: TypedefTable = TypedefTable()
+        self.tags: TagTable = TagTable()
         self.declensions_list: list[CFunction] = []
 
+        # parse an expression with the binding powers of its operators (on an explicit stack, so a deep expression
+        # does not recurse), or down the recursive chain of the grammar
+        # (peek_logical_or_expression to peek_multiplicative_expression), both make the same tree
+        self.precedence_climbing: bool = precedence_climbing
+
+        # the reparse counters of the rules (see count_rule_reparses), only kept when count_reparses is set
+        self.count_reparses: bool = count_reparses
+        self.rule_starts: set[tuple[str, int]] = set()  # (rule, token index) of every rule that was parsed
+        self.rule_stack: list[str] = []  # the rules that are being parsed
+        self.rule_counts: dict[str, int] = {}  # the times a rule was parsed
+        self.reparse_counts: dict[str, int] = {}  # the times a rule parsed tokens it already parsed
+        if count_reparses:
+            self.count_rule_reparses()
+
+        # a parse that recovers from its errors records an error and goes on after the declaration or the statement
+        # of it (see recover_error), the tree gets a CError for it, the parse stops after max_errors errors
+        self.recover_errors: bool = recover_errors
+        self.max_errors: int = max_errors
+        self.diagnostics: list[Exception] = []  # the errors of the parse
+        self.fatal_error: Exception | None = None  # the last error fatal_token raised
+        self.fatal_error_index: int = -1  # the token of it
+        self.diagnostic_index: int = -1  # the token of the last error of the parse
+
+        # the function bodies the first pass of peek_translation_unit_parallel skipped, None when they are parsed
+        self.function_bodies: list[FunctionBody] | None = None
+
+        # the rule of the kind of the first token of a statement that nests statements
+        # (a jump statement or an expression statement if none)
+        self.statement_rules: dict[tk.TokenKind, Callable[[], StatementRule]] = {
+            tk.TokenKind.CASE: self.generate_labeled_statement,
+            tk.TokenKind.DEFAULT: self.generate_labeled_statement,
+            tk.TokenKind.OPENING_CURLY_BRACE: self.generate_compound_statement,
+            tk.TokenKind.IF: self.generate_selection_statement,
+            tk.TokenKind.SWITCH: self.generate_selection_statement,
+            tk.TokenKind.WHILE: self.generate_iteration_statement,
+            tk.TokenKind.DO: self.generate_iteration_statement,
+            tk.TokenKind.FOR: self.generate_iteration_statement,
+        }
+        # the rest of an external declaration by the kind of the token after its first declarator
+        # (a function definition if none)
+        self.external_declaration_handlers: dict[tk.TokenKind, Callable[..., None]] = {
+            tk.TokenKind.COMMA: self.peek_declaration_rest,
+            tk.TokenKind.EQUALS: self.peek_declaration_rest,
+            tk.TokenKind.SEMICOLON: self.peek_declaration_rest,
+        }
+
     def peek_token(self) -> None:  # increase the index and update the current token
         self.index += 1
         self.current_token = self.tokens[self.index]
 
     def drop_token(self) -> None:  # decrease the index and update the current token
+        if self.count_reparses:
+            self.count_reparse(self.rule_stack[-1] if self.rule_stack else '')
         self.index -= 1
         self.current_token = self.tokens[self.index]
 
     def set_index_token(self, index: int) -> None:
+        if self.count_reparses and index < self.index:
+            self.count_reparse(self.rule_stack[-1] if self.rule_stack else '')
         self.index = index
         self.current_token = self.tokens[self.index]
 
-    def is_token_kind(self, kind: list[tk.TokenKind] | tk.TokenKind) -> bool:
+    def count_rule_reparses(self) -> None:
+        """
+        count the times every rule (a peek_ method) of this parser is parsed, and the times it parses tokens it already
+        parsed: it starts again at a token it started at, or the parser steps back over a token while it is parsed
+        """
+        for name in dir(type(self)):
+            if name.startswith('peek_') and name != 'peek_token':
+                setattr(self, name, self.make_counted_rule(name, getattr(self, name)))  # before the handler tables
+
+    def make_counted_rule(self, name: str, rule: Callable) -> Callable:
+        def counted_rule(*args, **kwargs):
+            self.rule_counts[name] = self.rule_counts.get(name, 0) + 1
+            rule_start: tuple[str, int] = (name, self.index)
+            if rule_start in self.rule_starts:
+                self.count_reparse(name)
+            self.rule_starts.add(rule_start)
+
+            self.rule_stack.append(name)
+            try:
+                return rule(*args, **kwargs)
+            finally:
+                self.rule_stack.pop()
+
+        return counted_rule
+
+    def count_reparse(self, name: str) -> None:
+        self.reparse_counts[name] = self.reparse_counts.get(name, 0) + 1
+
+    def is_token_kind(self, kind: frozenset[tk.TokenKind] | list[tk.TokenKind] | tk.TokenKind) -> bool:
         if isinstance(kind, tk.TokenKind):
             return self.current_token.kind == kind
         else:
             return self.current_token.kind in kind
 
     def is_token_storage_class_specifier(self) -> bool:
-        return self.is_token_kind(
-            [tk.TokenKind.TYPEDEF,
-             tk.TokenKind.EXTERN,
-             tk.TokenKind.STATIC,
-             tk.TokenKind.AUTO,
-             tk.TokenKind.REGISTER])
+        return self.current_token.kind in self.storage_class_specifier_kinds
 
     def is_token_type_specifier(self) -> bool:
-        return self.is_token_kind(
-            [tk.TokenKind.VOID,
-             tk.TokenKind.CHAR,
-             tk.TokenKind.SHORT,
-             tk.TokenKind.INT,
-             tk.TokenKind.LONG,
-             tk.TokenKind.FLOAT,
-             tk.TokenKind.DOUBLE,
-             tk.TokenKind.SIGNED,
-             tk.TokenKind.UNSIGNED,
-             tk.TokenKind.STRUCT,
-             tk.TokenKind.UNION,
-             tk.TokenKind.ENUM]) or self.is_typedef_name()
+        return self.current_token.kind in self.type_specifier_kinds or self.is_typedef_name()
 
     def is_token_type_qualifier(self) -> bool:
-        return self.is_token_kind(
-            [tk.TokenKind.CONST,
-             tk.TokenKind.VOLATILE])
+        return self.current_token.kind in self.type_qualifier_kinds
+
+    def is_token_declaration_specifier(self) -> bool:
+        """check if the current token is a storage class specifier, a type specifier or a type qualifier"""
+        return self.current_token.kind in self.declaration_specifier_kinds or self.is_typedef_name()
+
+    def get_line_index(self) -> src.LineIndex:
+        if self.line_index is None:  # only made for the first diagnostic
+            self.line_index = src.LineIndex(self.source_string)
+        return self.line_index
 
     def get_line_string(self, line: int) -> str:
-        lines: list[str] = self.source_string.split('\n')
-        if line <= len(lines):
-            return lines[line]
-        else:
-            return ""
+        return self.get_line_index().get_line_string(line)
 
     def get_line_substring_at_index(self, index: int) -> str:
-        # find the beginning of the line containing the index
-        start_of_line = self.source_string.rfind('\n', 0, index) + 1 if '\n' in self.source_string[:index] else 0
-        return self.source_string[start_of_line:index]
+        return self.get_line_index().get_line_substring_at_index(index)
 
     def fatal_token(self, token_location: int, error_string: str, raise_exception) -> None:
-        line_string: str = self.get_line_string(self.tokens[token_location].line)
-        sub_line_string: str = self.get_line_substring_at_index(
-            self.tokens[token_location].start)  # the sub line right up to the token start
-        full_error_string: str = f"\nMTCC:{self.tokens[token_location].line + 1}:{len(sub_line_string) + 1}: "
+        token: tk.Token = self.tokens[token_location]
+        line_index: src.LineIndex = self.get_line_index()
+        if self.source_files is not None:  # the token of a Preprocessor is in the file of its file id
+            line_index = self.source_files[token.file_id].line_index
+
+        line: int = line_index.get_line(token.start)
+        line_string: str = line_index.get_line_string(line)
+        sub_line_string: str = line_index.get_line_substring_at_index(token.start)  # the sub line right up to the token start
+        full_error_string: str = f"\nMTCC:{line + 1}:{len(sub_line_string) + 1}: "
+        if self.locations is not None:  # a preprocessed source reports the file and line the token came from
+            file_id, file_line = self.locations.get_location(line)
+            full_error_string = f"\nMTCC:{self.locations.get_file_name(file_id)}:{file_line + 1}:{len(sub_line_string) + 1}: "
+        elif self.source_files is not None:
+            full_error_string = f"\nMTCC:{self.source_files[token.file_id].path}:{line + 1}:{len(sub_line_string) + 1}: "
         full_error_string += error_string + '\n'
         full_error_string += f"    | {line_string}\n"
-        full_error_string += f"    | {len(sub_line_string) * ' '}^{(len(self.tokens[token_location].string) - 1) * '~'}"
-        raise raise_exception(full_error_string)
+        full_error_string += f"    | {len(sub_line_string) * ' '}^{(len(token.string) - 1) * '~'}"
+        self.fatal_error = raise_exception(full_error_string)
+        self.fatal_error_index = token_location
+        raise self.fatal_error
 
-    def expect_token_kind(self, kind: list[tk.TokenKind] | tk.TokenKind, error_string: str, raise_exception) -> None:
+    def recover_error(self, error: Exception, start_index: int, file_scope: bool = False) -> CError:
+        """
+        record the error of a declaration or a statement and skip the rest of it (panic mode),
+        the error is raised again if the parse does not recover from its errors (or fatal_token did not raise it)
+        :return: the node of the declaration or the statement
+        """
+        if not self.recover_errors or error is not self.fatal_error:
+            raise error
+
+        if self.fatal_error_index != self.diagnostic_index:  # an error at the token of the last one is caused by it
+            self.diagnostics.append(error)
+            self.diagnostic_index = self.fatal_error_index
+            if len(self.diagnostics) >= self.max_errors:
+                raise eh.TooManyErrors(f"\nMTCC: {len(self.diagnostics)} errors, the parse is stopped") from error
+
+        error_node: CError = CError(str(error), self.tokens[self.fatal_error_index])
+        self.skip_to_sync_token(start_index, file_scope)
+        return error_node
+
+    def skip_to_sync_token(self, start_index: int, file_scope: bool) -> None:
+        """
+        skip the tokens up to the end of a declaration or a statement with an error: past a ';' or a block,
+        a '}' of the block the statement is in is not skipped,
+        at file scope the next declaration specifier out of a block and parentheses starts the next external declaration
+        """
+        depth: int = 0  # the nesting of the blocks the skipped tokens are in
+        parentheses: int = 0
+        while self.current_token.kind != tk.TokenKind.END:
+            kind: tk.TokenKind = self.current_token.kind
+            if file_scope and depth <= 0 and parentheses <= 0 and self.index > start_index and \
+                    self.is_token_declaration_specifier():
+                return
+            if kind == tk.TokenKind.CLOSING_CURLY_BRACE and depth == 0 and not file_scope:
+                return
+
+            if kind == tk.TokenKind.OPENING_CURLY_BRACE:
+                depth += 1
+            elif kind == tk.TokenKind.CLOSING_CURLY_BRACE:
+                depth -= 1
+            elif kind == tk.TokenKind.OPENING_PARENTHESIS:
+                parentheses += 1
+            elif kind == tk.TokenKind.CLOSING_PARENTHESIS:
+                parentheses -= 1
+            self.peek_token()
+
+            if kind == tk.TokenKind.SEMICOLON and depth <= 0:
+                return
+            if kind == tk.TokenKind.CLOSING_CURLY_BRACE and depth == 0 and not file_scope:
+                return  # a block of the statement is skipped
+
+    def expect_token_kind(self, kind: frozenset[tk.TokenKind] | list[tk.TokenKind] | tk.TokenKind, error_string: str,
+                          raise_exception) -> None:
         if not self.is_token_kind(kind):
             self.fatal_token(self.index, error_string, raise_exception)
 
@@ -96,68 +533,67 @@ class CParser:
         if self.is_token_kind(tk.TokenKind.IDENTIFIER):
             if self.tokens[self.index + 1].kind == tk.TokenKind.COLON:
                 return True
-        return self.is_token_kind([tk.TokenKind.CASE, tk.TokenKind.DEFAULT])
+        return self.current_token.kind in self.labeled_statement_kinds
 
     def is_compound_statement(self) -> bool:
         """check if the current token is a compound statement starter"""
-        return self.is_token_kind([tk.TokenKind.OPENING_CURLY_BRACE])
+        return self.current_token.kind == tk.TokenKind.OPENING_CURLY_BRACE
 
     def is_expression_statement(self) -> bool:
         """check if the current token is a compound statement starter, do not check of expression starter"""
-        return self.is_token_kind([tk.TokenKind.SEMICOLON])
+        return self.current_token.kind == tk.TokenKind.SEMICOLON
 
     def is_selection_statement(self) -> bool:
         """check if the current token is a selection statement starter"""
-        return self.is_token_kind([tk.TokenKind.IF, tk.TokenKind.SWITCH])
+        return self.current_token.kind in self.selection_statement_kinds
 
     def is_iteration_statement(self) -> bool:
         """check if the current token is an iteration statement starter"""
-        return self.is_token_kind([tk.TokenKind.WHILE, tk.TokenKind.DO, tk.TokenKind.FOR])
+        return self.current_token.kind in self.iteration_statement_kinds
 
     def is_jump_statement(self) -> bool:
         """check if the current token is a jump statement starter"""
-        return self.is_token_kind([tk.TokenKind.GOTO, tk.TokenKind.CONTINUE, tk.TokenKind.BREAK, tk.TokenKind.RETURN])
+        return self.current_token.kind in self.jump_statement_kinds
 
     def is_abstract_declarator(self) -> bool:
         """check if the current token is an abstract declarator starter"""
-        return self.is_token_kind(
-            [tk.TokenKind.ASTERISK, tk.TokenKind.OPENING_PARENTHESIS, tk.TokenKind.OPENING_BRACKET])
+        return self.current_token.kind in self.abstract_declarator_kinds
 
     def is_direct_abstract_declarator(self) -> bool:
         """check if the current token is a direct abstract declarator starter"""
-        return self.is_token_kind([tk.TokenKind.OPENING_PARENTHESIS, tk.TokenKind.OPENING_BRACKET])
+        return self.current_token.kind in self.direct_abstract_declarator_kinds
 
     def is_direct_declarator(self) -> bool:
         """check if the current token is a direct declarator starter"""
-        return self.is_token_kind([tk.TokenKind.IDENTIFIER, tk.TokenKind.OPENING_PARENTHESIS, tk.TokenKind.OPENING_BRACKET])
+        return self.current_token.kind in self.direct_declarator_kinds
 
     def is_declarator(self) -> bool:
         """check if the current token is a declarator starter"""
-        return self.is_token_kind([tk.TokenKind.ASTERISK, tk.TokenKind.IDENTIFIER, tk.TokenKind.OPENING_PARENTHESIS, tk.TokenKind.OPENING_BRACKET])
+        return self.current_token.kind in self.declarator_kinds
 
     def is_typedef_name_name(self, name: str) -> bool:
-        for typedef in self.typedefs:
-            if typedef.declarator.identifier.token.string == name:
-                return True
-        return False
+        return tk.symbol_table.lookup(name) in self.typedefs
 
     def is_typedef_name(self) -> bool:
-        return self.is_token_kind(tk.TokenKind.IDENTIFIER) and self.is_typedef_name_name(self.current_token.string)
+        return self.current_token.kind == tk.TokenKind.IDENTIFIER and self.current_token.symbol in self.typedefs
 
     def is_type_name(self) -> bool:
         return self.is_typedef_name()
 
     def get_typedef_name(self, name: str) -> CTypedef:
-        for typedef in self.typedefs:
-            if typedef.declarator.identifier.token.string == name:
-                return typedef
-        self.fatal_token(self.current_token.index, f"Typedef identifier '{name}' not found", eh.TypedefNameNotFound)
+        typedef: CTypedef | None = self.typedefs.get(tk.symbol_table.lookup(name))
+        if typedef is not None:
+            return typedef
+        self.fatal_token(self.index, f"Typedef identifier '{name}' not found", eh.TypedefNameNotFound)
 
     def get_type_name(self) -> CTypedef:
+        typedef: CTypedef | None = self.typedefs.get(self.current_token.symbol)  # the token knows its symbol
+        if typedef is not None:
+            return typedef
         return self.get_typedef_name(self.current_token.string)
 
     def peek_type_qualifier(self) -> CQualifierKind:
-        self.expect_token_kind([tk.TokenKind.CONST, tk.TokenKind.VOLATILE], "Expected a type qualifier token",
+        self.expect_token_kind(self.type_qualifier_kinds, "Expected a type qualifier token",
                                eh.TypeQualifierNotFound)
 
         qualifier: CQualifierKind = CQualifierKind(0)
@@ -284,9 +720,8 @@ class CParser:
                     self.is_token_kind(tk.TokenKind.UNION) or \
                     self.is_token_kind(tk.TokenKind.ENUM) or \
                     self.is_token_kind(tk.TokenKind.IDENTIFIER):
-                if specifier_counter != 0 and (self.is_token_kind(tk.TokenKind.IDENTIFIER) and self.is_typedef_name()):
-                    self.fatal_token(self.current_token.index, "Invalid specifier in that current contex",
-                                     eh.SpecifierQualifierListInvalid)
+                if specifier_counter != 0 and self.is_token_kind(tk.TokenKind.IDENTIFIER):
+                    break  # a typedef name after a type specifier is the declarator (int T; declares T again)
 
                 if self.is_token_kind(tk.TokenKind.STRUCT) or self.is_token_kind(tk.TokenKind.UNION):
                     ctype = self.peek_struct_or_union_specifier()
@@ -310,7 +745,7 @@ class CParser:
             specifier_type: CPrimitiveDataTypes = specifier_cases.get(specifier_counter)
 
             if specifier_type is None:
-                self.fatal_token(self.current_token.index,
+                self.fatal_token(self.index,
                                  "Invalid specifier in that current contex",
                                  eh.SpecifierQualifierListInvalid
                                  )
@@ -318,7 +753,7 @@ class CParser:
                 ctype = specifier_type
 
         if isinstance(ctype, NoneNode):
-            self.fatal_token(self.current_token.index,
+            self.fatal_token(self.index,
                              "Invalid specifier in that current contex",
                              eh.SpecifierQualifierListInvalid
                              )
@@ -361,7 +796,7 @@ class CParser:
         specifier_counter: CSpecifierKind = CSpecifierKind(0)
         ctype: CSpecifierType = NoneNode()
 
-        while self.is_token_storage_class_specifier() or self.is_token_type_specifier() or self.is_token_type_qualifier():
+        while self.is_token_declaration_specifier():
             # handle storage class specifiers
             if self.is_token_storage_class_specifier():
                 type_attributes.storage_class_specifier |= self.peek_storage_class_specifier()
@@ -376,9 +811,8 @@ class CParser:
                     self.is_token_kind(tk.TokenKind.UNION) or \
                     self.is_token_kind(tk.TokenKind.ENUM) or \
                     self.is_token_kind(tk.TokenKind.IDENTIFIER):
-                if specifier_counter != 0 and (self.is_token_kind(tk.TokenKind.IDENTIFIER) and self.is_typedef_name()):
-                    self.fatal_token(self.current_token.index, "Invalid specifier in that current contex",
-                                     eh.SpecifierQualifierListInvalid)
+                if specifier_counter != 0 and self.is_token_kind(tk.TokenKind.IDENTIFIER):
+                    break  # a typedef name after a type specifier is the declarator (int T; declares T again)
 
                 if self.is_token_kind(tk.TokenKind.STRUCT) or self.is_token_kind(tk.TokenKind.UNION):
                     ctype = self.peek_struct_or_union_specifier()
@@ -401,7 +835,7 @@ class CParser:
             specifier_type: CPrimitiveDataTypes = specifier_cases.get(specifier_counter)
 
             if specifier_type is None:
-                self.fatal_token(self.current_token.index,
+                self.fatal_token(self.index,
                                  "Invalid specifier in that current contex",
                                  eh.SpecifierQualifierListInvalid
                                  )
@@ -409,7 +843,7 @@ class CParser:
                 ctype = specifier_type
 
         if isinstance(ctype, NoneNode):
-            self.fatal_token(self.current_token.index,
+            self.fatal_token(self.index,
                              "Invalid specifier in that current contex",
                              eh.SpecifierQualifierListInvalid
                              )
@@ -523,7 +957,7 @@ class CParser:
 
             return CArray(constant_expression, NoneNode())
         else:
-            self.fatal_token(self.current_token.index,
+            self.fatal_token(self.index,
                              "Expected opening parenthesis or opening bracket",
                              eh.TokenExpected
                              )
@@ -613,7 +1047,7 @@ class CParser:
 
             return declarator_or_abstract_declarator
         else:
-            self.fatal_token(self.current_token.index,
+            self.fatal_token(self.index,
                              "Expected declarator or abstract declarator",
                              eh.TokenExpected
                              )
@@ -629,7 +1063,7 @@ class CParser:
         """
         parameter_list: list[CParameter] = []
         while True:
-            if self.is_token_storage_class_specifier() or self.is_token_type_specifier() or self.is_token_type_qualifier():
+            if self.is_token_declaration_specifier():
                 parameter_declaration: CParameter = self.peek_parameter_declaration()
                 parameter_list.append(parameter_declaration)
                 if self.is_token_kind(tk.TokenKind.COMMA):
@@ -724,7 +1158,7 @@ class CParser:
                 self.peek_token()  # peek ] token
                 return CArray(constant_expression, NoneNode())
         else:
-            self.fatal_token(self.current_token.index, "Expected a ( or [ token", eh.TokenExpected)
+            self.fatal_token(self.index, "Expected a ( or [ token", eh.TokenExpected)
 
     def peek_primary_expression(self) -> Node:
         """
@@ -737,36 +1171,45 @@ class CParser:
             ;
         :return: a primary expression node
         """
-        if self.is_token_kind(tk.TokenKind.INTEGER_LITERAL):
+        kind: tk.TokenKind = self.current_token.kind
+
+        if kind == tk.TokenKind.IDENTIFIER:
+            identifier: CIdentifier = CIdentifier(self.current_token)
+            self.peek_token()  # peek identifier literal number
+            return identifier
+        elif kind == tk.TokenKind.INTEGER_LITERAL:
             number: Number = Number(int(self.current_token.string))
             self.peek_token()  # peek integer literal number
             return number
-        elif self.is_token_kind(tk.TokenKind.FLOAT_LITERAL):
+        elif kind == tk.TokenKind.FLOAT_LITERAL:
             number: Number = Number(float(self.current_token.string))
             self.peek_token()  # peek float literal number
             return number
-        elif self.is_token_kind(tk.TokenKind.STRING_LITERAL):
+        elif kind == tk.TokenKind.STRING_LITERAL:
             string_: CString = CString(self.current_token.string)
             self.peek_token()  # peek string literal number
             return string_
-        elif self.is_token_kind(tk.TokenKind.IDENTIFIER):
-            identifier: CIdentifier = CIdentifier(self.current_token)
-            self.peek_token()  # peek identifier literal number
-            return identifier
-        elif self.is_token_kind(tk.TokenKind.OPENING_PARENTHESIS):
+        elif kind == tk.TokenKind.OPENING_PARENTHESIS:
             self.peek_token()  # peek opening parenthesis token
+            return self.peek_parenthesized_expression()
+        else:
+            self.fatal_token(self.index, "Expected a primary expression token", eh.PrimaryExpressionNotFound)
 
-            if not self.is_token_kind(tk.TokenKind.CLOSING_PARENTHESIS):
-                expression: Node = self.peek_expression()
-                self.expect_token_kind(tk.TokenKind.CLOSING_PARENTHESIS, "Expecting a closing parenthesis token",
-                                       eh.TokenExpected)
-                self.peek_token()  # peek closing parenthesis token
-                return expression
-            else:
-                self.peek_token()  # peek closing parenthesis token
-                return NoneNode()
+    def peek_parenthesized_expression(self) -> Node:
+        """
+        parse a "(" expression ")" after its ( token, a cast expression and a sizeof find out that a ( is not
+        of a type name after they peeked it, and parse the expression from here (and not from the ( again)
+        :return: the expression node
+        """
+        if not self.is_token_kind(tk.TokenKind.CLOSING_PARENTHESIS):
+            expression: Node = self.peek_expression()
+            self.expect_token_kind(tk.TokenKind.CLOSING_PARENTHESIS, "Expecting a closing parenthesis token",
+                                   eh.TokenExpected)
+            self.peek_token()  # peek closing parenthesis token
+            return expression
         else:
-            self.fatal_token(self.current_token.index, "Expected a primary expression token", eh.PrimaryExpressionNotFound)
+            self.peek_token()  # peek closing parenthesis token
+            return NoneNode()
 
     def peek_identifier(self) -> CIdentifier:
         self.expect_token_kind(tk.TokenKind.IDENTIFIER, "Expected an identifier token", eh.TokenExpected)
@@ -797,6 +1240,17 @@ class CParser:
         """
         primary_expression: Node = self.peek_primary_expression()
 
+        return self.peek_postfix_operator(primary_expression)
+
+    def peek_postfix_operator(self, primary_expression: Node) -> Node:
+        """
+        parse the postfix operator of a postfix expression, if it has one
+        :param primary_expression: the already parsed primary expression
+        :return: a postfix expression node
+        """
+        if self.current_token.kind not in self.postfix_operator_kinds:  # most primary expressions are not postfixed
+            return primary_expression
+
         if self.is_token_kind(tk.TokenKind.OPENING_BRACKET):
             self.peek_token()  # peek [ token
             expression: Node = self.peek_expression()
@@ -855,51 +1309,23 @@ class CParser:
             ;
         :return: a unary expression node
         """
-        if self.is_token_kind(tk.TokenKind.INC_OP):
-            self.peek_token()  # peek ++ token
-            unary_expression: Node = self.peek_unary_expression()
-            return CUnaryOp(CUnaryOpKind.PreIncrease, unary_expression)
-        elif self.is_token_kind(tk.TokenKind.DEC_OP):
-            self.peek_token()  # peek -- token
-            unary_expression: Node = self.peek_unary_expression()
-            return CUnaryOp(CUnaryOpKind.PreDecrease, unary_expression)
-        elif self.is_token_kind(tk.TokenKind.AMPERSAND):
-            self.peek_token()  # peek & token
-
-            cast_expression: Node = self.peek_cast_expression()
+        kind: tk.TokenKind = self.current_token.kind
 
-            return CUnaryOp(CUnaryOpKind.Reference, cast_expression)
-        elif self.is_token_kind(tk.TokenKind.ASTERISK):
-            self.peek_token()  # peek * token
+        unary_operator: CUnaryOpKind | None = self.cast_unary_operators.get(kind)
+        if unary_operator is not None:
+            self.peek_token()  # peek the operator token
 
             cast_expression: Node = self.peek_cast_expression()
 
-            return CUnaryOp(CUnaryOpKind.Dereference, cast_expression)
-        elif self.is_token_kind(tk.TokenKind.PLUS):
-            self.peek_token()  # peek * token
-
-            cast_expression: Node = self.peek_cast_expression()
-
-            return CUnaryOp(CUnaryOpKind.Plus, cast_expression)
-        elif self.is_token_kind(tk.TokenKind.HYPHEN):
-            self.peek_token()  # peek - token
-
-            cast_expression: Node = self.peek_cast_expression()
+            return CUnaryOp(unary_operator, cast_expression)
 
-            return CUnaryOp(CUnaryOpKind.Minus, cast_expression)
-        elif self.is_token_kind(tk.TokenKind.TILDE):
-            self.peek_token()  # peek - token
-
-            cast_expression: Node = self.peek_cast_expression()
-
-            return CUnaryOp(CUnaryOpKind.BitwiseNOT, cast_expression)
-        elif self.is_token_kind(tk.TokenKind.EXCLAMATION):
-            self.peek_token()  # peek - token
-
-            cast_expression: Node = self.peek_cast_expression()
+        unary_operator = self.increment_unary_operators.get(kind)
+        if unary_operator is not None:
+            self.peek_token()  # peek ++ or -- token
+            unary_expression: Node = self.peek_unary_expression()
+            return CUnaryOp(unary_operator, unary_expression)
 
-            return CUnaryOp(CUnaryOpKind.LogicalNOT, cast_expression)
-        elif self.is_token_kind(tk.TokenKind.SIZEOF):
+        if kind == tk.TokenKind.SIZEOF:
             self.peek_token()  # peek sizeof token
             if self.is_token_kind(tk.TokenKind.OPENING_PARENTHESIS):
                 self.peek_token()  # peek ( token
@@ -909,8 +1335,10 @@ class CParser:
                     self.peek_token()  # peek ) token
 
                     return CUnaryOp(CUnaryOpKind.Sizeof, type_name)
-                else:
-                    self.drop_token()  # drop to the ( token
+
+                # not a type name but a "(" expression ")", its ( token is already peeked
+                postfix_expression: Node = self.peek_postfix_operator(self.peek_parenthesized_expression())
+                return CUnaryOp(CUnaryOpKind.Sizeof, postfix_expression)
 
             unary_expression: Node = self.peek_unary_expression()
 
@@ -921,16 +1349,13 @@ class CParser:
         return postfix_expression
 
     def peek_cast_expression(self) -> Node:
-        if self.is_token_kind(tk.TokenKind.OPENING_PARENTHESIS):
+        if self.current_token.kind == tk.TokenKind.OPENING_PARENTHESIS:
             self.peek_token()  # peek ( token
 
             if self.is_token_type_qualifier() or self.is_token_type_specifier():
                 type_name: CTypeName = self.peek_type_name()
-            else:  # not a cast but a "(" expression ")"
-                # we need to drop a token
-                self.drop_token()  # drop to the ( token
-                unary_expression: Node = self.peek_unary_expression()
-                return unary_expression
+            else:  # not a cast but a "(" expression ")", its ( token is already peeked
+                return self.peek_postfix_operator(self.peek_parenthesized_expression())
 
             self.expect_token_kind(tk.TokenKind.CLOSING_PARENTHESIS, "Expecting a closing parenthesis",
                                    eh.TokenExpected)
@@ -1138,7 +1563,210 @@ class CParser:
 
         return logical_and_expression
 
+    def peek_operator_expression(self, min_precedence: int) -> Node:
+        """
+        parse an expression of the operators of at least a precedence by precedence climbing
+        (an assignment expression from ASSIGNMENT_PRECEDENCE and a conditional expression from CONDITIONAL_PRECEDENCE),
+        the operators and the parentheses that wait for their operands are frames on an explicit stack
+        (see PREFIX_FRAME), so deeply nested expressions are not bound by the recursion limit
+        :return: an expression node
+        """
+        frames: list[tuple] = []
+        precedence: int = min_precedence  # the least precedence of an operator of the operand being parsed
+        state: int = OPERAND_STATE
+        cast_allowed: bool = True  # the operand of ++, -- and sizeof is a unary expression, a ( there is not a cast
+        expression: Node | list[Node] = NoneNode()
+
+        while True:
+            if state == OPERAND_STATE:
+                kind: tk.TokenKind = self.current_token.kind
+                parenthesized: bool = False  # a "(" expression ")" whose ( token is already peeked
+
+                if kind in self.primary_expression_kinds:
+                    expression = self.peek_primary_expression()
+                    cast_allowed = True
+                    state = POSTFIX_STATE
+
+                elif kind in self.cast_unary_operators:
+                    self.peek_token()  # peek the operator token
+                    frames.append((PREFIX_FRAME, self.cast_unary_operators[kind]))
+                    cast_allowed = True
+                    continue
+
+                elif kind in self.increment_unary_operators:
+                    self.peek_token()  # peek ++ or -- token
+                    frames.append((PREFIX_FRAME, self.increment_unary_operators[kind]))
+                    cast_allowed = False
+                    continue
+
+                elif kind == tk.TokenKind.SIZEOF:
+                    self.peek_token()  # peek sizeof token
+                    if not self.is_token_kind(tk.TokenKind.OPENING_PARENTHESIS):
+                        frames.append((PREFIX_FRAME, CUnaryOpKind.Sizeof))
+                        cast_allowed = False
+                        continue
+
+                    self.peek_token()  # peek ( token
+                    if self.is_token_type_qualifier() or self.is_token_type_specifier():
+                        type_name: CTypeName = self.peek_type_name()
+                        self.expect_token_kind(tk.TokenKind.CLOSING_PARENTHESIS, "Expected a ) token", eh.TokenExpected)
+                        self.peek_token()  # peek ) token
+
+                        expression = CUnaryOp(CUnaryOpKind.Sizeof, type_name)
+                        state = OPERATOR_STATE
+
+                    else:
+                        frames.append((PREFIX_FRAME, CUnaryOpKind.Sizeof))
+                        parenthesized = True
+
+                elif kind == tk.TokenKind.OPENING_PARENTHESIS:
+                    self.peek_token()  # peek ( token
+                    if cast_allowed and (self.is_token_type_qualifier() or self.is_token_type_specifier()):
+                        type_name: CTypeName = self.peek_type_name()
+                        self.expect_token_kind(tk.TokenKind.CLOSING_PARENTHESIS, "Expecting a closing parenthesis",
+                                               eh.TokenExpected)
+                        self.peek_token()  # peek ) token
+
+                        frames.append((CAST_FRAME, type_name))
+                        cast_allowed = True
+                        continue
+
+                    parenthesized = True
+
+                else:
+                    self.fatal_token(self.index, "Expected a primary expression token",
+                                     eh.PrimaryExpressionNotFound)
+
+                if parenthesized:
+                    if self.is_token_kind(tk.TokenKind.CLOSING_PARENTHESIS):
+                        self.peek_token()  # peek closing parenthesis token
+                        expression = NoneNode()
+                        state = POSTFIX_STATE
+                    else:
+                        frames.append((PARENTHESES_FRAME, precedence))
+                        frames.append((EXPRESSION_FRAME, []))
+                        precedence = self.ASSIGNMENT_PRECEDENCE
+                        cast_allowed = True
+                        continue
+
+            if state == POSTFIX_STATE:
+                kind: tk.TokenKind = self.current_token.kind
+                if kind == tk.TokenKind.OPENING_BRACKET:
+                    self.peek_token()  # peek [ token
+                    frames.append((SUBSCRIPT_FRAME, expression, precedence))
+                    frames.append((EXPRESSION_FRAME, []))
+                    precedence = self.ASSIGNMENT_PRECEDENCE
+                    state = OPERAND_STATE
+                    continue
+
+                elif kind == tk.TokenKind.OPENING_PARENTHESIS:
+                    self.peek_token()  # peek ( token
+                    if self.is_token_kind(tk.TokenKind.CLOSING_PARENTHESIS):
+                        self.peek_token()  # peek ) token
+                        expression = CFunctionCall(expression, list[Node]())
+                    else:
+                        frames.append((ARGUMENTS_FRAME, expression, [], precedence))
+                        precedence = self.ASSIGNMENT_PRECEDENCE
+                        state = OPERAND_STATE
+                        continue
+
+                elif kind in self.postfix_operator_kinds:  # most primary expressions are not postfixed
+                    expression = self.peek_postfix_operator(expression)  # a member access, ++ or --
+                state = OPERATOR_STATE
+
+            # the operand is parsed, its prefix operators and casts bind the tightest
+            while len(frames) != 0 and (frames[-1][0] == PREFIX_FRAME or frames[-1][0] == CAST_FRAME):
+                frame: tuple = frames.pop()
+                expression = CUnaryOp(frame[1], expression) if frame[0] == PREFIX_FRAME else \
+                    CCast(frame[1], expression)
+
+            state = OPERAND_STATE  # unless a frame that ends here completes another operand (or its primary)
+            cast_allowed = True  # the operand of ++, -- or sizeof is complete, an operand after an operator may be a cast
+            while True:
+                kind: tk.TokenKind = self.current_token.kind
+
+                binary_operator: tuple[int, CBinaryOpKind] | None = self.binary_operators.get(kind)
+                if binary_operator is not None and binary_operator[0] >= precedence:
+                    self.peek_token()  # peek the operator token
+                    frames.append((BINARY_FRAME, expression, binary_operator[1], precedence))
+                    precedence = binary_operator[0] + 1
+                    break
+
+                if kind == tk.TokenKind.QUESTION_MARK and precedence <= self.CONDITIONAL_PRECEDENCE:
+                    self.peek_token()  # peek the ? token
+                    frames.append((CONDITIONAL_TRUE_FRAME, expression, precedence))
+                    frames.append((EXPRESSION_FRAME, []))
+                    precedence = self.ASSIGNMENT_PRECEDENCE
+                    break
+
+                if kind in self.assignment_operators and precedence <= self.ASSIGNMENT_PRECEDENCE:
+                    self.peek_token()  # peek assignment operator token
+                    frames.append((ASSIGNMENT_FRAME, expression, self.assignment_operators[kind], precedence))
+                    break
+
+                # the expression of this precedence ends here, it is the operand the innermost frame waits for
+                if len(frames) == 0:
+                    return expression
+                frame: tuple = frames.pop()
+
+                if frame[0] == BINARY_FRAME or frame[0] == ASSIGNMENT_FRAME:
+                    expression = CBinaryOp(frame[2], frame[1], expression)
+                    precedence = frame[3]
+
+                elif frame[0] == CONDITIONAL_FALSE_FRAME:
+                    expression = CTernaryOp(frame[1], frame[2], expression)
+                    precedence = frame[3]
+
+                elif frame[0] == EXPRESSION_FRAME:
+                    if kind == tk.TokenKind.COMMA:
+                        self.peek_token()  # peek the , token
+                        frame[1].append(expression)
+                        frames.append(frame)
+                        break
+                    if len(frame[1]) != 0:
+                        frame[1].append(expression)
+                        expression = frame[1]
+
+                elif frame[0] == CONDITIONAL_TRUE_FRAME:
+                    self.expect_token_kind(tk.TokenKind.COLON, "Expected ':' in conditional expression", eh.TokenExpected)
+                    self.peek_token()  # peek the : token
+                    frames.append((CONDITIONAL_FALSE_FRAME, frame[1], expression, frame[2]))
+                    precedence = self.CONDITIONAL_PRECEDENCE
+                    break
+
+                elif frame[0] == PARENTHESES_FRAME:
+                    self.expect_token_kind(tk.TokenKind.CLOSING_PARENTHESIS, "Expecting a closing parenthesis token",
+                                           eh.TokenExpected)
+                    self.peek_token()  # peek closing parenthesis token
+                    precedence = frame[1]
+                    state = POSTFIX_STATE
+                    break
+
+                elif frame[0] == SUBSCRIPT_FRAME:
+                    self.expect_token_kind(tk.TokenKind.CLOSING_BRACKET, "Expected a ] token", eh.TokenExpected)
+                    self.peek_token()  # peek ] token
+                    expression = CArrayAccess(frame[1], expression)
+                    precedence = frame[2]
+                    state = OPERATOR_STATE
+                    break
+
+                elif frame[0] == ARGUMENTS_FRAME:
+                    frame[2].append(expression)
+                    if self.is_token_kind(tk.TokenKind.COMMA):
+                        self.peek_token()  # peek , token
+                    if not self.is_token_kind(tk.TokenKind.CLOSING_PARENTHESIS):
+                        frames.append(frame)
+                        break
+                    self.peek_token()  # peek ) token
+                    expression = CFunctionCall(frame[1], frame[2])
+                    precedence = frame[3]
+                    state = OPERATOR_STATE
+                    break
+
     def peek_conditional_expression(self) -> Node:
+        if self.precedence_climbing:
+            return self.peek_operator_expression(self.CONDITIONAL_PRECEDENCE)
+
         logical_or_expression: Node = self.peek_logical_or_expression()
 
         if self.is_token_kind(tk.TokenKind.QUESTION_MARK):
@@ -1157,6 +1785,9 @@ class CParser:
         return logical_or_expression
 
     def peek_assignment_expression(self) -> Node:
+        if self.precedence_climbing:
+            return self.peek_operator_expression(self.ASSIGNMENT_PRECEDENCE)
+
         conditional_expression: Node = self.peek_conditional_expression()
 
         if self.is_assignment_operator():
@@ -1169,54 +1800,14 @@ class CParser:
             return conditional_expression
 
     def is_assignment_operator(self) -> bool:
-        return self.is_token_kind(tk.TokenKind.EQUALS) or \
-               self.is_token_kind(tk.TokenKind.MUL_ASSIGN) or \
-               self.is_token_kind(tk.TokenKind.DIV_ASSIGN) or \
-               self.is_token_kind(tk.TokenKind.MOD_ASSIGN) or \
-               self.is_token_kind(tk.TokenKind.ADD_ASSIGN) or \
-               self.is_token_kind(tk.TokenKind.SUB_ASSIGN) or \
-               self.is_token_kind(tk.TokenKind.LEFT_ASSIGN) or \
-               self.is_token_kind(tk.TokenKind.RIGHT_ASSIGN) or \
-               self.is_token_kind(tk.TokenKind.AND_ASSIGN) or \
-               self.is_token_kind(tk.TokenKind.XOR_ASSIGN) or \
-               self.is_token_kind(tk.TokenKind.OR_ASSIGN)
+        return self.current_token.kind in self.assignment_operators
 
     def peek_binary_assignment_op(self) -> CBinaryOpKind:
-        if self.is_token_kind(tk.TokenKind.EQUALS):
-            self.peek_token()  # peek the = token
-            return CBinaryOpKind.Assignment
-        elif self.is_token_kind(tk.TokenKind.MUL_ASSIGN):
-            self.peek_token()  # peek the *= token
-            return CBinaryOpKind.MultiplicationAssignment
-        elif self.is_token_kind(tk.TokenKind.DIV_ASSIGN):
-            self.peek_token()  # peek the /= token
-            return CBinaryOpKind.DivisionAssignment
-        elif self.is_token_kind(tk.TokenKind.MOD_ASSIGN):
-            self.peek_token()  # peek the %= token
-            return CBinaryOpKind.ModulusAssignment
-        elif self.is_token_kind(tk.TokenKind.ADD_ASSIGN):
-            self.peek_token()  # peek the += token
-            return CBinaryOpKind.AdditionAssignment
-        elif self.is_token_kind(tk.TokenKind.SUB_ASSIGN):
-            self.peek_token()  # peek the -= token
-            return CBinaryOpKind.SubtractionAssignment
-        elif self.is_token_kind(tk.TokenKind.LEFT_ASSIGN):
-            self.peek_token()  # peek the <<= token
-            return CBinaryOpKind.LeftShiftAssignment
-        elif self.is_token_kind(tk.TokenKind.RIGHT_ASSIGN):
-            self.peek_token()  # peek the >>= token
-            return CBinaryOpKind.RightShiftAssignment
-        elif self.is_token_kind(tk.TokenKind.AND_ASSIGN):
-            self.peek_token()  # peek the &= token
-            return CBinaryOpKind.BitwiseAndAssignment
-        elif self.is_token_kind(tk.TokenKind.XOR_ASSIGN):
-            self.peek_token()  # peek the ^= token
-            return CBinaryOpKind.BitwiseXorAssignment
-        elif self.is_token_kind(tk.TokenKind.OR_ASSIGN):
-            self.peek_token()  # peek the |= token
-            return CBinaryOpKind.BitwiseOrAssignment
-        else:
-            self.fatal_token(self.current_token.index, "Expected assignment operator token", eh.TokenExpected)
+        binary_assignment_op: CBinaryOpKind | None = self.assignment_operators.get(self.current_token.kind)
+        if binary_assignment_op is None:
+            self.fatal_token(self.index, "Expected assignment operator token", eh.TokenExpected)
+        self.peek_token()  # peek the assignment operator token
+        return binary_assignment_op
 
     def peek_expression(self) -> Node | list[Node]:
         assignment_expressions: list[Node] = []
@@ -1287,6 +1878,7 @@ class CParser:
 
         identifier: CIdentifier = CIdentifier(None)
 
+        identifier_index: int = self.index
         if self.is_token_kind(tk.TokenKind.IDENTIFIER):
             identifier.token = self.current_token
 
@@ -1306,9 +1898,12 @@ class CParser:
         if identifier.token.string == "" and members == []:
             raise SyntaxError("An enum identifier and/or an enumerator list is needed")
 
-        cenum.identifier = identifier
+        cenum.identifier = CIdentifier(identifier.token)
         cenum.members = members
 
+        if cenum.identifier.token is not None and members:
+            self.tags.append(cenum, identifier_index)
+
         return cenum
 
     def peek_initializer_list(self) -> list[Node]:
@@ -1417,6 +2012,7 @@ class CParser:
 
         if self.is_token_kind(tk.TokenKind.IDENTIFIER):
             struct_or_union.identifier = CIdentifier(self.current_token)
+            identifier_index: int = self.index
             self.peek_token()  # peek identifier token
 
             if self.is_token_kind(tk.TokenKind.OPENING_CURLY_BRACE):
@@ -1426,6 +2022,8 @@ class CParser:
 
                 self.expect_token_kind(tk.TokenKind.CLOSING_CURLY_BRACE, "A closing curly brace is needed", eh.TokenExpected)
                 self.peek_token()  # peek the } token
+
+                self.tags.append(struct_or_union, identifier_index)
         else:
             if self.is_token_kind(tk.TokenKind.OPENING_CURLY_BRACE):
                 self.peek_token()  # peek the { token
@@ -1447,15 +2045,16 @@ class CParser:
         """
         struct_declarations: list[list[CDeclarator]] = []
 
-        struct_declaration: list[CDeclarator] = self.peek_struct_declaration()
-
-        struct_declarations.append(struct_declaration)
-
-        while self.is_token_type_specifier() or self.is_token_type_qualifier():
-            struct_declaration: list[CDeclarator] = self.peek_struct_declaration()
+        while True:
+            struct_declaration_index: int = self.index
+            try:
+                struct_declaration: list[CDeclarator] = self.peek_struct_declaration()
+            except Exception as error:
+                struct_declaration = [self.recover_error(error, struct_declaration_index)]
             struct_declarations.append(struct_declaration)
 
-        return struct_declarations
+            if not (self.is_token_type_specifier() or self.is_token_type_qualifier()):
+                return struct_declarations
 
     def peek_struct_declaration(self) -> list[CDeclarator]:
         """ parse a struct declaration
@@ -1513,6 +2112,9 @@ class CParser:
         return declarator
 
     def peek_labeled_statement(self) -> CLabel | CCase | CDefault:
+        return self.run_statement_rules(self.generate_labeled_statement())
+
+    def generate_labeled_statement(self) -> Generator[None, Node, CLabel | CCase | CDefault]:
         """ parse a labeled statement
         labeled_statement
             : IDENTIFIER ':' statement
@@ -1529,7 +2131,7 @@ class CParser:
             self.expect_token_kind(tk.TokenKind.COLON, "A colon is needed", eh.TokenExpected)
             self.peek_token()  # peek : token
 
-            label.value = self.peek_statement()
+            label.value = (yield)
 
             return label
         elif self.is_token_kind(tk.TokenKind.CASE):
@@ -1542,7 +2144,7 @@ class CParser:
 
             case: CCase = CCase(constant_expression, NoneNode())
 
-            case.value = self.peek_statement()
+            case.value = (yield)
 
             return case
         elif self.is_token_kind(tk.TokenKind.DEFAULT):
@@ -1553,13 +2155,16 @@ class CParser:
 
             default: CDefault = CDefault(NoneNode())
 
-            default.value = self.peek_statement()
+            default.value = (yield)
 
             return default
         else:
-            self.fatal_token(self.current_token.index, "A labeled statement is needed", eh.TokenExpected)
+            self.fatal_token(self.index, "A labeled statement is needed", eh.TokenExpected)
 
     def peek_compound_statement(self) -> CCompound:
+        return self.run_statement_rules(self.generate_compound_statement())
+
+    def generate_compound_statement(self) -> Generator[None, Node, CCompound]:
         """
         compound_statement
             : '{' '}'
@@ -1578,20 +2183,47 @@ class CParser:
             self.peek_token()  # peek } token
             return compound
 
-        if self.is_token_type_specifier() or self.is_token_type_qualifier() or self.is_token_storage_class_specifier():
-            while self.is_token_type_specifier() or self.is_token_type_qualifier() or self.is_token_storage_class_specifier():
-                declaration: list[CDeclarator] = self.peek_declaration()
+        self.typedefs.push_scope()
+        try:  # the scope is popped when an error ends the block too
+            # a declaration or a statement with an error is a CError of a parse that recovers from its errors
+            while self.is_token_declaration_specifier():
+                declaration_index: int = self.index
+                try:
+                    declaration: list[CDeclarator] = self.peek_declaration()
+                except Exception as error:
+                    compound.declarations.append(self.recover_error(error, declaration_index))
+                    continue
+                self.declare_block_declarators(declaration)
                 compound.declarations.extend(declaration)
 
-        while not self.is_token_kind(tk.TokenKind.CLOSING_CURLY_BRACE):
-            statement: Node = self.peek_statement()
-            compound.statements.append(statement)
-
-        self.expect_token_kind(tk.TokenKind.CLOSING_CURLY_BRACE, "A closing curly brace is needed", eh.TokenExpected)
-        self.peek_token()  # peek } token
+            while not self.is_token_kind(tk.TokenKind.CLOSING_CURLY_BRACE):
+                statement_index: int = self.index
+                try:
+                    statement: Node = (yield)
+                except Exception as error:  # the error of the statement (see run_statement_rules)
+                    compound.statements.append(self.recover_error(error, statement_index))
+                    if self.is_token_kind(tk.TokenKind.END):
+                        break  # the closing curly brace is missing
+                    continue
+                compound.statements.append(statement)
+
+            self.expect_token_kind(tk.TokenKind.CLOSING_CURLY_BRACE, "A closing curly brace is needed", eh.TokenExpected)
+            self.peek_token()  # peek } token
+        finally:
+            self.typedefs.pop_scope()
 
         return compound
 
+    def declare_block_declarators(self, declarators: list[CDeclarator]) -> None:
+        """a typedef of a block is in scope until the block ends, another identifier hides a typedef of its name there"""
+        for declarator in declarators:
+            if not isinstance(declarator.identifier, CIdentifier) or declarator.identifier.token is None:
+                continue
+            if declarator.attributes.storage_class_specifier == CStorageClassSpecifier.Typedef:
+                self.typedefs.append(CTypedef(declarator))
+            else:
+                self.typedefs.hide(declarator.identifier.symbol)
+
     def peek_expression_statement(self) -> Node:
         """ parse an expression statement
         expression_statement
@@ -1612,6 +2244,9 @@ class CParser:
             return expression
 
     def peek_selection_statement(self) -> CIf | CSwitch:
+        return self.run_statement_rules(self.generate_selection_statement())
+
+    def generate_selection_statement(self) -> Generator[None, Node, CIf | CSwitch]:
         """ parse a selection statement
         selection_statement
             : IF '(' expression ')' statement
@@ -1620,7 +2255,7 @@ class CParser:
             ;
         :return: a node of type CIf or CSwitch
         """
-        self.expect_token_kind([tk.TokenKind.IF, tk.TokenKind.SWITCH], "An if or switch statement is needed", eh.TokenExpected)
+        self.expect_token_kind(self.selection_statement_kinds, "An if or switch statement is needed", eh.TokenExpected)
 
         if self.is_token_kind(tk.TokenKind.IF):
             self.peek_token()  # peek if token
@@ -1635,12 +2270,12 @@ class CParser:
 
             if_statement: CIf = CIf(expression, NoneNode(), NoneNode())
 
-            if_statement.then = self.peek_statement()
+            if_statement.then = (yield)
 
             if self.is_token_kind(tk.TokenKind.ELSE):
                 self.peek_token()  # peek else token
 
-                if_statement.else_ = self.peek_statement()
+                if_statement.else_ = (yield)
 
             return if_statement
         elif self.is_token_kind(tk.TokenKind.SWITCH):
@@ -1656,7 +2291,7 @@ class CParser:
 
             switch: CSwitch = CSwitch(expression, NoneNode())
 
-            switch.statement = self.peek_statement()
+            switch.statement = (yield)
 
             return switch
 
@@ -1672,20 +2307,72 @@ class CParser:
             ;
         :return a node of a statement
         """
-        if self.is_labeled_statement():
-            return self.peek_labeled_statement()
-        elif self.is_compound_statement():
-            return self.peek_compound_statement()
-        elif self.is_selection_statement():
-            return self.peek_selection_statement()
-        elif self.is_iteration_statement():
-            return self.peek_iteration_statement()
-        elif self.is_jump_statement():
+        statement_rule: StatementRule | None = self.get_statement_rule()
+        if statement_rule is None:
+            return self.peek_simple_statement()
+        return self.run_statement_rules(statement_rule)
+
+    def get_statement_rule(self) -> StatementRule | None:
+        """the rule of the statement at the current token, None for a statement that does not nest statements"""
+        if self.is_token_kind(tk.TokenKind.IDENTIFIER) and self.tokens[self.index + 1].kind == tk.TokenKind.COLON:
+            return self.generate_labeled_statement()  # the one statement that is not known by its first token
+
+        statement_rule: Callable[[], StatementRule] | None = self.statement_rules.get(self.current_token.kind)
+        return statement_rule() if statement_rule is not None else None
+
+    def peek_simple_statement(self) -> Node:
+        """parse a jump statement or an expression statement"""
+        if self.current_token.kind in self.jump_statement_kinds:
             return self.peek_jump_statement()
-        else:
-            return self.peek_expression_statement()
+        return self.peek_expression_statement()
+
+    def run_statement_rules(self, statement_rule: StatementRule) -> Node:
+        """
+        parse a statement by its rule, the statements nested in it are parsed by their rules on an explicit stack
+        (a rule waits on the stack for the statement it yielded for), so deeply nested blocks and long else if chains
+        are not bound by the recursion limit,
+        the error of a nested statement is thrown into the rule that waits for it (a block recovers from it)
+        :return: the node of the statement
+        """
+        statement_rules: list[StatementRule] = [statement_rule]
+        statement: Node | None = None  # the statement the innermost rule waits for (None to start it)
+        error: Exception | None = None  # or the error of it
+
+        while True:
+            try:
+                if error is None:
+                    statement_rules[-1].send(statement)
+                else:
+                    statement_rules[-1].throw(error)
+                    error = None
+            except StopIteration as stop:
+                statement_rules.pop()
+                error = None
+                if len(statement_rules) == 0:
+                    return stop.value
+                statement = stop.value
+                continue
+            except Exception as rule_error:
+                statement_rules.pop()
+                if len(statement_rules) == 0:
+                    raise
+                error = rule_error
+                continue
+
+            nested_statement_rule: StatementRule | None = self.get_statement_rule()
+            if nested_statement_rule is None:
+                try:
+                    statement = self.peek_simple_statement()
+                except Exception as statement_error:
+                    error = statement_error
+            else:
+                statement_rules.append(nested_statement_rule)
+                statement = None
 
     def peek_iteration_statement(self) -> CWhile | CFor:
+        return self.run_statement_rules(self.generate_iteration_statement())
+
+    def generate_iteration_statement(self) -> Generator[None, Node, CWhile | CFor]:
         """ parse an iteration statement
         iteration_statement
             : WHILE '(' expression ')' statement
@@ -1695,7 +2382,7 @@ class CParser:
             ;
         :return: a node of type CWhile or CFor
         """
-        self.expect_token_kind([tk.TokenKind.WHILE, tk.TokenKind.FOR, tk.TokenKind.DO], "A while or for or do statement is needed", eh.TokenExpected)
+        self.expect_token_kind(self.iteration_statement_kinds, "A while or for or do statement is needed", eh.TokenExpected)
 
         if self.is_token_kind(tk.TokenKind.WHILE):
             self.peek_token()  # peek while token
@@ -1709,7 +2396,7 @@ class CParser:
             self.peek_token()  # peek ) token
 
             while_statement: CWhile = CWhile(expression, NoneNode())
-            while_statement.statement = self.peek_statement()
+            while_statement.statement = (yield)
 
             return while_statement
         elif self.is_token_kind(tk.TokenKind.DO):
@@ -1717,7 +2404,7 @@ class CParser:
 
             while_statement: CWhile = CWhile(NoneNode(), NoneNode(), do=True)
 
-            while_statement.statement = self.peek_statement()
+            while_statement.statement = (yield)
 
             self.expect_token_kind(tk.TokenKind.WHILE, "A while statement is needed", eh.TokenExpected)
             self.peek_token()  # peek while token
@@ -1750,7 +2437,7 @@ class CParser:
             if self.is_token_kind(tk.TokenKind.CLOSING_PARENTHESIS):
                 self.peek_token()  # peek ) token
 
-                cfor.statement = self.peek_statement()
+                cfor.statement = (yield)
             else:
                 expression_increment = self.peek_expression()
 
@@ -1759,7 +2446,7 @@ class CParser:
                 self.expect_token_kind(tk.TokenKind.CLOSING_PARENTHESIS, "A closing parenthesis is needed", eh.TokenExpected)
                 self.peek_token()  # peek ) token
 
-                cfor.statement = self.peek_statement()
+                cfor.statement = (yield)
 
             return cfor
 
@@ -1814,32 +2501,129 @@ class CParser:
 
             return CReturn(expression)
         else:
-            self.fatal_token(self.current_token.index, "A jump statement is needed", eh.TokenExpected)
+            self.fatal_token(self.index, "A jump statement is needed", eh.TokenExpected)
+
+    def generate_translation_unit(self) -> Iterator[list[CDeclarator]]:
+        """parse the external declarations one at a time, so they can be used before the whole file is parsed"""
+        try:
+            while not self.is_token_kind(tk.TokenKind.END):
+                index_: int = self.index
+
+                try:
+                    external_declaration: list[CDeclarator] = self.peek_external_declaration()
+
+                    # add typedefs to the list self.typedefs list
+                    for declarator in external_declaration:
+                        if isinstance(declarator.type, CPointer) or isinstance(declarator.type, CArray):
+                            bottom: CDeclarator = declarator.get_child_bottom()
+                        else:
+                            bottom = declarator
+
+                        if declarator.attributes.storage_class_specifier == CStorageClassSpecifier.Typedef and not isinstance(declarator, CFunction):
+                            self.typedefs.append(CTypedef(declarator))
+                        elif declarator.attributes.storage_class_specifier == CStorageClassSpecifier.Typedef and isinstance(declarator, CFunction):
+                            self.fatal_token(index_, "A typedef cannot be a function definition", eh.InvalidTypedef)
+                except Exception as error:
+                    external_declaration = [self.recover_error(error, index_, file_scope=True)]
+                    while self.typedefs.scopes:  # the scope of the parameters of a function definition with an error
+                        self.typedefs.pop_scope()
+
+                yield external_declaration
+        except eh.TooManyErrors:
+            return  # the parse is stopped, the tree is the external declarations before the last error
 
     def peek_translation_unit(self) -> list[CDeclarator]:
         translation_unit: list[CDeclarator] = []
 
-        while not self.is_token_kind(tk.TokenKind.END):
-            index_: int = self.current_token.index
-
-            external_declaration: list[CDeclarator] = self.peek_external_declaration()
-
+        for external_declaration in self.generate_translation_unit():
             translation_unit.extend(external_declaration)
 
-            # add typedefs to the list self.typedefs list
-            for declarator in external_declaration:
-                if isinstance(declarator.type, CPointer) or isinstance(declarator.type, CArray):
-                    bottom: CDeclarator = declarator.get_child_bottom()
-                else:
-                    bottom = declarator
-
-                if declarator.attributes.storage_class_specifier == CStorageClassSpecifier.Typedef and not isinstance(declarator, CFunction):
-                    self.typedefs.append(CTypedef(declarator))
-                elif declarator.attributes.storage_class_specifier == CStorageClassSpecifier.Typedef and isinstance(declarator, CFunction):
-                    self.fatal_token(index_, "A typedef cannot be a function definition", eh.InvalidTypedef)
-
         return translation_unit
 
+    def peek_translation_unit_parallel(self, workers: int | None = None, chunk_count: int | None = None) -> list[CDeclarator]:
+        """
+        parse the translation unit in two passes: the external declarations with their function bodies skipped,
+        then the function bodies in chunks across a process pool, every body with the typedefs in scope at it,
+        the tree is the same as the one of peek_translation_unit (an error is raised by parsing the source again)
+        """
+        if isinstance(self.tokens, tk.TokenStream):  # a token stream only keeps a window of its tokens
+            return self.peek_translation_unit()
+        workers = workers or os.cpu_count() or 1
+
+        try:
+            self.function_bodies = []
+            translation_unit: list[CDeclarator] = self.peek_translation_unit()
+            function_bodies: list[FunctionBody] = self.function_bodies
+            self.function_bodies = None
+
+            # the typedef table of the file scope is its typedefs in the order they were declared
+            typedefs: list[CTypedef] = list(self.typedefs.typedefs.values())
+            typedef_symbols: list[int] = list(self.typedefs.typedefs)
+            typedef_keys: dict[int, int] = {id(typedef): key for key, typedef in enumerate(typedefs)}
+            for function_body in function_bodies:
+                for _, typedef in function_body.scope_typedefs:
+                    if typedef is not None and id(typedef) not in typedef_keys:
+                        typedef_keys[id(typedef)] = len(typedefs)
+                        typedefs.append(typedef)
+
+            # the chunks are runs of bodies of about the same count of tokens
+            chunks: list[list[FunctionBody]] = []
+            chunk_tokens: int = sum(body.end_index - body.start_index for body in function_bodies) // \
+                (chunk_count or workers * 4) + 1
+            tokens: int = chunk_tokens  # the tokens of the bodies of the last chunk
+            for function_body in function_bodies:
+                if tokens >= chunk_tokens:
+                    chunks.append([])
+                    tokens = 0
+                chunks[-1].append(function_body)
+                tokens += function_body.end_index - function_body.start_index
+
+            arguments: list[tuple] = []
+            for chunk in chunks:
+                first_index: int = chunk[0].start_index
+                chunk_range: range = range(first_index, chunk[-1].end_index)
+                arguments.append((
+                    [tk.token_kind_to_code[self.tokens[index].kind] for index in chunk_range],
+                    [self.tokens[index].string for index in chunk_range],
+                    [self.tokens[index].symbol for index in chunk_range], first_index,
+                    typedef_symbols[:chunk[-1].typedef_count],
+                    [(body.start_index, body.end_index, body.typedef_count,
+                      [(symbol, typedef_keys[id(typedef)] if typedef is not None else -1)
+                       for symbol, typedef in body.scope_typedefs]) for body in chunk],
+                    self.precedence_climbing))
+
+            if workers == 1 or len(chunks) <= 1:  # no process is worth starting
+                chunk_results: list[bytes] = [parse_function_bodies(*chunk_arguments) for chunk_arguments in arguments]
+            else:
+                with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+                    chunk_results = list(executor.map(parse_function_bodies, *zip(*arguments)))
+
+            tags: list[tuple[int, CStruct | CUnion | CEnum]] = [(self.tags.indexes[tag.identifier.symbol], tag)
+                                                                for tag in self.tags]
+            for chunk, chunk_result in zip(chunks, chunk_results):
+                compound_statements, chunk_tags = FunctionBodyUnpickler(io.BytesIO(chunk_result), self.tokens,
+                                                                        typedefs).load()
+                for function_body, compound_statement in zip(chunk, compound_statements):
+                    function_body.function.compound_statement = compound_statement
+                tags.extend(chunk_tags)
+        except PARSE_ERRORS:  # a function body with an error
+            pass
+        else:
+            # the tags of the bodies were defined between the ones of the file scope, the first definition is found
+            self.tags = TagTable()
+            for index, tag in sorted(tags, key=lambda index_tag: index_tag[0]):
+                self.tags.append(tag, index)
+            return translation_unit
+
+        # the error is raised (or recovered from) where the serial parse finds it
+        self.function_bodies = None
+        self.set_index_token(0)
+        self.typedefs = TypedefTable()
+        self.tags = TagTable()
+        self.diagnostics = []
+        self.diagnostic_index = -1
+        return self.peek_translation_unit()
+
     def peek_external_declaration(self) -> list[CDeclarator]:
         """
         external_declaration
@@ -1859,39 +2643,89 @@ class CParser:
 
         declaration_specifiers, type_attributes = self.peek_declaration_specifiers()
 
-        declarators_index: int = self.current_token.index
+        declarators_index: int = self.index
 
         declarators: list[CDeclarator] = [self.peek_declarator()]
 
-        if self.is_token_kind(tk.TokenKind.COMMA) or self.is_token_kind(tk.TokenKind.EQUALS) or self.is_token_kind(tk.TokenKind.SEMICOLON):  # checks if the external_declaration is declaration
-            if self.is_token_kind(tk.TokenKind.EQUALS):
-                self.peek_token()  # peek = token
+        # the token after the first declarator tells a declaration from a function definition
+        external_declaration_handler: Callable[..., None] = self.external_declaration_handlers.get(self.current_token.kind,
+                                                                              self.peek_function_definition_rest)
+        external_declaration_handler(declaration_specifiers, type_attributes, declarators, declarators_index)
 
-                initializer: Node = self.peek_initializer()
+        return declarators
 
-                declarators[0].initializer = initializer
+    def peek_declaration_rest(self, declaration_specifiers: Node, type_attributes: CTypeAttribute, declarators: list[CDeclarator],
+                              declarators_index: int) -> None:
+        """parse the rest of an external declaration after its first declarator (its initializer and declarators)"""
+        if self.is_token_kind(tk.TokenKind.EQUALS):
+            self.peek_token()  # peek = token
 
-            if self.is_token_kind(tk.TokenKind.COMMA):
-                self.peek_token()  # peek , token
-                init_declarator_list: list[CDeclarator] = self.peek_init_declarator_list()
+            initializer: Node = self.peek_initializer()
 
-                declarators.extend(init_declarator_list)
+            declarators[0].initializer = initializer
 
-            for declarator in declarators:
-                declarator.get_child_bottom().child = declaration_specifiers
-                declarator.attributes = type_attributes
+        if self.is_token_kind(tk.TokenKind.COMMA):
+            self.peek_token()  # peek , token
+            init_declarator_list: list[CDeclarator] = self.peek_init_declarator_list()
 
-            self.expect_token_kind(tk.TokenKind.SEMICOLON, "A semicolon is needed", eh.TokenExpected)
-            self.peek_token()  # peek ; token
+            declarators.extend(init_declarator_list)
+
+        for declarator in declarators:
+            declarator.get_child_bottom().child = declaration_specifiers
+            declarator.attributes = type_attributes
+
+        self.expect_token_kind(tk.TokenKind.SEMICOLON, "A semicolon is needed", eh.TokenExpected)
+        self.peek_token()  # peek ; token
 
-        else:  # checks if the external_declaration is function_definition
-            compound_statement: CCompound = self.peek_compound_statement()
+    def peek_function_definition_rest(self, declaration_specifiers: Node, type_attributes: CTypeAttribute,
+                                      declarators: list[CDeclarator], declarators_index: int) -> None:
+        """parse the body of a function definition after its declarator"""
+        function: Node = declarators[0].get_child_bottom()
+
+        # the parameters are in the scope of the function body, a parameter hides a typedef of its name
+        self.typedefs.push_scope()
+        if isinstance(function, CFunction):
+            self.declare_block_declarators(function.parameters)
+        if self.function_bodies is None:
+            compound_statement: CCompound | NoneNode = self.peek_compound_statement()
+        else:
+            compound_statement = self.skip_function_body(function)
+        self.typedefs.pop_scope()
 
-            if not isinstance(declarators[0].get_child_bottom(), CFunction):
-                self.fatal_token(declarators_index, "A function definition is needed", eh.TokenExpected)
+        if not isinstance(function, CFunction):
+            self.fatal_token(declarators_index, "A function definition is needed", eh.TokenExpected)
 
-            declarators[0].attributes = type_attributes
-            declarators[0].get_child_bottom().compound_statement = compound_statement
-            declarators[0].get_child_bottom().child = declaration_specifiers
+        declarators[0].attributes = type_attributes
+        declarators[0].get_child_bottom().compound_statement = compound_statement
+        declarators[0].get_child_bottom().child = declaration_specifiers
 
-        return declarators
+    def skip_function_body(self, function: Node) -> NoneNode:
+        """
+        skip a function body by matching its curly braces (the first pass of peek_translation_unit_parallel),
+        it is kept with the typedefs in scope at it, the parameters are in the innermost scope
+        """
+        self.expect_token_kind(tk.TokenKind.OPENING_CURLY_BRACE, "An opening curly brace is needed", eh.TokenExpected)
+        start_index: int = self.index
+
+        tokens: list[tk.Token] | tk.TokenBuffer = self.tokens
+        index: int = start_index
+        depth: int = 0
+        while True:
+            kind: tk.TokenKind = tokens[index].kind
+            if kind == tk.TokenKind.END:
+                break
+            index += 1
+            if kind == tk.TokenKind.OPENING_CURLY_BRACE:
+                depth += 1
+            elif kind == tk.TokenKind.CLOSING_CURLY_BRACE:
+                depth -= 1
+                if depth == 0:
+                    break
+        self.set_index_token(index)
+
+        scope: list[tuple[int, CTypedef | None, bool]] = self.typedefs.scopes[-1]
+        # a parameter that is not a typedef name of the file scope is the last of the typedef table
+        typedef_count: int = len(self.typedefs.typedefs) - sum(not was_declared for _, _, was_declared in scope)
+        self.function_bodies.append(FunctionBody(function, start_index, self.index, typedef_count,
+                                                 [(symbol, self.typedefs.typedefs[symbol]) for symbol, _, _ in scope]))
+        return NoneNode()
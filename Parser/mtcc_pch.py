@@ -0,0 +1,202 @@
+import hashlib
+import io
+import os
+import pickle
+import struct
+
+import Parser.mtcc_c_ast as ca
+import Parser.mtcc_lexer as lx
+import Parser.mtcc_macro as mc
+import Parser.mtcc_parser as cp
+import Parser.mtcc_preprocessor as pp
+import Parser.mtcc_token as tk
+
+PCH_MAGIC: bytes = b'MTCCPCH\0'
+PCH_VERSION: int = 1  # a snapshot of another version is made again, not read
+
+# a snapshot file is its header, the headers it depends on and a pickle of the rest of the snapshot:
+#     magic, version, header count, key length | key (utf-8)
+#     for every header: file id, path length | path (utf-8) | content hash
+#     the pickle
+file_header_struct: struct.Struct = struct.Struct('<8sIII')
+header_entry_struct: struct.Struct = struct.Struct('<iI')
+HASH_SIZE: int = hashlib.sha256().digest_size
+
+
+def hash_source(source: str) -> bytes:
+    return hashlib.sha256(source.encode()).digest()
+
+
+def get_snapshot_key(prelude_path: str, search_paths: list[str]) -> str:
+    """a snapshot is only used for the prelude and the search paths it was made with"""
+    return '\0'.join([os.path.normpath(prelude_path)] + search_paths)
+
+
+def make_token(kind: tk.TokenKind, start: int, line: int, string: str, file_id: int) -> tk.Token:
+    """a token of a snapshot, its symbol is interned again (the symbols of the process that made it are not these)"""
+    symbol: int = tk.symbol_table.intern(string) \
+        if kind == tk.TokenKind.IDENTIFIER or string in tk.string_to_keyword else tk.NO_SYMBOL
+    token: tk.Token = tk.Token(kind, start, line, string, symbol)
+    token.file_id = file_id
+    return token
+
+
+class SnapshotPickler(pickle.Pickler):
+    """
+    pickle the objects that keep symbols by what the symbols are made from,
+    so they are made again with the symbols of the process that loads the snapshot
+    """
+
+    def reducer_override(self, obj):
+        if isinstance(obj, tk.Token):
+            return make_token, (obj.kind, obj.start, obj.line, obj.string, obj.file_id)
+        if isinstance(obj, mc.Macro):
+            return mc.Macro, (obj.name, obj.parameters, obj.variadic, obj.body)
+        if isinstance(obj, ca.CIdentifier):
+            return ca.CIdentifier, (obj.token,)
+        return NotImplemented
+
+
+class SnapshotUnpickler(pickle.Unpickler):
+    """unpickle a snapshot, the file ids of the tokens are moved to the file ids of the headers in this process"""
+
+    def __init__(self, file: io.BufferedIOBase, file_ids: dict[int, int]):
+        super().__init__(file)
+        self.file_ids: dict[int, int] = file_ids  # the file id of a header when the snapshot was made to its file id now
+
+    def make_token(self, kind: tk.TokenKind, start: int, line: int, string: str, file_id: int) -> tk.Token:
+        return make_token(kind, start, line, string, self.file_ids.get(file_id, file_id))
+
+    def find_class(self, module: str, name: str):
+        if module == __name__ and name == 'make_token':
+            return self.make_token
+        if not module.startswith('Parser.'):  # a snapshot only has the objects of the compiler
+            raise pickle.UnpicklingError(f"'{module}.{name}' is not an object of a snapshot")
+        return super().find_class(module, name)
+
+
+class Snapshot:
+    """
+    the state of a Preprocessor and a CParser after a prelude (the headers every translation unit starts with),
+    restored into a fresh Preprocessor and CParser instead of preprocessing and parsing the prelude again
+    """
+
+    def __init__(self, key: str, headers: list[tuple[int, str, bytes]], macros: list[mc.Macro], once_paths: set[str],
+                 include_guards: dict[str, str], typedefs: list[ca.CTypedef], tags: list[ca.CStruct | ca.CUnion | ca.CEnum],
+                 external_declarations: list[ca.CDeclarator]):
+        self.key: str = key  # see get_snapshot_key
+        self.headers: list[tuple[int, str, bytes]] = headers  # (file id, path, content hash) of every file of the prelude
+        self.macros: list[mc.Macro] = macros
+        self.once_paths: set[str] = once_paths
+        self.include_guards: dict[str, str] = include_guards
+        self.typedefs: list[ca.CTypedef] = typedefs
+        self.tags: list[ca.CStruct | ca.CUnion | ca.CEnum] = tags
+        self.external_declarations: list[ca.CDeclarator] = external_declarations  # they come before the ones of the parser
+
+    def restore_preprocessor(self, preprocessor: pp.Preprocessor) -> None:
+        """define the macros of the prelude, so an #include of a prelude header with a guard (or a #pragma once) is skipped"""
+        for macro in self.macros:
+            preprocessor.expander.define(macro)
+        preprocessor.once_paths.update(self.once_paths)
+        preprocessor.include_guards.update(self.include_guards)
+
+    def restore_parser(self, parser: cp.CParser) -> None:
+        for typedef in self.typedefs:
+            parser.typedefs.append(typedef)
+        for tag in self.tags:
+            parser.tags.append(tag)
+
+
+def make_snapshot(prelude_path: str, include_paths: list[str] | None = None, system_include_paths: list[str] | None = None,
+                  engine: lx.LexerEngine = lx.LexerEngine.CHARACTER) -> Snapshot:
+    """preprocess and parse the prelude, the snapshot is the state after it"""
+    preprocessor: pp.Preprocessor = pp.Preprocessor(prelude_path, include_paths, system_include_paths, engine)
+    tokens: list[tk.Token] = preprocessor.preprocess()
+    parser: cp.CParser = cp.CParser(tokens, '', source_files=pp.source_files)
+    external_declarations: list[ca.CDeclarator] = parser.peek_translation_unit()
+
+    return Snapshot(get_snapshot_key(prelude_path, preprocessor.search_paths),
+                    [(file_id, source_file.path, hash_source(source_file.source))
+                     for file_id, source_file in preprocessor.included_files.items()],
+                    list(preprocessor.expander.macros.values()), set(preprocessor.once_paths),
+                    dict(preprocessor.include_guards), list(parser.typedefs), list(parser.tags), external_declarations)
+
+
+def save_snapshot(snapshot: Snapshot, snapshot_path: str) -> None:
+    """write the snapshot file, it is written next to its path and then moved, so a reader never sees half of it"""
+    key: bytes = snapshot.key.encode()
+    buffer: io.BytesIO = io.BytesIO()
+    buffer.write(file_header_struct.pack(PCH_MAGIC, PCH_VERSION, len(snapshot.headers), len(key)))
+    buffer.write(key)
+    for file_id, path, content_hash in snapshot.headers:
+        encoded_path: bytes = path.encode()
+        buffer.write(header_entry_struct.pack(file_id, len(encoded_path)))
+        buffer.write(encoded_path)
+        buffer.write(content_hash)
+
+    SnapshotPickler(buffer, pickle.HIGHEST_PROTOCOL).dump(
+        (snapshot.macros, snapshot.once_paths, snapshot.include_guards, snapshot.typedefs, snapshot.tags,
+         snapshot.external_declarations))
+
+    temporary_path: str = f"{snapshot_path}.{os.getpid()}.tmp"
+    with open(temporary_path, 'wb') as snapshot_file:
+        snapshot_file.write(buffer.getvalue())
+    os.replace(temporary_path, snapshot_path)
+
+
+def load_snapshot(snapshot_path: str, prelude_path: str, include_paths: list[str] | None = None,
+                  system_include_paths: list[str] | None = None,
+                  engine: lx.LexerEngine = lx.LexerEngine.CHARACTER) -> Snapshot | None:
+    """
+    read a snapshot file, None if there is none, it is of another version or of another prelude,
+    or a header it depends on was changed (or removed) since it was made
+    """
+    try:
+        with open(snapshot_path, 'rb') as snapshot_file:
+            data: bytes = snapshot_file.read()
+    except OSError:
+        return None
+
+    try:
+        magic, version, header_count, key_length = file_header_struct.unpack_from(data, 0)
+        if magic != PCH_MAGIC or version != PCH_VERSION:
+            return None
+        offset: int = file_header_struct.size
+        key: str = data[offset:offset + key_length].decode()
+        offset += key_length
+        if key != get_snapshot_key(prelude_path, list(include_paths or []) + list(system_include_paths or [])):
+            return None
+
+        headers: list[tuple[int, str, bytes]] = []
+        file_ids: dict[int, int] = {}
+        for _ in range(header_count):
+            file_id, path_length = header_entry_struct.unpack_from(data, offset)
+            offset += header_entry_struct.size
+            path: str = data[offset:offset + path_length].decode()
+            content_hash: bytes = data[offset + path_length:offset + path_length + HASH_SIZE]
+            offset += path_length + HASH_SIZE
+
+            # the header is read (not lexed) to check its hash, it is then the source file of its tokens here
+            source_file: pp.SourceFile = pp.get_source_file(path, engine)
+            if hash_source(source_file.source) != content_hash:
+                return None
+            headers.append((file_id, path, content_hash))
+            file_ids[file_id] = source_file.file_id
+
+        unpickler: SnapshotUnpickler = SnapshotUnpickler(io.BytesIO(data[offset:]), file_ids)
+        macros, once_paths, include_guards, typedefs, tags, external_declarations = unpickler.load()
+    except (OSError, ValueError, EOFError, struct.error, pickle.UnpicklingError):
+        return None
+
+    return Snapshot(key, headers, macros, once_paths, include_guards, typedefs, tags, external_declarations)
+
+
+def get_snapshot(snapshot_path: str, prelude_path: str, include_paths: list[str] | None = None,
+                 system_include_paths: list[str] | None = None,
+                 engine: lx.LexerEngine = lx.LexerEngine.CHARACTER) -> Snapshot:
+    """the snapshot of the prelude from its snapshot file, made again (and saved) when the file is not valid"""
+    snapshot: Snapshot | None = load_snapshot(snapshot_path, prelude_path, include_paths, system_include_paths, engine)
+    if snapshot is None:
+        snapshot = make_snapshot(prelude_path, include_paths, system_include_paths, engine)
+        save_snapshot(snapshot, snapshot_path)
+    return snapshot
@@ -0,0 +1,732 @@
+import os
+import re
+
+import Parser.mtcc_error_handler as eh
+import Parser.mtcc_lexer as lx
+import Parser.mtcc_macro as mc
+import Parser.mtcc_source as src
+import Parser.mtcc_token as tk
+
+MAX_INCLUDE_DEPTH: int = 200
+
+# the name of a directive and the rest of its line (the null directive has no name)
+directive_pattern: re.Pattern = re.compile(r'#[\t ]*([A-Za-z_][A-Za-z0-9_]*)?(.*)', re.S)
+# a comment in a directive line is a space, a string or a char literal in it is kept as it is
+directive_comment_pattern: re.Pattern = re.compile(
+    r'("(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\')|/\*.*?\*/|//[^\n]*', re.S)
+header_name_pattern: re.Pattern = re.compile(r'"([^"\n]+)"|<([^>\n]+)>')
+macro_name_pattern: re.Pattern = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+# the condition of an #if include guard: #if !defined(X) or #if !defined X
+not_defined_pattern: re.Pattern = re.compile(
+    r'![\t ]*defined[\t ]*(?:\([\t ]*([A-Za-z_][A-Za-z0-9_]*)[\t ]*\)|([A-Za-z_][A-Za-z0-9_]*))')
+integer_literal_pattern: re.Pattern = re.compile(r'(?:0[xX]([0-9A-Fa-f]+)|(0[0-7]*)|([1-9][0-9]*))[uUlL]*')
+
+# the strings the skip scanner looks for, a comment, a string or a char literal hides the '#' of a directive
+SKIP_BOUNDARIES: tuple[str, ...] = ('#', '/*', '//', '"', "'")
+# the rest of a string or a char literal, it ends at its quote or (unterminated) at the end of its line
+literal_end_patterns: dict[str, re.Pattern] = {
+    '"': re.compile(r'(?:[^"\\\n]|\\.)*["\n]', re.S),
+    "'": re.compile(r"(?:[^'\\\n]|\\.)*['\n]", re.S),
+}
+
+
+class Directive:
+    """a directive line of a source file, the comments in it are removed"""
+
+    def __init__(self, start: int, end: int, name: str, operands: str, operands_start: int):
+        self.start: int = start  # the start char index of the '#' in the physical source
+        self.end: int = end
+        self.name: str = name  # '' for the null directive
+        self.operands: str = operands  # the rest of the line, without its leading and trailing whitespace
+        self.operands_start: int = operands_start  # where the operands start in the physical source (about, after a splice)
+        self.macro: mc.Macro | None = None  # the macro of a #define, lexed the first time the #define is run
+
+
+def find_line_end(source: str, index: int) -> int:
+    """the newline that ends the line of index, a line splice (backslash-newline) makes the line longer"""
+    end: int = source.find('\n', index)
+    while end > 0 and source[end - 1] == '\\':
+        end = source.find('\n', end + 1)
+    return len(source) if end == -1 else end
+
+
+def find_directive_end(source: str, start: int) -> int:
+    """the end of the directive line at start, a block comment that starts in it and ends after it makes it longer"""
+    end: int = find_line_end(source, start)
+    comment_start: int = source.find('/*', start, end)
+    while comment_start != -1:
+        comment_end: int = source.find('*/', comment_start + 2)
+        if comment_end == -1:  # an unterminated block comment runs to the end of the source
+            return len(source)
+
+        if comment_end + 2 > end:
+            end = find_line_end(source, comment_end + 2)
+        comment_start = source.find('/*', comment_end + 2, end)
+
+    return end
+
+
+def is_line_start(source: str, index: int) -> bool:
+    """check if only whitespace comes before index in its (logical) line"""
+    line_start: int = source.rfind('\n', 0, index) + 1
+    return source[line_start:index].strip('\t\r\f\v ') == '' and source[line_start - 2:line_start] != '\\\n'
+
+
+def scan_directive_lines(source: str) -> list[tuple[int, int]]:
+    """
+    the (start, end) of every directive line of a source, the skip scanner only jumps (with str.find) between
+    the '#' chars and the starts of the comments and the literals that can hide one, the text between them is not lexed
+    """
+    directive_lines: list[tuple[int, int]] = []
+    length: int = len(source)
+    # the next place of every boundary from the index on, a boundary is only looked for again once it is passed
+    positions: list[int] = [-1] * len(SKIP_BOUNDARIES)
+    index: int = 0
+
+    while index < length:
+        for boundary_index, boundary in enumerate(SKIP_BOUNDARIES):
+            if positions[boundary_index] < index:
+                boundary_position: int = source.find(boundary, index)
+                positions[boundary_index] = length if boundary_position == -1 else boundary_position
+
+        position: int = min(positions)
+        if position == length:
+            break
+
+        boundary: str = SKIP_BOUNDARIES[positions.index(position)]
+        if boundary == '#':
+            if is_line_start(source, position):
+                index = find_directive_end(source, position)
+                directive_lines.append((position, index))
+            else:
+                index = position + 1
+        elif boundary == '/*':
+            comment_end: int = source.find('*/', position + 2)
+            index = length if comment_end == -1 else comment_end + 2
+        elif boundary == '//':
+            index = find_line_end(source, position)
+        else:
+            literal_match: re.Match | None = literal_end_patterns[boundary].match(source, position + 1)
+            index = length if literal_match is None else literal_match.end()
+
+    return directive_lines
+
+
+# every file that was read by its file id, a token of a file keeps the file id (see tk.Token.file_id)
+source_files: list['SourceFile'] = []
+# the source files by path, a file is read again only when its mtime or its size is changed
+source_file_cache: dict[str, 'SourceFile'] = {}
+
+
+class SourceFile:
+    """
+    a file split by its directive lines into groups, a group is lexed the first time it is in an active group
+    (the groups of an inactive #if are never lexed), the file is kept in the source file cache,
+    so a header included from many files (or many times) is read once
+    """
+
+    def __init__(self, path: str, mtime: int, size: int, engine: lx.LexerEngine):
+        self.path: str = path
+        self.mtime: int = mtime  # the stat of the file when it was read (st_mtime_ns and st_size)
+        self.size: int = size
+        self.engine: lx.LexerEngine = engine
+        self.file_id: int = len(source_files)
+        source_files.append(self)
+
+        source_file = open(path)
+        self.source: str = source_file.read()  # the diagnostics of the tokens of the file read it
+        source_file.close()
+        self.line_index: src.LineIndex = src.LineIndex(self.source)
+        self.end_token: tk.Token = tk.Token(tk.TokenKind.END, len(self.source), self.source.count('\n'), '\0')
+        self.end_token.file_id = self.file_id  # only the END token of the main file ends the tokens
+
+        self.directives: list[Directive] = []
+        # group i is the text before directive i, the last group is the text after the last directive
+        self.groups: list[tuple[int, int]] = []
+        group_start: int = 0
+        for start, end in scan_directive_lines(self.source):
+            text: str = src.splice_lines(self.source[start:end])[0]
+            directive_match: re.Match = directive_pattern.fullmatch(directive_comment_pattern.sub(remove_comment, text))
+            operands: str = directive_match.group(2)
+            operands_start: int = start + directive_match.start(2) + len(operands) - len(operands.lstrip())
+            self.directives.append(Directive(start, end, directive_match.group(1) or '', operands.strip(), operands_start))
+            self.groups.append((group_start, start))
+            group_start = end
+        self.groups.append((group_start, len(self.source)))
+        self.group_tokens: list[list[tk.Token] | None] = [None] * len(self.groups)
+
+        self.include_guard: str | None = self.find_include_guard()
+
+    def get_group_tokens(self, group_index: int) -> list[tk.Token]:
+        """the tokens of a group, the group is lexed the first time they are asked for"""
+        group_tokens: list[tk.Token] | None = self.group_tokens[group_index]
+        if group_tokens is not None:
+            return group_tokens
+
+        start, end = self.groups[group_index]
+        group_tokens = []
+        if self.source[start:end].strip():  # most groups between two directives are only a newline
+            lexer: lx.Lexer = lx.Lexer.from_string(self.source[start:end], self.engine)
+            lexer.lex()
+            line: int = self.line_index.get_line(start)
+            group_tokens = lexer.tokens[:-1]
+            for token in group_tokens:
+                token.start += start
+                token.line += line
+                token.file_id = self.file_id
+
+        self.group_tokens[group_index] = group_tokens
+        return group_tokens
+
+    def find_include_guard(self) -> str | None:
+        """
+        the macro of the include guard of the file (an #ifndef X or #if !defined(X) group around all of the file),
+        the file makes nothing once the macro is defined, so it is not opened again
+        """
+        if not self.directives or self.get_group_tokens(0):
+            return None
+
+        first_directive: Directive = self.directives[0]
+        if first_directive.name == 'ifndef':
+            include_guard: str = first_directive.operands
+        elif first_directive.name == 'if' and not_defined_pattern.fullmatch(first_directive.operands):
+            guard_match: re.Match = not_defined_pattern.fullmatch(first_directive.operands)
+            include_guard: str = guard_match.group(1) or guard_match.group(2)
+        else:
+            return None
+        if macro_name_pattern.fullmatch(include_guard) is None:
+            return None
+
+        # the #endif of the first group must be the last directive, with no tokens after it
+        depth: int = 0
+        for directive_index, directive in enumerate(self.directives):
+            if directive.name in ('if', 'ifdef', 'ifndef'):
+                depth += 1
+            elif directive.name in ('elif', 'else') and depth == 1:
+                return None
+            elif directive.name == 'endif':
+                depth -= 1
+                if depth == 0:
+                    if directive_index == len(self.directives) - 1 and not self.get_group_tokens(len(self.groups) - 1):
+                        return include_guard
+                    return None
+
+        return None
+
+    def get_line_string(self, index: int) -> str:
+        return self.line_index.get_line_string(self.line_index.get_line(index))
+
+
+def remove_comment(comment_match: re.Match) -> str:
+    return comment_match.group(1) or ' '
+
+
+def get_source_file(path: str, engine: lx.LexerEngine = lx.LexerEngine.CHARACTER) -> SourceFile:
+    """the source file of the path, from the source file cache while the file is not changed"""
+    stat: os.stat_result = os.stat(path)
+    source_file: SourceFile | None = source_file_cache.get(path)
+    if source_file is None or source_file.mtime != stat.st_mtime_ns or source_file.size != stat.st_size:
+        source_file = SourceFile(path, stat.st_mtime_ns, stat.st_size, engine)
+        source_file_cache[path] = source_file
+    return source_file
+
+
+class ConditionalGroup:
+    """an open #if (#ifdef or #ifndef) and its #elif and #else groups"""
+
+    def __init__(self, parent_active: bool, active: bool, directive: Directive):
+        self.parent_active: bool = parent_active  # the group of the #if is in an active group
+        self.active: bool = active  # the tokens of the current group are kept
+        self.taken: bool = active  # a group was already active, so the groups after it are not
+        self.else_seen: bool = False
+        self.directive: Directive = directive
+
+
+class IncludeEntry:
+    """a file in the include stack"""
+
+    def __init__(self, source_file: SourceFile, search_index: int, conditional_depth: int):
+        self.source_file: SourceFile = source_file
+        self.search_index: int = search_index  # the search path the file was found in (-1 if it was not searched for)
+        self.conditional_depth: int = conditional_depth  # the open conditionals before the file was included
+
+
+class ConditionParser:
+    """evaluate the constant expression of an #if or an #elif, an identifier that is not a macro is 0"""
+
+    # the binary operators by their precedence, the operators of a higher precedence bind first
+    binary_precedences: dict[tk.TokenKind, int] = {
+        tk.TokenKind.OR_OP: 1,
+        tk.TokenKind.AND_OP: 2,
+        tk.TokenKind.VERTICAL_BAR: 3,
+        tk.TokenKind.CIRCUMFLEX: 4,
+        tk.TokenKind.AMPERSAND: 5,
+        tk.TokenKind.EQ_OP: 6,
+        tk.TokenKind.NE_OP: 6,
+        tk.TokenKind.LESS_THAN: 7,
+        tk.TokenKind.GREATER_THAN: 7,
+        tk.TokenKind.LE_OP: 7,
+        tk.TokenKind.GE_OP: 7,
+        tk.TokenKind.LEFT_OP: 8,
+        tk.TokenKind.RIGHT_OP: 8,
+        tk.TokenKind.PLUS: 9,
+        tk.TokenKind.HYPHEN: 9,
+        tk.TokenKind.ASTERISK: 10,
+        tk.TokenKind.SLASH: 10,
+        tk.TokenKind.PERCENTAGE: 10,
+    }
+
+    def __init__(self, tokens: list[tk.Token], macros: dict[int, mc.Macro]):
+        self.tokens: list[tk.Token] = tokens  # ends with an END token
+        self.index: int = 0
+        self.current_token: tk.Token = self.tokens[self.index]
+        self.macros: dict[int, mc.Macro] = macros  # for a 'defined' that a macro expanded to
+        self.unevaluated: int = 0  # inside the operand of a && or a || that is not evaluated (1 / 0 is no error there)
+
+    def peek_token(self) -> None:
+        self.index += 1
+        self.current_token = self.tokens[self.index]
+
+    def is_token_kind(self, kind: tk.TokenKind) -> bool:
+        return self.current_token.kind == kind
+
+    def expect_token_kind(self, kind: tk.TokenKind, error_string: str) -> None:
+        if not self.is_token_kind(kind):
+            raise eh.InvalidDirective(error_string)
+        self.peek_token()
+
+    def evaluate(self) -> int:
+        if self.is_token_kind(tk.TokenKind.END):
+            raise eh.InvalidDirective("#if with no expression")
+
+        value: int = self.evaluate_conditional()
+        if not self.is_token_kind(tk.TokenKind.END):
+            raise eh.InvalidDirective(f"Missing binary operator before token '{self.current_token.string}'")
+        return value
+
+    def evaluate_conditional(self) -> int:
+        condition: int = self.evaluate_binary(1)
+        if not self.is_token_kind(tk.TokenKind.QUESTION_MARK):
+            return condition
+        self.peek_token()
+
+        self.unevaluated += not condition
+        true_value: int = self.evaluate_conditional()
+        self.unevaluated -= not condition
+        self.expect_token_kind(tk.TokenKind.COLON, "Expected ':' in the #if expression")
+        self.unevaluated += bool(condition)
+        false_value: int = self.evaluate_conditional()
+        self.unevaluated -= bool(condition)
+
+        return true_value if condition else false_value
+
+    def evaluate_binary(self, min_precedence: int) -> int:
+        left: int = self.evaluate_unary()
+
+        precedence: int | None = self.binary_precedences.get(self.current_token.kind)
+        while precedence is not None and precedence >= min_precedence:
+            operator: tk.TokenKind = self.current_token.kind
+            self.peek_token()
+
+            # the right operand of a && or a || that is already decided is not evaluated
+            short_circuit: bool = (operator == tk.TokenKind.AND_OP and not left) or (operator == tk.TokenKind.OR_OP and left)
+            self.unevaluated += short_circuit
+            right: int = self.evaluate_binary(precedence + 1)
+            self.unevaluated -= short_circuit
+
+            left = self.apply_binary(operator, left, right)
+            precedence = self.binary_precedences.get(self.current_token.kind)
+
+        return left
+
+    def apply_binary(self, operator: tk.TokenKind, left: int, right: int) -> int:
+        if operator in (tk.TokenKind.SLASH, tk.TokenKind.PERCENTAGE):
+            if right == 0:
+                if self.unevaluated:
+                    return 0
+                raise eh.InvalidDirective("Division by zero in #if")
+            quotient: int = abs(left) // abs(right) * (1 if (left < 0) == (right < 0) else -1)  # rounds toward zero
+            return quotient if operator == tk.TokenKind.SLASH else left - right * quotient
+
+        match operator:
+            case tk.TokenKind.OR_OP:
+                return int(bool(left) or bool(right))
+            case tk.TokenKind.AND_OP:
+                return int(bool(left) and bool(right))
+            case tk.TokenKind.VERTICAL_BAR:
+                return left | right
+            case tk.TokenKind.CIRCUMFLEX:
+                return left ^ right
+            case tk.TokenKind.AMPERSAND:
+                return left & right
+            case tk.TokenKind.EQ_OP:
+                return int(left == right)
+            case tk.TokenKind.NE_OP:
+                return int(left != right)
+            case tk.TokenKind.LESS_THAN:
+                return int(left < right)
+            case tk.TokenKind.GREATER_THAN:
+                return int(left > right)
+            case tk.TokenKind.LE_OP:
+                return int(left <= right)
+            case tk.TokenKind.GE_OP:
+                return int(left >= right)
+            case tk.TokenKind.LEFT_OP:
+                return left << right
+            case tk.TokenKind.RIGHT_OP:
+                return left >> right
+            case tk.TokenKind.PLUS:
+                return left + right
+            case tk.TokenKind.HYPHEN:
+                return left - right
+            case _:
+                return left * right
+
+    def evaluate_unary(self) -> int:
+        token: tk.Token = self.current_token
+
+        if token.kind in (tk.TokenKind.PLUS, tk.TokenKind.HYPHEN, tk.TokenKind.TILDE, tk.TokenKind.EXCLAMATION):
+            self.peek_token()
+            value: int = self.evaluate_unary()
+            if token.kind == tk.TokenKind.HYPHEN:
+                return -value
+            if token.kind == tk.TokenKind.TILDE:
+                return ~value
+            if token.kind == tk.TokenKind.EXCLAMATION:
+                return int(not value)
+            return value
+
+        if token.kind == tk.TokenKind.OPENING_PARENTHESIS:
+            self.peek_token()
+            value: int = self.evaluate_conditional()
+            self.expect_token_kind(tk.TokenKind.CLOSING_PARENTHESIS, "Missing ')' in the #if expression")
+            return value
+
+        if token.kind == tk.TokenKind.INTEGER_LITERAL:
+            return self.evaluate_integer_literal()
+
+        if token.kind == tk.TokenKind.STRING_LITERAL and token.string.startswith("'"):  # a char literal
+            self.peek_token()
+            if len(token.string) != 3:
+                raise eh.InvalidDirective(f"Invalid char literal {token.string} in #if")
+            return ord(token.string[1])
+
+        if token.symbol != tk.NO_SYMBOL:  # an identifier or a keyword
+            self.peek_token()
+            if token.string == 'defined':
+                return self.evaluate_defined()
+            return 0
+
+        if token.kind == tk.TokenKind.FLOAT_LITERAL:
+            raise eh.InvalidDirective("Floating constant in #if")
+        if token.kind == tk.TokenKind.END:
+            raise eh.InvalidDirective("#if with no expression after an operator")
+        raise eh.InvalidDirective(f"Token '{token.string}' is not valid in #if")
+
+    def evaluate_integer_literal(self) -> int:
+        # the lexer cuts a number at its first letter (0x1F, 10UL), the tokens right after it are a part of it
+        string: str = self.current_token.string
+        end: int = self.current_token.start + len(string)
+        file_id: int = self.current_token.file_id
+        self.peek_token()
+        while self.current_token.start == end and self.current_token.file_id == file_id and \
+                self.current_token.kind in (tk.TokenKind.IDENTIFIER, tk.TokenKind.INTEGER_LITERAL):
+            string += self.current_token.string
+            end += len(self.current_token.string)
+            self.peek_token()
+
+        integer_match: re.Match | None = integer_literal_pattern.fullmatch(string)
+        if integer_match is None:
+            raise eh.InvalidDirective(f"Invalid integer constant {string} in #if")
+        if integer_match.group(1) is not None:
+            return int(integer_match.group(1), 16)
+        if integer_match.group(2) is not None:
+            return int(integer_match.group(2), 8)
+        return int(integer_match.group(3))
+
+    def evaluate_defined(self) -> int:
+        parenthesized: bool = self.is_token_kind(tk.TokenKind.OPENING_PARENTHESIS)
+        if parenthesized:
+            self.peek_token()
+
+        if self.current_token.symbol == tk.NO_SYMBOL:
+            raise eh.InvalidDirective("Operator 'defined' requires an identifier")
+        value: int = int(self.current_token.symbol in self.macros)
+        self.peek_token()
+
+        if parenthesized:
+            self.expect_token_kind(tk.TokenKind.CLOSING_PARENTHESIS, "Missing ')' after 'defined'")
+        return value
+
+
+class Preprocessor:
+    """
+    the preprocessor of a translation unit, the directives of the main file are run, the #include files
+    are put in place of their #include and the macros are expanded, the tokens of every file are shared
+    with the source file cache, a file with an include guard or a #pragma once is not opened again once it makes nothing
+    """
+
+    def __init__(self, main_file_path: str, include_paths: list[str] | None = None,
+                 system_include_paths: list[str] | None = None, engine: lx.LexerEngine = lx.LexerEngine.CHARACTER,
+                 directives_only: bool = False):
+        self.main_file_path: str = main_file_path
+        # the paths of an #include <...> (and of an #include "..." that is not in the directory of its file),
+        # the -I paths are searched before the system paths
+        self.search_paths: list[str] = list(include_paths or []) + list(system_include_paths or [])
+        self.engine: lx.LexerEngine = engine
+        # only the directives are run (to follow the #include files), the groups are not lexed and make no tokens
+        self.directives_only: bool = directives_only
+
+        self.expander: mc.MacroExpander = mc.MacroExpander(source_files, engine)
+        self.tokens: list[tk.Token] = []
+
+        self.conditionals: list[ConditionalGroup] = []
+        self.include_stack: list[IncludeEntry] = []
+        self.once_paths: set[str] = set()  # the files with a #pragma once that were included
+        self.include_guards: dict[str, str] = {}  # the include guard of a file by its path, known after it is included
+        self.resolved_includes: dict[tuple[str, str, bool, int], tuple[str, int] | None] = {}
+        self.included_files: dict[int, SourceFile] = {}  # every file that was included (the main file too) by its file id
+        self.dependencies: dict[str, list[str]] = {}  # the paths a file #includes by its path, in the order they are included
+
+        self.skipped_includes: int = 0  # the #include of a file that was not opened again
+        # the text of the groups (not of the directive lines) that was lexed and that was skipped, see get_skip_ratio
+        self.lexed_bytes: int = 0
+        self.skipped_bytes: int = 0
+
+    def preprocess(self) -> list[tk.Token]:
+        main_file: SourceFile = get_source_file(os.path.normpath(self.main_file_path), self.engine)
+        self.include_file(main_file, -1)
+        self.tokens.append(main_file.end_token)
+        return self.tokens
+
+    def is_active(self) -> bool:
+        return not self.conditionals or self.conditionals[-1].active
+
+    def fatal_directive(self, source_file: SourceFile, directive: Directive, error_string: str, raise_exception) -> None:
+        line, column = source_file.line_index.get_location(directive.start)
+        full_error_string: str = f"\nMTCC:{source_file.path}:{line + 1}:{column + 1}: "
+        full_error_string += error_string + '\n'
+        full_error_string += f"    | {source_file.get_line_string(directive.start)}"
+        raise raise_exception(full_error_string)
+
+    def include_file(self, source_file: SourceFile, search_index: int) -> None:
+        include_entry: IncludeEntry = IncludeEntry(source_file, search_index, len(self.conditionals))
+        self.include_stack.append(include_entry)
+        self.included_files[source_file.file_id] = source_file
+
+        for group_index, directive in enumerate(source_file.directives):
+            self.include_group(source_file, group_index)
+            self.run_directive(source_file, directive)
+        self.include_group(source_file, len(source_file.directives))
+
+        if len(self.conditionals) != include_entry.conditional_depth:
+            self.fatal_directive(source_file, self.conditionals[-1].directive,
+                                 f"Unterminated #{self.conditionals[-1].directive.name}", eh.InvalidDirective)
+        self.include_stack.pop()
+
+    def include_group(self, source_file: SourceFile, group_index: int) -> None:
+        """expand the tokens of an active group, an inactive group is skipped with no tokens made"""
+        if self.directives_only:
+            return
+
+        start, end = source_file.groups[group_index]
+        if not self.is_active():
+            self.skipped_bytes += end - start
+            return
+
+        self.lexed_bytes += end - start
+        self.expander.expand(source_file.get_group_tokens(group_index), self.tokens)
+
+    def get_skip_ratio(self) -> float:
+        """the bytes of the inactive groups that were skipped for every byte of the active groups"""
+        return self.skipped_bytes / max(self.lexed_bytes, 1)
+
+    def run_directive(self, source_file: SourceFile, directive: Directive) -> None:
+        if directive.name in ('if', 'ifdef', 'ifndef', 'elif', 'else', 'endif'):
+            self.run_conditional(source_file, directive)
+            return
+
+        if not self.is_active():  # only the conditionals of an inactive group are run
+            return
+
+        match directive.name:
+            case 'include' | 'include_next':
+                self.run_include(source_file, directive)
+            case 'define':
+                self.run_define(source_file, directive)
+            case 'undef':
+                self.expander.undefine(self.get_macro_name(source_file, directive))
+            case 'pragma':
+                if directive.operands == 'once':
+                    self.once_paths.add(source_file.path)
+            case 'error':
+                self.fatal_directive(source_file, directive, f"#error {directive.operands}", eh.InvalidDirective)
+            case '' | 'line' | 'warning' | 'ident' | 'sccs':
+                pass  # the null directive, the diagnostics do not follow #line
+            case _:
+                self.fatal_directive(source_file, directive, f"Invalid preprocessing directive #{directive.name}",
+                                     eh.InvalidDirective)
+
+    def run_conditional(self, source_file: SourceFile, directive: Directive) -> None:
+        if directive.name in ('if', 'ifdef', 'ifndef'):
+            parent_active: bool = self.is_active()
+            active: bool = parent_active and self.evaluate_condition(source_file, directive)
+            self.conditionals.append(ConditionalGroup(parent_active, active, directive))
+            return
+
+        if len(self.conditionals) == self.include_stack[-1].conditional_depth:
+            self.fatal_directive(source_file, directive, f"#{directive.name} without #if", eh.InvalidDirective)
+
+        conditional: ConditionalGroup = self.conditionals[-1]
+        if directive.name == 'endif':
+            self.conditionals.pop()
+        elif conditional.else_seen:
+            self.fatal_directive(source_file, directive, f"#{directive.name} after #else", eh.InvalidDirective)
+        elif directive.name == 'elif':
+            conditional.active = conditional.parent_active and not conditional.taken and \
+                                 self.evaluate_condition(source_file, directive)
+            conditional.taken = conditional.taken or conditional.active
+        else:
+            conditional.active = conditional.parent_active and not conditional.taken
+            conditional.taken = True
+            conditional.else_seen = True
+
+    def evaluate_condition(self, source_file: SourceFile, directive: Directive) -> bool:
+        if directive.name == 'ifdef':
+            return self.expander.is_defined(self.get_macro_name(source_file, directive))
+        if directive.name == 'ifndef':
+            return not self.expander.is_defined(self.get_macro_name(source_file, directive))
+
+        try:
+            # the operand of a 'defined' is not expanded, so it is evaluated before the macros are
+            operand_tokens: list[tk.Token] = self.lex_operands(source_file, directive)
+            tokens: list[tk.Token] = []
+            self.expander.expand(self.replace_defined(operand_tokens[:-1]), tokens)
+            tokens.append(operand_tokens[-1])
+            return bool(ConditionParser(tokens, self.expander.macros).evaluate())
+        except (SyntaxError, eh.InvalidDirective) as error:
+            error_string: str = error.message if isinstance(error, eh.InvalidDirective) else str(error)
+        self.fatal_directive(source_file, directive, error_string, eh.InvalidDirective)
+
+    def lex_operands(self, source_file: SourceFile, directive: Directive) -> list[tk.Token]:
+        """the tokens of the operands of a directive (with an END token), put where the operands are in their file"""
+        lexer: lx.Lexer = lx.Lexer.from_string(directive.operands, self.engine)
+        lexer.lex()
+        for token in lexer.tokens:
+            token.start += directive.operands_start
+            token.file_id = source_file.file_id
+        return lexer.tokens
+
+    def replace_defined(self, tokens: list[tk.Token]) -> list[tk.Token]:
+        """replace every 'defined X' and 'defined(X)' with 1 or 0"""
+        replaced_tokens: list[tk.Token] = []
+        token_index: int = 0
+        while token_index < len(tokens):
+            token: tk.Token = tokens[token_index]
+            token_index += 1
+            if token.string != 'defined' or token.kind != tk.TokenKind.IDENTIFIER:
+                replaced_tokens.append(token)
+                continue
+
+            operand: list[tk.Token] = tokens[token_index:token_index + 1]
+            if operand and operand[0].kind == tk.TokenKind.OPENING_PARENTHESIS:
+                operand = tokens[token_index + 1:token_index + 3]
+                if len(operand) != 2 or operand[1].kind != tk.TokenKind.CLOSING_PARENTHESIS:
+                    raise eh.InvalidDirective("Missing ')' after 'defined'")
+            if not operand or operand[0].symbol == tk.NO_SYMBOL:
+                raise eh.InvalidDirective("Operator 'defined' requires an identifier")
+            token_index += 1 if len(operand) == 1 else 3
+
+            defined_token: tk.Token = tk.Token(tk.TokenKind.INTEGER_LITERAL, token.start, token.line,
+                                               '1' if operand[0].symbol in self.expander.macros else '0')
+            defined_token.file_id = token.file_id
+            replaced_tokens.append(defined_token)
+
+        return replaced_tokens
+
+    def get_macro_name(self, source_file: SourceFile, directive: Directive) -> str:
+        name_match: re.Match | None = macro_name_pattern.match(directive.operands)
+        if name_match is None:
+            self.fatal_directive(source_file, directive, f"Macro name missing in #{directive.name}", eh.InvalidDirective)
+        return name_match.group()
+
+    def run_define(self, source_file: SourceFile, directive: Directive) -> None:
+        if directive.macro is None:  # the #define of a cached file is lexed once, not every time the file is included
+            try:
+                directive.macro = mc.parse_macro_definition(directive.operands, directive.operands_start,
+                                                            source_file.line_index.get_line(directive.start),
+                                                            source_file.file_id, self.engine)
+            except (SyntaxError, eh.InvalidDirective) as error:
+                error_string: str = error.message if isinstance(error, eh.InvalidDirective) else str(error)
+                self.fatal_directive(source_file, directive, error_string, eh.InvalidDirective)
+
+        self.expander.define(directive.macro)
+
+    def run_include(self, source_file: SourceFile, directive: Directive) -> None:
+        header_match: re.Match | None = header_name_pattern.fullmatch(directive.operands)
+        if header_match is None:  # an #include of a macro, the header name is the spelling of its expansion
+            tokens: list[tk.Token] = []
+            self.expander.expand(self.lex_operands(source_file, directive)[:-1], tokens)
+            header_match = header_name_pattern.fullmatch(''.join(mc.get_spelling(token) for token in tokens))
+        if header_match is None:
+            self.fatal_directive(source_file, directive, f"#{directive.name} expects \"FILENAME\" or <FILENAME>",
+                                 eh.InvalidDirective)
+
+        if len(self.include_stack) == MAX_INCLUDE_DEPTH:
+            self.fatal_directive(source_file, directive, f"#include nested depth {MAX_INCLUDE_DEPTH} exceeds maximum",
+                                 eh.InvalidDirective)
+
+        angled: bool = header_match.group(2) is not None
+        name: str = header_match.group(2) if angled else header_match.group(1)
+        # an #include_next searches the paths after the one its file was found in
+        first_search_index: int = self.include_stack[-1].search_index + 1 if directive.name == 'include_next' else -1
+
+        resolved_include: tuple[str, int] | None = self.resolve_include(source_file, name, angled, first_search_index)
+        if resolved_include is None:
+            self.fatal_directive(source_file, directive, f"'{name}' file not found", eh.IncludeFileNotFound)
+        path, search_index = resolved_include
+
+        dependencies: list[str] = self.dependencies.setdefault(source_file.path, [])
+        if path not in dependencies:
+            dependencies.append(path)
+
+        # a file that made nothing the last time is not opened again
+        if path in self.once_paths or self.expander.is_defined(self.include_guards.get(path, '')):
+            self.skipped_includes += 1
+            return
+
+        included_file: SourceFile = get_source_file(path, self.engine)
+        if included_file.include_guard is not None:
+            self.include_guards[path] = included_file.include_guard
+            if self.expander.is_defined(included_file.include_guard):
+                self.skipped_includes += 1
+                return
+
+        self.include_file(included_file, search_index)
+
+    def resolve_include(self, source_file: SourceFile, name: str, angled: bool,
+                        first_search_index: int) -> tuple[str, int] | None:
+        """the path of an #include file and the index of the search path it is in (-1 for its own directory)"""
+        directory: str = os.path.dirname(source_file.path)
+        key: tuple[str, str, bool, int] = (directory, name, angled, first_search_index)
+        if key in self.resolved_includes:
+            return self.resolved_includes[key]
+
+        resolved_include: tuple[str, int] | None = None
+        if os.path.isabs(name):
+            if os.path.isfile(name):
+                resolved_include = (os.path.normpath(name), -1)
+        else:
+            # an #include "..." looks in the directory of its file first
+            if not angled and first_search_index == -1 and os.path.isfile(os.path.join(directory, name)):
+                resolved_include = (os.path.normpath(os.path.join(directory, name)), -1)
+
+            search_index: int = max(first_search_index, 0)
+            while resolved_include is None and search_index < len(self.search_paths):
+                path: str = os.path.join(self.search_paths[search_index], name)
+                if os.path.isfile(path):
+                    resolved_include = (os.path.normpath(path), search_index)
+                search_index += 1
+
+        self.resolved_includes[key] = resolved_include
+        return resolved_include
@@ -0,0 +1,169 @@
+import array
+import bisect
+
+
+class LineIndex:
+    """
+    the offsets of the newlines of a source, made once, so an offset is mapped to its (line, column)
+    and a line to its text with a bisect instead of a scan of the source,
+    the source may be a str or a bytes (or a memory mapped) source, an offset is a byte offset in a bytes source
+    """
+
+    def __init__(self, source: str | bytes):
+        self.source: str | bytes = source
+        self.newlines: array.array = array.array('Q')  # the offset of every '\n' in the source
+
+        newline: str | bytes = '\n' if isinstance(source, str) else b'\n'
+        offset: int = source.find(newline)
+        while offset != -1:
+            self.newlines.append(offset)
+            offset = source.find(newline, offset + 1)
+
+    def apply_edit(self, source: str | bytes, offset: int, removed_length: int, inserted_length: int) -> int:
+        """
+        update the index to the edited source (the removed_length chars at offset were replaced by inserted_length chars),
+        the newlines before the edit are kept, the ones after it are shifted, return the change in the line count
+        """
+        first_newline: int = bisect.bisect_left(self.newlines, offset)
+        last_newline: int = bisect.bisect_left(self.newlines, offset + removed_length)
+        shift: int = inserted_length - removed_length
+
+        newline: str | bytes = '\n' if isinstance(source, str) else b'\n'
+        inserted_newlines: array.array = array.array('Q')
+        newline_offset: int = source.find(newline, offset, offset + inserted_length)
+        while newline_offset != -1:
+            inserted_newlines.append(newline_offset)
+            newline_offset = source.find(newline, newline_offset + 1, offset + inserted_length)
+
+        self.newlines[first_newline:] = inserted_newlines + array.array(
+            'Q', [newline_offset + shift for newline_offset in self.newlines[last_newline:]])
+        self.source = source
+
+        return len(inserted_newlines) - (last_newline - first_newline)
+
+    def get_line_count(self) -> int:
+        return len(self.newlines) + 1
+
+    def get_line(self, offset: int) -> int:
+        """the line of the offset, the first line is 0"""
+        return bisect.bisect_left(self.newlines, offset)
+
+    def get_line_start(self, line: int) -> int:
+        return self.newlines[line - 1] + 1 if line > 0 else 0
+
+    def get_line_end(self, line: int) -> int:
+        """the offset of the '\\n' that ends the line (or the end of the source for the last line)"""
+        return self.newlines[line] if line < len(self.newlines) else len(self.source)
+
+    def get_location(self, offset: int) -> tuple[int, int]:
+        """the (line, column) of the offset, both start from 0"""
+        line: int = self.get_line(offset)
+        return line, offset - self.get_line_start(line)
+
+    def get_line_string(self, line: int) -> str:
+        if line >= self.get_line_count():
+            return ""
+
+        return self.get_source_string(self.get_line_start(line), self.get_line_end(line))
+
+    def get_line_substring_at_index(self, offset: int) -> str:
+        """the text of the line of the offset, right up to the offset"""
+        return self.get_source_string(self.get_line_start(self.get_line(offset)), offset)
+
+    def get_source_string(self, start: int, end: int) -> str:
+        string: str | bytes = self.source[start:end]
+        return string if isinstance(string, str) else string.decode(errors='replace')
+
+
+class OffsetMap:
+    """
+    maps an offset in a spliced source (see splice_lines) back to its offset in the physical source,
+    only the spliced offset of every removed backslash-newline is kept
+    """
+
+    def __init__(self):
+        self.splices: array.array = array.array('Q')
+
+    def to_physical(self, offset: int) -> int:
+        # every splice at or before the offset removed two chars before it
+        return offset + 2 * bisect.bisect_right(self.splices, offset)
+
+
+def splice_lines(source: str) -> tuple[str, OffsetMap | None]:
+    """
+    translation phase 2, every backslash-newline is removed so the lines around it are one line,
+    a source without a splice is returned as it is (no copy) with no offset map
+    """
+    if '\\\n' not in source:
+        return source, None
+
+    lines: list[str] = source.split('\\\n')
+    offset_map: OffsetMap = OffsetMap()
+    offset: int = 0
+    for line in lines[:-1]:
+        offset += len(line)
+        offset_map.splices.append(offset)
+
+    return ''.join(lines), offset_map
+
+
+MAIN_FILE_ID: int = 0  # the file of the lines before the first linemarker
+
+
+class LocationMap:
+    """
+    the locations of a preprocessed source (cc -E output), every linemarker adds an entry (offset, file id, line),
+    the physical line that starts at offset is that line of that file and the lines after it follow it
+    """
+
+    def __init__(self, main_file_name: str):
+        self.file_names: list[str] = [main_file_name]  # file id to its name
+        self.file_ids: dict[str, int] = {main_file_name: MAIN_FILE_ID}
+        self.system_file_ids: set[int] = set()  # the files a linemarker flagged as system headers (flag 3)
+
+        self.offsets: array.array = array.array('Q')
+        self.physical_lines: array.array = array.array('Q')  # the physical line that starts at the entry offset
+        self.entry_file_ids: array.array = array.array('I')
+        self.lines: array.array = array.array('q')  # the first line is 0, like a token line
+
+    def get_file_id(self, file_name: str) -> int:
+        file_id: int | None = self.file_ids.get(file_name)
+        if file_id is None:
+            file_id = len(self.file_names)
+            self.file_ids[file_name] = file_id
+            self.file_names.append(file_name)
+        return file_id
+
+    def get_current_file_id(self) -> int:
+        """the file of the last entry"""
+        return self.entry_file_ids[-1] if self.entry_file_ids else MAIN_FILE_ID
+
+    def add_entry(self, offset: int, physical_line: int, file_name: str | None, line: int, system: bool) -> None:
+        # a linemarker without a file name stays in the current file
+        file_id: int = self.get_current_file_id() if file_name is None else self.get_file_id(file_name)
+        if system:
+            self.system_file_ids.add(file_id)
+
+        self.offsets.append(offset)
+        self.physical_lines.append(physical_line)
+        self.entry_file_ids.append(file_id)
+        self.lines.append(line)
+
+    def get_offset_file_id(self, offset: int) -> int:
+        """the file of the last entry at or before an offset of the preprocessed source"""
+        entry: int = bisect.bisect_right(self.offsets, offset) - 1
+        return self.entry_file_ids[entry] if entry >= 0 else MAIN_FILE_ID
+
+    def get_location(self, physical_line: int) -> tuple[int, int]:
+        """the (file id, line) of a physical line of the preprocessed source"""
+        entry: int = bisect.bisect_right(self.physical_lines, physical_line) - 1
+        if entry < 0:
+            return MAIN_FILE_ID, physical_line
+
+        return self.entry_file_ids[entry], self.lines[entry] + physical_line - self.physical_lines[entry]
+
+    def get_file_name(self, file_id: int) -> str:
+        return self.file_names[file_id]
+
+    def is_system_file(self, file_id: int) -> bool:
+        return file_id in self.system_file_ids
@@ -1,4 +1,8 @@
+import array
 import enum
+from typing import Iterator
+
+import Parser.mtcc_error_handler as eh
 
 
 # note: TK => Token Type
@@ -96,8 +100,16 @@ class TokenKind(enum.Enum):
     QUESTION_MARK = enum.auto()  # ?
     VERTICAL_BAR = enum.auto()  # |
 
+    # Preprocessing operators, only in the replacement list of a macro (see mtcc_macro)
+    HASH = enum.auto()  # #
+    HASH_HASH = enum.auto()  # ##
+
     END = enum.auto()  # End Of Tokens stream token
 
+    # a kind is only equal to itself, so it is hashed by its identity and not by its name (Enum.__hash__ is in Python),
+    # the parser looks token kinds up in its tables for every token
+    __hash__ = object.__hash__
+
 
 # string to keyword dictionary
 string_to_keyword: dict[str, TokenKind] = {
@@ -187,15 +199,223 @@ string_to_separator_or_operator: dict[str, TokenKind] = {
 }
 
 
+NO_SYMBOL: int = -1  # the symbol of a token that is not an identifier or a keyword
+
+
+class SymbolTable:
+    """
+    every identifier and keyword spelling is interned once and gets a small integer symbol,
+    the keywords are interned first, so a symbol below keyword_count is a keyword
+    """
+
+    def __init__(self):
+        self.symbols: dict[str, int] = {}
+        self.byte_symbols: dict[bytes, int] = {}  # the symbols of utf-8 spellings (a MappedLexer source)
+        self.strings: list[str] = []  # symbol to its spelling, every token of the symbol shares this string
+
+        for string in string_to_keyword.keys():
+            self.intern(string)
+        self.keyword_kinds: list[TokenKind] = list(string_to_keyword.values())
+        self.keyword_count: int = len(self.strings)
+
+    def intern(self, string: str) -> int:
+        symbol: int | None = self.symbols.get(string)
+        if symbol is None:
+            symbol = len(self.strings)
+            self.symbols[string] = symbol
+            self.strings.append(string)
+        return symbol
+
+    def intern_bytes(self, string: bytes) -> int:
+        symbol: int | None = self.byte_symbols.get(string)
+        if symbol is None:
+            symbol = self.intern(string.decode())
+            self.byte_symbols[string] = symbol
+        return symbol
+
+    def lookup(self, string: str) -> int:
+        """the symbol of a spelling, without interning it"""
+        return self.symbols.get(string, NO_SYMBOL)
+
+    def get_kind(self, symbol: int) -> TokenKind:
+        return self.keyword_kinds[symbol] if symbol < self.keyword_count else TokenKind.IDENTIFIER
+
+
+symbol_table: SymbolTable = SymbolTable()
+
+
 class Token:
-    def __init__(self, kind: TokenKind, start: int, line: int, string: str):
+    file_id: int = 0  # the file of a token of a preprocessed source (see mtcc_source.LocationMap), only set there
+
+    def __init__(self, kind: TokenKind, start: int, line: int, string: str, symbol: int = NO_SYMBOL):
         self.kind: TokenKind = kind
         self.start: int = start  # the start char index
         self.line: int = line
         self.string: str = string  # the string of the token in the file (for debugging)
+        self.symbol: int = symbol  # the interned identifier or keyword (see SymbolTable)
+        self.index: int = 0  # the index of the token in the token stream
+
+    def to_dict(self):
+        return {
+            self.string,
+        }
+
+
+class SourceToken(Token):
+    """a token that keeps where it is in its source and only makes its string the first time it is read"""
+
+    def __init__(self, kind: TokenKind, start: int, line: int, source: str | bytes, length: int, string: str | None = None,
+                 symbol: int = NO_SYMBOL):
+        self.kind: TokenKind = kind
+        self.start: int = start  # the start char index (a byte index in a bytes source)
+        self.line: int = line
+        self.symbol: int = symbol  # the interned identifier or keyword (see SymbolTable)
+        self.source: str | bytes = source  # a str, bytes or a memory mapped source
+        self.length: int = length  # the length of the token in the source
+        self.__string: str | None = string  # a token which string is not the source text passes it in
         self.index: int = 0  # the index of the token in the token stream
 
+    @property
+    def string(self) -> str:
+        if self.__string is None:
+            string: str | bytes = self.source[self.start:self.start + self.length]
+            self.__string = string if isinstance(string, str) else string.decode()
+        return self.__string
+
+    def detach(self) -> None:
+        """make the string now, so the token no longer reads its source"""
+        self.__string = self.string
+
+
+# a token kind is kept in a token buffer as its index in this list
+token_kinds: list[TokenKind] = list(TokenKind)
+token_kind_to_code: dict[TokenKind, int] = {kind: code for code, kind in enumerate(token_kinds)}
+
+TOKEN_VIEW_CACHE_SIZE: int = 256
+
+
+class TokenView:
+    """a token read out of a token buffer, the string is only made from the source when it is read"""
+    __slots__ = ('buffer', 'kind', 'start', 'line', 'symbol', 'index', 'cached_string')
+
+    def __init__(self, buffer: 'TokenBuffer', index: int):
+        self.buffer: TokenBuffer = buffer
+        self.kind: TokenKind = token_kinds[buffer.kinds[index]]
+        self.start: int = buffer.starts[index]
+        self.line: int = buffer.lines[index]
+        self.symbol: int = buffer.symbols[index]
+        self.index: int = index  # the index of the token in the token buffer
+        self.cached_string: str | None = None
+
+    @property
+    def string(self) -> str:
+        if self.cached_string is None:  # a view kept in the AST is read again and again (typedef names)
+            self.cached_string = self.buffer.get_string(self.index)
+        return self.cached_string
+
     def to_dict(self):
         return {
             self.string,
-        }
\ No newline at end of file
+        }
+
+
+class TokenBuffer:
+    """
+    the tokens of a source kept as columns (struct of arrays) instead of a token object each,
+    the token string is cut from the source when it is read, only a token which string is not
+    the source text (a string literal with its escape sequences decoded, END) keeps its string
+    """
+
+    def __init__(self, source: str | bytes):
+        self.source: str | bytes = source  # a str, bytes or a memory mapped source
+        self.kinds: array.array = array.array('B')
+        self.starts: array.array = array.array('I')
+        self.lines: array.array = array.array('I')
+        self.lengths: array.array = array.array('I')
+        self.symbols: array.array = array.array('i')
+        self.strings: dict[int, str] = {}  # token index to the string of a token that is not the source text
+        self.views: list[TokenView | None] = [None] * TOKEN_VIEW_CACHE_SIZE
+
+    def append(self, token: Token) -> None:
+        if isinstance(token, SourceToken):
+            length: int = token.length
+            if token.kind == TokenKind.STRING_LITERAL:
+                self.strings[len(self.kinds)] = token.string
+        else:
+            length: int = len(token.string)
+            if self.source[token.start:token.start + length] != token.string:
+                self.strings[len(self.kinds)] = token.string
+
+        self.kinds.append(token_kind_to_code[token.kind])
+        self.starts.append(token.start)
+        self.lines.append(token.line)
+        self.lengths.append(length)
+        self.symbols.append(token.symbol)
+
+    def extend(self, tokens: Iterator[Token]) -> None:
+        for token in tokens:
+            self.append(token)
+
+    def get_string(self, index: int) -> str:
+        string: str | None = self.strings.get(index)
+        if string is None:
+            start: int = self.starts[index]
+            string = self.source[start:start + self.lengths[index]]
+            if not isinstance(string, str):
+                string = string.decode()
+        return string
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def __getitem__(self, index: int) -> TokenView:
+        # the parser reads the same few tokens around its index again and again,
+        # so the last views are kept in a small ring instead of made for every read
+        view: TokenView | None = self.views[index % TOKEN_VIEW_CACHE_SIZE]
+        if view is not None and view.index == index:
+            return view
+
+        if index < 0:
+            index += len(self.kinds)
+        if not 0 <= index < len(self.kinds):
+            raise IndexError("token buffer index out of range")
+
+        view = TokenView(self, index)
+        self.views[index % TOKEN_VIEW_CACHE_SIZE] = view
+        return view
+
+
+DEFAULT_TOKEN_WINDOW: int = 4096
+
+
+class TokenStream:
+    """
+    a token stream that pulls tokens from a lexer on demand into a ring buffer of window tokens,
+    it is indexed like the full tokens list, but only the last window tokens can be read back
+    """
+
+    def __init__(self, tokens: Iterator[Token], window: int = DEFAULT_TOKEN_WINDOW):
+        self.tokens: Iterator[Token] = tokens
+        self.window: int = window
+        self.ring: list[Token | None] = [None] * window
+        self.end: int = 0  # the index after the last pulled token
+
+    def pull_token(self) -> None:
+        try:
+            token: Token = next(self.tokens)
+        except StopIteration:
+            raise IndexError("token stream index out of range")
+
+        token.index = self.end
+        self.ring[self.end % self.window] = token
+        self.end += 1
+
+    def __getitem__(self, index: int) -> Token:
+        while index >= self.end:
+            self.pull_token()
+
+        if index < self.end - self.window or index < 0:
+            raise eh.TokenWindowExceeded(
+                f"Token {index} is out of the token window, only the last {self.window} tokens are kept")
+
+        return self.ring[index % self.window]
@@ -0,0 +1,38 @@
+import Parser.mtcc_dependencies
+import pathlib
+import sys
+import tempfile
+import time
+
+translation_units: int = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+headers: int = 40
+
+source: str = pathlib.Path('../AI_generated_example.c').read_text()
+
+with tempfile.TemporaryDirectory() as directory:
+    root: pathlib.Path = pathlib.Path(directory)
+    for header in range(headers):
+        # every header includes two of the ones before it, and has a platform #if that is not taken
+        includes: str = ''.join(f'#include "header_{included}.h"\n' for included in (header // 2, header - 1) if included >= 0)
+        (root / f'header_{header}.h').write_text(f'#ifndef HEADER_{header}_H\n#define HEADER_{header}_H\n{includes}'
+                                                 f'#ifdef OTHER_PLATFORM\n#include "missing.h"\n#endif\n{source}\n#endif\n')
+    main_file_paths: list[str] = []
+    for translation_unit in range(translation_units):
+        main_file_path: pathlib.Path = root / f'unit_{translation_unit}.c'
+        main_file_path.write_text(f'#include "header_{translation_unit % headers}.h"\n'
+                                  f'#include "header_{headers - 1}.h"\n{source}')
+        main_file_paths.append(str(main_file_path))
+
+    print(f"scanning {translation_units} files that include {headers} headers")
+
+    for workers in (1, None):
+        start: float = time.perf_counter()
+        scans = Parser.mtcc_dependencies.scan_files(main_file_paths, workers=workers)
+        elapsed: float = time.perf_counter() - start
+
+        print(f"  {workers or 'all':>3} workers: {elapsed:.3f} sec ({translation_units / elapsed:8.0f} files/sec, "
+              f"{sum(len(scan.files) for scan in scans) / translation_units:.1f} files per translation unit)")
+
+    start = time.perf_counter()
+    Parser.mtcc_dependencies.write_dependencies(scans, str(root / 'graph.json'))
+    print(f"  write the depfiles and the graph: {time.perf_counter() - start:.3f} sec")
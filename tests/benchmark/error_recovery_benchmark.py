@@ -0,0 +1,42 @@
+import Parser.mtcc_lexer
+import Parser.mtcc_parser
+import sys
+import time
+
+functions: int = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+errors: int = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+
+
+def make_source(broken: set[int]) -> str:
+    """functions with a statement each, a broken function misses the operand of its statement"""
+    return ''.join(f'int f{function}(int a, int b) {{\n  int c;\n  c = a * {function} + {"" if function in broken else "b"};\n'
+                   f'  if (c > b) c = c - b; else c = b;\n  return c;\n}}\n' for function in range(functions))
+
+
+def parse(source: str, recover_errors: bool) -> Parser.mtcc_parser.CParser:
+    lexer = Parser.mtcc_lexer.Lexer.from_string(source)
+    lexer.lex()
+    parser = Parser.mtcc_parser.CParser(lexer.tokens, lexer.file_string, recover_errors=recover_errors)
+    parser.peek_translation_unit()
+    return parser
+
+
+broken: set[int] = set(range(0, functions, functions // errors))
+print(f"finding the {len(broken)} errors of {functions} functions (lexing and parsing)")
+
+# fix the first error and parse again, until the source is parsed
+start: float = time.perf_counter()
+fixed: set[int] = set()
+parses: int = 0
+while True:
+    parses += 1
+    try:
+        parse(make_source(broken - fixed), False)
+        break
+    except Exception:
+        fixed.add(min(broken - fixed))
+print(f"  {'parse until no error':<22} {time.perf_counter() - start:.3f} sec ({parses} parses)")
+
+start = time.perf_counter()
+parser: Parser.mtcc_parser.CParser = parse(make_source(broken), True)
+print(f"  {'recover from errors':<22} {time.perf_counter() - start:.3f} sec (1 parse, {len(parser.diagnostics)} errors)")
@@ -0,0 +1,28 @@
+import Parser.mtcc_lexer
+import Parser.mtcc_parser
+import sys
+import time
+
+rows: int = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+repeats: int = 3
+
+# expression dense code: an initializer table and a math kernel
+table: str = 'int table[] = {\n' + ''.join(f'  ({row} * 3 + 1) << 2 | {row} & 255, {row} % 7 == 0 ? -{row} : ~{row},\n'
+                                           for row in range(rows)) + '  0 };\n'
+kernel: str = 'int kernel(int a, int b, int c, int d) {\n  int x;\n  x = 0;\n' + \
+              ''.join(f'  x += (a * {row} + b) * (c - d / {row + 1}) - (a << 1 ^ b >> 2) + (x > c && d < b || a != {row});\n'
+                      for row in range(rows)) + '  return x;\n}\n'
+
+lexer = Parser.mtcc_lexer.Lexer.from_string(table + kernel)
+lexer.lex()
+print(f"parsing an initializer table and a math kernel ({len(lexer.tokens)} tokens, the best of {repeats})")
+
+for precedence_climbing in (False, True):
+    best: float = float('inf')
+    for _ in range(repeats):
+        parser = Parser.mtcc_parser.CParser(lexer.tokens, lexer.file_string, precedence_climbing=precedence_climbing)
+        start: float = time.perf_counter()
+        parser.peek_translation_unit()
+        best = min(best, time.perf_counter() - start)
+    print(f"  {'precedence climbing' if precedence_climbing else 'recursive chain':<20} {best:.3f} sec "
+          f"({len(lexer.tokens) / best:10.0f} tokens/sec)")
@@ -0,0 +1,31 @@
+import Parser.mtcc_lexer
+import pathlib
+import sys
+import tempfile
+import time
+
+scale: int = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+source: str = pathlib.Path('../AI_generated_example.c').read_text()
+
+with tempfile.TemporaryDirectory() as directory:
+    scaled_file_path: pathlib.Path = pathlib.Path(directory) / 'scaled.c'
+    scaled_file_path.write_text(source * scale)
+
+    print(f"lexing AI_generated_example.c scaled {scale}x ({len(source) * scale} chars)")
+    for engine in Parser.mtcc_lexer.LexerEngine:
+        lexer = Parser.mtcc_lexer.Lexer(str(scaled_file_path), engine)
+
+        start: float = time.perf_counter()
+        lexer.lex()
+        elapsed: float = time.perf_counter() - start
+
+        print(f"{engine.name:>16}: {len(lexer.tokens) / elapsed:12.0f} tokens/sec ({elapsed:.3f} sec)")
+
+    # the mapped lexer is timed from the mapping of the file, the other lexers read it in their constructor
+    start: float = time.perf_counter()
+    lexer = Parser.mtcc_lexer.MappedLexer(str(scaled_file_path))
+    lexer.lex()
+    elapsed: float = time.perf_counter() - start
+
+    print(f"{'MAPPED':>16}: {len(lexer.tokens) / elapsed:12.0f} tokens/sec ({elapsed:.3f} sec)")
@@ -0,0 +1,32 @@
+import Parser.mtcc_preprocessor
+import pathlib
+import sys
+import tempfile
+import time
+
+scale: int = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+# a macro-heavy header: constants, constants made of constants, function-like wrappers and pastes
+header: str = ''.join(f'#define CONSTANT_{macro} ({macro} * 4)\n'
+                      f'#define DERIVED_{macro} (CONSTANT_{macro} + CONSTANT_{macro // 2})\n'
+                      f'#define WRAP_{macro}(x, ...) wrap_ ## x(DERIVED_{macro}, #x, __VA_ARGS__)\n'
+                      for macro in range(200))
+uses: str = ''.join(f'int v_{use} = CONSTANT_{use % 200} + DERIVED_{use % 200};\n'
+                    f'WRAP_{use % 200}(call, v_{use}, CONSTANT_{use % 100});\n' for use in range(scale))
+
+with tempfile.TemporaryDirectory() as directory:
+    for uses_scale in (1, 2, 4):
+        main_file_path: pathlib.Path = pathlib.Path(directory) / f'macros_{uses_scale}.c'
+        main_file_path.write_text(header + uses * uses_scale)
+
+        # the file is preprocessed once first (its groups are lexed then), so only the directives and the expansion are timed
+        Parser.mtcc_preprocessor.Preprocessor(str(main_file_path)).preprocess()
+        preprocessor = Parser.mtcc_preprocessor.Preprocessor(str(main_file_path))
+
+        start: float = time.perf_counter()
+        preprocessor.preprocess()
+        elapsed: float = time.perf_counter() - start
+
+        expansions: int = sum(count for _, count in preprocessor.expander.get_expansion_hotspots())
+        print(f"{scale * uses_scale:>8} uses: {expansions:>8} expansions, {len(preprocessor.tokens):>9} tokens "
+              f"in {elapsed:.3f} sec ({len(preprocessor.tokens) / elapsed:10.0f} tokens/sec)")
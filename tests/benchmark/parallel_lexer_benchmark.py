@@ -0,0 +1,33 @@
+import Parser.mtcc_lexer
+import os
+import pathlib
+import sys
+import tempfile
+import time
+
+if __name__ == '__main__':  # the worker processes import this script
+    scale: int = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+
+    source: str = pathlib.Path('../AI_generated_example.c').read_text()
+
+    with tempfile.TemporaryDirectory() as directory:
+        scaled_file_path: pathlib.Path = pathlib.Path(directory) / 'scaled.c'
+        scaled_file_path.write_text(source * scale)
+
+        print(f"lexing AI_generated_example.c scaled {scale}x, {os.cpu_count()} cpus")
+        for engine in [Parser.mtcc_lexer.LexerEngine.CHARACTER, Parser.mtcc_lexer.LexerEngine.MASTER_PATTERN]:
+            lexer = Parser.mtcc_lexer.Lexer(str(scaled_file_path), engine)
+
+            start: float = time.perf_counter()
+            lexer.lex()
+            serial_elapsed: float = time.perf_counter() - start
+
+            print(f"{engine.name:>16}    serial: {serial_elapsed:.3f} sec")
+            for workers in [1, 2, 4, 8]:
+                lexer = Parser.mtcc_lexer.Lexer(str(scaled_file_path), engine)
+
+                start = time.perf_counter()
+                lexer.lex_parallel(workers)
+                elapsed: float = time.perf_counter() - start
+
+                print(f"{engine.name:>16} {workers} workers: {elapsed:.3f} sec (speedup {serial_elapsed / elapsed:.2f}x)")
@@ -0,0 +1,36 @@
+import Parser.mtcc_lexer
+import Parser.mtcc_parser
+import os
+import pathlib
+import sys
+import time
+
+if __name__ == '__main__':  # the worker processes import this script
+    scale: int = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+
+    source: str = pathlib.Path('../AI_generated_example.c').read_text()
+
+    lexer = Parser.mtcc_lexer.Lexer.from_string(source * scale)
+    lexer.lex()
+
+    print(f"parsing AI_generated_example.c scaled {scale}x ({len(lexer.tokens)} tokens), {os.cpu_count()} cpus")
+
+    parser = Parser.mtcc_parser.CParser(lexer.tokens, lexer.file_string)
+    start: float = time.perf_counter()
+    parser.peek_translation_unit()
+    serial_elapsed: float = time.perf_counter() - start
+    print(f"            serial: {serial_elapsed:.3f} sec")
+
+    # the first pass (the function bodies skipped) is not split across the workers
+    parser = Parser.mtcc_parser.CParser(lexer.tokens, lexer.file_string)
+    parser.function_bodies = []
+    start = time.perf_counter()
+    parser.peek_translation_unit()
+    print(f"        first pass: {time.perf_counter() - start:.3f} sec ({len(parser.function_bodies)} function bodies)")
+
+    for workers in [1, 2, 4, 8]:
+        parser = Parser.mtcc_parser.CParser(lexer.tokens, lexer.file_string)
+        start = time.perf_counter()
+        parser.peek_translation_unit_parallel(workers)
+        elapsed: float = time.perf_counter() - start
+        print(f"  {workers} workers parallel: {elapsed:.3f} sec (speedup {serial_elapsed / elapsed:.2f}x)")
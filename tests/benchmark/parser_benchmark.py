@@ -0,0 +1,24 @@
+import Parser.mtcc_lexer
+import Parser.mtcc_parser
+import pathlib
+import sys
+import time
+
+scale: int = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+repeats: int = 3
+
+source: str = pathlib.Path('../AI_generated_example.c').read_text()
+
+lexer = Parser.mtcc_lexer.Lexer.from_string(source * scale)
+lexer.lex()
+
+print(f"parsing AI_generated_example.c scaled {scale}x ({len(lexer.tokens)} tokens, the best of {repeats})")
+
+best: float = float('inf')
+for _ in range(repeats):
+    parser = Parser.mtcc_parser.CParser(lexer.tokens, lexer.file_string)
+    start: float = time.perf_counter()
+    translation_unit = parser.peek_translation_unit()
+    best = min(best, time.perf_counter() - start)
+
+print(f"  {len(translation_unit)} external declarations in {best:.3f} sec ({len(lexer.tokens) / best:10.0f} tokens/sec)")
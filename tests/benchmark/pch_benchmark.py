@@ -0,0 +1,57 @@
+import Parser.mtcc_parser
+import Parser.mtcc_pch
+import Parser.mtcc_preprocessor
+import pathlib
+import sys
+import tempfile
+import time
+
+translation_units: int = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+headers: int = 10
+
+source: str = pathlib.Path('../AI_generated_example.c').read_text()
+
+
+def parse(main_file_path: pathlib.Path, snapshot: Parser.mtcc_pch.Snapshot | None = None) -> int:
+    preprocessor = Parser.mtcc_preprocessor.Preprocessor(str(main_file_path))
+    if snapshot is not None:
+        snapshot.restore_preprocessor(preprocessor)
+    parser = Parser.mtcc_parser.CParser(preprocessor.preprocess(), '', source_files=Parser.mtcc_preprocessor.source_files)
+    if snapshot is not None:
+        snapshot.restore_parser(parser)
+        return len(snapshot.external_declarations) + len(parser.peek_translation_unit())
+    return len(parser.peek_translation_unit())
+
+
+with tempfile.TemporaryDirectory() as directory:
+    root: pathlib.Path = pathlib.Path(directory)
+    # a prelude of headers that every file starts with, the declarations are renamed so the headers do not clash
+    for header in range(headers):
+        (root / f'header_{header}.h').write_text(f'#ifndef HEADER_{header}_H\n#define HEADER_{header}_H\n'
+                                                 f'#define main main_{header}\n{source}\n#undef main\n#endif\n')
+    (root / 'prelude.h').write_text('#pragma once\n' + ''.join(f'#include "header_{header}.h"\n' for header in range(headers)))
+    (root / 'main.c').write_text('#include "prelude.h"\nint count = 1;\n')
+
+    print(f"parsing {translation_units} files that start with a prelude of {headers} headers")
+
+    start: float = time.perf_counter()
+    for _ in range(translation_units):
+        declarations: int = parse(root / 'main.c')
+    full_elapsed: float = (time.perf_counter() - start) / translation_units
+
+    snapshot_path: str = str(root / 'prelude.pch')
+    start = time.perf_counter()
+    Parser.mtcc_pch.save_snapshot(Parser.mtcc_pch.make_snapshot(str(root / 'prelude.h')), snapshot_path)
+    make_elapsed: float = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(translation_units):
+        snapshot = Parser.mtcc_pch.load_snapshot(snapshot_path, str(root / 'prelude.h'))
+        snapshot_declarations: int = parse(root / 'main.c', snapshot)
+    snapshot_elapsed: float = (time.perf_counter() - start) / translation_units
+    assert snapshot_declarations == declarations
+
+    print(f"          make the snapshot: {make_elapsed * 1000:8.2f} ms "
+          f"({pathlib.Path(snapshot_path).stat().st_size} bytes)")
+    print(f"    parse the prelude again: {full_elapsed * 1000:8.2f} ms per file ({declarations} declarations)")
+    print(f"  load the snapshot instead: {snapshot_elapsed * 1000:8.2f} ms per file")
@@ -0,0 +1,29 @@
+import Parser.mtcc_lexer
+import pathlib
+import sys
+import time
+
+scale: int = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+source: str = pathlib.Path('../AI_generated_example.c').read_text()
+
+# a cc -E like source, every copy of the example is a header included from main.c
+preprocessed_source: str = '# 1 "main.c"\n' + ''.join(
+    f'# 1 "header_{copy}.h" 1\n{source}\n# {copy + 2} "main.c" 2\n' for copy in range(scale))
+
+print(f"lexing AI_generated_example.c as {scale} preprocessed headers ({len(preprocessed_source)} chars)")
+for engine in Parser.mtcc_lexer.LexerEngine:
+    lexer = Parser.mtcc_lexer.Lexer.from_string(source * scale, engine)
+
+    start: float = time.perf_counter()
+    lexer.lex()
+    plain_elapsed: float = time.perf_counter() - start
+
+    lexer = Parser.mtcc_lexer.Lexer.from_string(preprocessed_source, engine, preprocessed=True)
+
+    start = time.perf_counter()
+    lexer.lex()
+    elapsed: float = time.perf_counter() - start
+
+    print(f"{engine.name:>16}: {len(lexer.tokens) / elapsed:12.0f} tokens/sec ({elapsed:.3f} sec, "
+          f"{plain_elapsed:.3f} sec without linemarkers, {len(lexer.locations.offsets)} linemarkers)")
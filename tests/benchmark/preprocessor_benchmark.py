@@ -0,0 +1,38 @@
+import Parser.mtcc_preprocessor
+import pathlib
+import sys
+import tempfile
+import time
+
+translation_units: int = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+headers: int = 40
+
+source: str = pathlib.Path('../AI_generated_example.c').read_text()
+
+with tempfile.TemporaryDirectory() as directory:
+    root: pathlib.Path = pathlib.Path(directory)
+    for header in range(headers):
+        # every header includes the ones before it, like a tree of headers that share their base headers
+        includes: str = ''.join(f'#include "header_{included}.h"\n' for included in range(header))
+        (root / f'header_{header}.h').write_text(f'#ifndef HEADER_{header}_H\n#define HEADER_{header}_H\n'
+                                                 f'{includes}{source}\n#endif\n')
+    for translation_unit in range(translation_units):
+        (root / f'unit_{translation_unit}.c').write_text(
+            ''.join(f'#include "header_{header}.h"\n' for header in range(headers)) + source)
+
+    print(f"preprocessing {translation_units} files that include {headers} headers")
+
+    start: float = time.perf_counter()
+    preprocessor = Parser.mtcc_preprocessor.Preprocessor(str(root / 'unit_0.c'))
+    preprocessor.preprocess()
+    cold_elapsed: float = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for translation_unit in range(1, translation_units):
+        preprocessor = Parser.mtcc_preprocessor.Preprocessor(str(root / f'unit_{translation_unit}.c'))
+        preprocessor.preprocess()
+    warm_elapsed: float = (time.perf_counter() - start) / max(translation_units - 1, 1)
+
+    print(f"   first file: {cold_elapsed * 1000:8.2f} ms ({len(preprocessor.tokens)} tokens)")
+    print(f"  other files: {warm_elapsed * 1000:8.2f} ms per file (headers from the cache, "
+          f"{preprocessor.skipped_includes} guarded includes skipped per file)")
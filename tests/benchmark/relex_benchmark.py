@@ -0,0 +1,35 @@
+import Parser.mtcc_lexer
+import pathlib
+import random
+import sys
+import tempfile
+import time
+
+scale: int = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+source: str = pathlib.Path('../AI_generated_example.c').read_text()
+
+random.seed(0)
+
+with tempfile.TemporaryDirectory() as directory:
+    scaled_file_path: pathlib.Path = pathlib.Path(directory) / 'scaled.c'
+    scaled_file_path.write_text(source * scale)
+
+    lexer = Parser.mtcc_lexer.Lexer(str(scaled_file_path))
+
+    start: float = time.perf_counter()
+    lexer.lex()
+    lex_elapsed: float = time.perf_counter() - start
+
+    # type an identifier char into the middle of random identifiers, like keystrokes in an editor
+    identifiers: list[int] = [token.start for token in lexer.tokens if token.kind == Parser.mtcc_lexer.tk.TokenKind.IDENTIFIER]
+    edits: int = 200
+
+    start = time.perf_counter()
+    for _ in range(edits):
+        lexer.relex(random.choice(identifiers) + 1, 0, 'x')
+    relex_elapsed: float = (time.perf_counter() - start) / edits
+
+    print(f"AI_generated_example.c scaled {scale}x, {len(lexer.tokens)} tokens")
+    print(f"  full lex: {lex_elapsed * 1000:10.2f} ms")
+    print(f"     relex: {relex_elapsed * 1000:10.2f} ms per edit")
@@ -0,0 +1,35 @@
+import Parser.mtcc_lexer
+import Parser.mtcc_preprocessor
+import pathlib
+import sys
+import tempfile
+import time
+
+platforms: int = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+
+source: str = pathlib.Path('../AI_generated_example.c').read_text()
+
+with tempfile.TemporaryDirectory() as directory:
+    root: pathlib.Path = pathlib.Path(directory)
+    # a vendor header, a block for every platform and only one of them is active
+    header: str = ''.join(f'#ifdef PLATFORM_{platform}\n{source}\n#endif\n' for platform in range(platforms))
+    header += f'#if 0\n{source}\n#endif\n'
+    (root / 'vendor.h').write_text(header)
+    (root / 'main.c').write_text('#define PLATFORM_0\n#include "vendor.h"\n')
+
+    print(f"preprocessing a header of {len(header)} bytes with {platforms + 1} platform blocks")
+
+    start: float = time.perf_counter()
+    lexer = Parser.mtcc_lexer.Lexer.from_string(header.replace('#', '//'))
+    lexer.lex()
+    lex_elapsed: float = time.perf_counter() - start
+
+    start = time.perf_counter()
+    preprocessor = Parser.mtcc_preprocessor.Preprocessor(str(root / 'main.c'))
+    preprocessor.preprocess()
+    preprocess_elapsed: float = time.perf_counter() - start
+
+    print(f"      lex all of it: {lex_elapsed * 1000:8.2f} ms ({len(lexer.tokens)} tokens)")
+    print(f"  skip the inactive: {preprocess_elapsed * 1000:8.2f} ms ({len(preprocessor.tokens)} tokens, "
+          f"{preprocessor.skipped_bytes} bytes skipped, {preprocessor.lexed_bytes} lexed, "
+          f"ratio {preprocessor.get_skip_ratio():.2f})")
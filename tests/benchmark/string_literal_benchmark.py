@@ -0,0 +1,20 @@
+import Parser.mtcc_lexer
+import pathlib
+import tempfile
+import time
+
+with tempfile.TemporaryDirectory() as directory:
+    literal_file_path: pathlib.Path = pathlib.Path(directory) / 'literal.c'
+
+    print("lexing one string literal of growing length (with an escape sequence every 16 chars)")
+    for kilobytes in [4, 16, 64, 256, 1024]:
+        literal_file_path.write_text('char *s = "' + "ghijklmnopqr\\x41" * (kilobytes * 1024 // 16) + '";\n')
+
+        for engine in Parser.mtcc_lexer.LexerEngine:
+            lexer = Parser.mtcc_lexer.Lexer(str(literal_file_path), engine)
+
+            start: float = time.perf_counter()
+            lexer.lex()
+            elapsed: float = time.perf_counter() - start
+
+            print(f"{kilobytes:6} KiB {engine.name:>16}: {elapsed * 1000:9.2f} ms ({elapsed * 10 ** 6 / kilobytes:7.2f} us/KiB)")
@@ -0,0 +1,40 @@
+import Parser.mtcc_lexer
+import Parser.mtcc_parser
+import pathlib
+import sys
+import tempfile
+import time
+import tracemalloc
+
+scale: int = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+
+source: str = pathlib.Path('../AI_generated_example.c').read_text()
+
+with tempfile.TemporaryDirectory() as directory:
+    scaled_file_path: pathlib.Path = pathlib.Path(directory) / 'scaled.c'
+    scaled_file_path.write_text(source * scale)
+
+    print(f"lexing and parsing AI_generated_example.c scaled {scale}x")
+    for buffered in [False, True]:
+        lexer = Parser.mtcc_lexer.Lexer(str(scaled_file_path))
+
+        tracemalloc.start()
+        start: float = time.perf_counter()
+        if buffered:
+            tokens = lexer.lex_token_buffer()
+        else:
+            lexer.lex()
+            tokens = lexer.tokens
+        lex_elapsed: float = time.perf_counter() - start
+        tokens_memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        parser = Parser.mtcc_parser.CParser(tokens, lexer.file_string)
+
+        start = time.perf_counter()
+        for external_declaration in parser.generate_translation_unit():
+            external_declaration.clear()  # a downstream stage that does not keep the AST
+        parse_elapsed: float = time.perf_counter() - start
+
+        print(f"{'buffer' if buffered else 'list':>7}: {len(tokens)} tokens in {tokens_memory / 2 ** 20:7.1f} MiB, "
+              f"lex {lex_elapsed:.3f} sec, parse {parse_elapsed:.3f} sec")
@@ -0,0 +1,40 @@
+import Parser.mtcc_lexer
+import Parser.mtcc_parser
+import pathlib
+import sys
+import tempfile
+import time
+import tracemalloc
+
+scale: int = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+
+source: str = pathlib.Path('../AI_generated_example.c').read_text()
+
+with tempfile.TemporaryDirectory() as directory:
+    scaled_file_path: pathlib.Path = pathlib.Path(directory) / 'scaled.c'
+    scaled_file_path.write_text(source * scale)
+
+    print(f"parsing AI_generated_example.c scaled {scale}x")
+    for streaming in [False, True]:
+        tracemalloc.start()
+        start: float = time.perf_counter()
+
+        lexer = Parser.mtcc_lexer.Lexer(str(scaled_file_path))
+        if streaming:
+            parser = Parser.mtcc_parser.CParser(lexer.stream_tokens(), lexer.file_string)
+        else:
+            lexer.lex()
+            parser = Parser.mtcc_parser.CParser(lexer.tokens, lexer.file_string)
+
+        first_declaration: float = 0.0
+        for external_declaration in parser.generate_translation_unit():
+            if first_declaration == 0.0:
+                first_declaration = time.perf_counter() - start
+            external_declaration.clear()  # a downstream stage that does not keep the AST
+
+        elapsed: float = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print(f"{'streaming' if streaming else 'list':>10}: first declaration after {first_declaration * 1000:8.2f} ms, "
+              f"total {elapsed:.3f} sec, peak memory {peak / 2 ** 20:.1f} MiB")
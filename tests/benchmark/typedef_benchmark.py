@@ -0,0 +1,29 @@
+import Parser.mtcc_lexer
+import Parser.mtcc_parser
+import sys
+import time
+
+functions: int = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+
+# functions that use typedefs, hide them with their locals and declare typedefs of their own
+body: str = ''.join(f'type_{function} f_{function}(type_0 a, type_1 b) {{ typedef type_2 local_t; local_t c; type_3 d;\n'
+                    f'  {{ int type_0; type_0 = a; d = (type_3)type_0 + c; }} return (type_{function})(a + b + d); }}\n'
+                    for function in range(functions))
+
+for typedef_count in (10, 1000, 10000):
+    typedefs: str = ''.join(f'typedef long type_{typedef};\n' for typedef in range(max(typedef_count, functions)))
+
+    lexer = Parser.mtcc_lexer.Lexer.from_string(typedefs + body)
+    lexer.lex()
+    parser = Parser.mtcc_parser.CParser(lexer.tokens, lexer.file_string)
+    # the typedefs are parsed first, so only the functions (and their typedef lookups) are timed
+    for _ in range(max(typedef_count, functions)):
+        next(parser.generate_translation_unit())
+
+    body_tokens: int = len(lexer.tokens) - parser.index
+    start: float = time.perf_counter()
+    parser.peek_translation_unit()
+    elapsed: float = time.perf_counter() - start
+
+    print(f"{len(parser.typedefs):>6} typedefs: {body_tokens} tokens in {elapsed:.3f} sec "
+          f"({elapsed / body_tokens * 1e6:.2f} us per token)")
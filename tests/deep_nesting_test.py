@@ -0,0 +1,57 @@
+import sys
+
+import Parser.mtcc_c_ast
+import Parser.mtcc_lexer
+import Parser.mtcc_parser
+
+depth: int = sys.getrecursionlimit() * 3  # deeper than the recursion of a recursive descent parser could go
+
+
+def parse(source: str) -> list:
+    lexer = Parser.mtcc_lexer.Lexer.from_string(source)
+    lexer.lex()
+    return Parser.mtcc_parser.CParser(lexer.tokens, lexer.file_string).peek_translation_unit()
+
+
+def get_body(source: str) -> list:
+    return parse(source)[-1].type.compound_statement.statements
+
+
+# a long else if chain, deeply nested blocks and loops are parsed with an explicit stack of statement rules
+else_if = get_body('int f(int x) { if (x == 0) x = 1;' + ''.join(f' else if (x == {i}) x = {i};' for i in range(depth)) +
+                   ' else x = 0; return x; }')[0]
+for _ in range(depth):
+    else_if = else_if.else_
+assert isinstance(else_if.else_, Parser.mtcc_c_ast.CBinaryOp) and else_if.else_.right.value == 0
+
+block = get_body('int f(int x) {' + '{ x = 1; ' * depth + '}' * depth + ' return x; }')[0]
+for _ in range(depth - 1):
+    block = block.statements[1]
+assert block.statements[0].kind == Parser.mtcc_c_ast.CBinaryOpKind.Assignment
+
+loop = get_body('int f(int x) {' + 'while (x) ' * depth + 'x--; return x; }')[0]
+for _ in range(depth):
+    loop = loop.statement
+assert isinstance(loop, Parser.mtcc_c_ast.CUnaryOp)
+
+# and expressions with an explicit stack of operators and parentheses
+sum_ = parse('int x = ' + ' + '.join(['x'] * depth) + ';')[0].initializer
+parentheses = parse('int x = ' + '(' * depth + '-x' + ')' * depth + ';')[0].initializer
+assert parentheses.kind == Parser.mtcc_c_ast.CUnaryOpKind.Minus
+unary = parse('int x = ' + '- (int)' * depth + 'x;')[0].initializer
+ternary = parse('int x = ' + 'x ? x : ' * depth + 'x;')[0].initializer
+calls = parse('int x = ' + 'f(' * depth + 'x' + ')' * depth + ';')[0].initializer
+for _ in range(depth - 1):
+    calls = calls.parameters_type[0]
+assert str(calls.parameters_type[0]) == 'x'
+
+# a deep tree is serialized without recursion too
+for node in (else_if, block, loop, sum_, parentheses, unary, ternary, calls):
+    assert node.to_dict()["node"] == type(node).__name__
+sum_dict: dict = sum_.to_dict()
+for _ in range(depth - 1):
+    assert sum_dict["right"]["token"] == 'x'
+    sum_dict = sum_dict["left"]
+assert sum_dict == {"node": "CIdentifier", "token": 'x'}
+
+print(f"deep nesting: {depth} levels of statements and expressions parsed and serialized")
@@ -0,0 +1,51 @@
+import json
+import os
+import pathlib
+import tempfile
+
+import Parser.mtcc_dependencies
+
+with tempfile.TemporaryDirectory() as directory:
+    root: pathlib.Path = pathlib.Path(directory)
+    (root / 'include').mkdir()
+    (root / 'config.h').write_text('#ifndef CONFIG_H\n#define CONFIG_H\n#define USE_FAST 1\n#define PLATFORM_HEADER "plat form.h"\n#endif\n')
+    (root / 'fast.h').write_text('#include "config.h"\nint fast; @ not C, the text is not lexed\n')
+    (root / 'slow.h').write_text('int slow;\n')
+    (root / 'plat form.h').write_text('#pragma once\n')
+    (root / 'include' / 'common.h').write_text('#include "config.h"\n#if USE_FAST && defined(CONFIG_H)\n#include "fast.h"\n'
+                                               '#else\n#include "slow.h"\n#endif\n#include PLATFORM_HEADER\n')
+    (root / 'main.c').write_text('#include "config.h"\n#include <common.h>\nint main() { return 0; }\n')
+    (root / 'other.c').write_text('#include "slow.h"\n#include "config.h"\n')
+
+    include_paths: list[str] = [str(root / 'include'), str(root)]
+    scans = Parser.mtcc_dependencies.scan_files([str(root / 'main.c'), str(root / 'other.c')], include_paths, workers=1)
+    main_scan, other_scan = scans
+
+    def path(name: str) -> str:
+        return os.path.normpath(root / name)
+
+    # a file is a dependency once (config.h is included three times), an inactive #include is not followed
+    assert main_scan.files == [path('main.c'), path('config.h'), path('include/common.h'), path('fast.h'), path('plat form.h')]
+    assert main_scan.includes[path('include/common.h')] == [path('config.h'), path('fast.h'), path('plat form.h')]
+    assert other_scan.files == [path('other.c'), path('slow.h'), path('config.h')]
+
+    escaped_root: str = str(root).replace(' ', '\\ ')
+    assert Parser.mtcc_dependencies.make_depfile(other_scan) == \
+           f"other.o: \\\n {escaped_root}/other.c \\\n {escaped_root}/slow.h \\\n {escaped_root}/config.h\n" \
+           f"\n{escaped_root}/slow.h:\n\n{escaped_root}/config.h:\n"
+    assert f"{escaped_root}/plat\\ form.h" in Parser.mtcc_dependencies.make_depfile(main_scan, 'build/main.o')
+
+    Parser.mtcc_dependencies.write_dependencies(scans, str(root / 'graph.json'), str(root))
+    graph: dict = json.loads((root / 'graph.json').read_text())
+    assert graph['translation_units'][path('other.c')] == other_scan.files
+    assert graph['includes'][path('main.c')] == [path('config.h'), path('include/common.h')]
+    assert graph['includes'][path('fast.h')] == [path('config.h')]
+    assert (root / 'main.d').read_text().startswith('main.o: \\\n')
+
+    # the parallel scan makes the same scans
+    if __name__ == '__main__':
+        parallel_scans = Parser.mtcc_dependencies.scan_files([str(root / 'main.c'), str(root / 'other.c')] * 4,
+                                                             include_paths, workers=2)
+        assert [scan.files for scan in parallel_scans] == [scan.files for scan in scans] * 4
+
+print(f"dependencies: {len(main_scan.files)} files, {len(graph['includes'])} files with #include")
@@ -2,4 +2,6 @@
 /**/
 /*
 block comment
-*/
\ No newline at end of file
+*/
+/* stars before the ender **/
+int a = 4 / 2; // a division, not a comment
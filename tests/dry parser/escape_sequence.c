@@ -10,4 +10,6 @@
 "\t\n"
 "\v\n"
 "\0\n"
+"\x41\n"
+"\101\n"
 // printf("\\x41\n");   // hexadecimal representation of a character (here 'A')
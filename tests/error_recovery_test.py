@@ -0,0 +1,87 @@
+import pathlib
+import tempfile
+
+import Parser.mtcc_c_ast
+import Parser.mtcc_error_handler as eh
+import Parser.mtcc_lexer
+import Parser.mtcc_parser
+import Parser.mtcc_preprocessor
+
+
+def make_parser(source: str, **options) -> Parser.mtcc_parser.CParser:
+    lexer = Parser.mtcc_lexer.Lexer.from_string(source)
+    lexer.lex()
+    return Parser.mtcc_parser.CParser(lexer.tokens, lexer.file_string, **options)
+
+
+source: str = ("int a = 1 +;\n"
+               "struct s { int x y; int z; };\n"
+               "int f(int p) {\n"
+               "    int q = ;\n"
+               "    p = p * ;\n"
+               "    if (p) { p = 1 } else p = 2;\n"
+               "    while (p +) p--;\n"
+               "    return p;\n"
+               "}\n"
+               "typedef int t;\n"
+               "int g(void) { t v; v = 1; return v }\n"
+               "int h;\n")
+
+# a parse that does not recover stops at the first error
+try:
+    make_parser(source).peek_translation_unit()
+except eh.PrimaryExpressionNotFound as error:
+    assert "MTCC:1:12: Expected a primary expression token" in str(error), str(error)
+else:
+    assert False, "the source was parsed"
+
+# one parse finds every error, a declaration or a statement with an error is a CError in the tree
+parser: Parser.mtcc_parser.CParser = make_parser(source, recover_errors=True)
+translation_unit: list = parser.peek_translation_unit()
+assert [str(error).splitlines()[1] for error in parser.diagnostics] == [
+    "MTCC:1:12: Expected a primary expression token",
+    "MTCC:2:18: A semicolon is needed",
+    "MTCC:4:13: Expected a primary expression token",
+    "MTCC:5:13: Expected a primary expression token",
+    "MTCC:6:20: A semicolon is needed",
+    "MTCC:7:15: Expected a primary expression token",
+    "MTCC:11:36: A semicolon is needed",
+], parser.diagnostics
+assert isinstance(translation_unit[0], Parser.mtcc_c_ast.CError) and translation_unit[0].token.string == ';'
+assert [declarator.identifier.token.string for declarator in translation_unit[2:]] == ['f', 't', 'g', 'h']
+assert isinstance(translation_unit[1].type.members[0][0], Parser.mtcc_c_ast.CError)
+
+body: Parser.mtcc_c_ast.CCompound = translation_unit[2].type.compound_statement
+assert isinstance(body.declarations[0], Parser.mtcc_c_ast.CError)
+assert [type(statement).__name__ for statement in body.statements] == ['CError', 'CIf', 'CError', 'CReturn']
+assert isinstance(body.statements[1].then.statements[0], Parser.mtcc_c_ast.CError)
+assert len(parser.typedefs) == 1 and parser.typedefs.scopes == []
+assert [node.to_dict()["node"] for node in body.statements] == ['CError', 'CIf', 'CError', 'CReturn']
+
+# an error at the token of the last one is caused by it, a missing closing curly brace is one error
+parser = make_parser("int f(void) {\n    int r;\n    r = 1;\n", recover_errors=True)
+assert isinstance(parser.peek_translation_unit()[0], Parser.mtcc_c_ast.CError)
+assert len(parser.diagnostics) == 1
+
+# the parse stops after max_errors errors, the tree is the external declarations before the last error
+parser = make_parser("int a = ;\nint b;\nint c = ;\nint d = ;\nint e;\n", recover_errors=True, max_errors=2)
+translation_unit = parser.peek_translation_unit()
+assert len(parser.diagnostics) == 2
+assert [type(node).__name__ for node in translation_unit] == ['CError', 'CDeclarator']
+
+# a token of a macro (or of a header included twice) is one token object for all its uses,
+# the parse goes on after the declaration of an error at the token it is at, not at another use of the token
+with tempfile.TemporaryDirectory() as directory:
+    root: pathlib.Path = pathlib.Path(directory)
+    (root / 'twice.h').write_text("int e = 1 +\n")
+    (root / 'main.c').write_text("#define T int\nT a = 1 +\nint b;\nint c;\nT d;\n"
+                                 '#include "twice.h"\nint f;\n#include "twice.h"\nint g;\n')
+    preprocessor = Parser.mtcc_preprocessor.Preprocessor(str(root / 'main.c'))
+    parser = Parser.mtcc_parser.CParser(preprocessor.preprocess(), '', source_files=Parser.mtcc_preprocessor.source_files,
+                                        recover_errors=True)
+    translation_unit = parser.peek_translation_unit()
+assert [str(node.identifier) if isinstance(node, Parser.mtcc_c_ast.CDeclarator) else 'error' for node in translation_unit] == \
+       ['error', 'b', 'c', 'd', 'error', 'f', 'error', 'g'], translation_unit
+assert len(parser.diagnostics) == 3
+
+print(f"error recovery: {len(parser.diagnostics)} errors")
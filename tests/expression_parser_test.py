@@ -0,0 +1,54 @@
+import json
+import pathlib
+
+import Parser.mtcc_c_ast
+import Parser.mtcc_lexer
+import Parser.mtcc_parser
+
+
+def parse(source: str, precedence_climbing: bool) -> list:
+    lexer = Parser.mtcc_lexer.Lexer.from_string(source)
+    lexer.lex()
+    parser = Parser.mtcc_parser.CParser(lexer.tokens, lexer.file_string, precedence_climbing=precedence_climbing)
+    return parser.peek_translation_unit()
+
+
+def dump(translation_unit: list) -> str:
+    return json.dumps([node.to_dict() for node in translation_unit])
+
+
+# the precedence climbing parser makes the same trees as the recursive chain
+source: str = 'int a, b, c, d, *p;\n' \
+              'int t[] = { 1 + 2 * 3 - 4 / 5 % 6, 1 << 2 >> 3 < 4 <= 5 > 6 >= 7 == 8 != 9, 1 & 2 ^ 3 | 4 && 5 || 6 };\n' \
+              'int e = sizeof sizeof(int) / (int)p;\n' \
+              'int f() {\n' \
+              '  a = b = c += d -= 1;\n' \
+              '  a = b ? c : d ? a : b;\n' \
+              '  a = b || c ? c : a && b;\n' \
+              '  b ? c : d = a;\n' \
+              '  a = -b * !c + ~d - (int)*p++ * sizeof(int) - sizeof a;\n' \
+              '  a = (b + c) * (d - (a << 1)) / ++b;\n' \
+              '  a <<= b | c & d ^ a == b != c;\n' \
+              '  a = sizeof a * (int)b + ++c - (long)d;\n' \
+              '  a = sizeof(int) ? (int)b : (long)c;\n' \
+              '  b = sizeof sizeof(int) * (long)b + (int)c;\n' \
+              '  return sizeof sizeof(int) * (long)a;\n' \
+              '}\n'
+for checked_source in (source, pathlib.Path('AI_generated_example.c').read_text()):
+    assert dump(parse(checked_source, True)) == dump(parse(checked_source, False))
+
+# a cast may follow the operand of sizeof, ++ or -- (which is not a cast itself)
+cast = parse(source, True)[-2].initializer.right
+assert isinstance(cast, Parser.mtcc_c_ast.CCast), cast
+
+# the operators bind as in C: left associative binary operators, right associative assignments and ?:
+statements = parse(source, True)[-1].type.compound_statement.statements
+assert statements[0].kind == Parser.mtcc_c_ast.CBinaryOpKind.Assignment
+assert statements[0].right.right.kind == Parser.mtcc_c_ast.CBinaryOpKind.AdditionAssignment
+assert isinstance(statements[1].right.false_value, Parser.mtcc_c_ast.CTernaryOp)
+assert isinstance(statements[3].left, Parser.mtcc_c_ast.CTernaryOp)  # (b ? c : d) = a
+addition = parse('int x = 1 - 2 - 3 * 4;', True)[0].initializer
+assert addition.kind == Parser.mtcc_c_ast.CBinaryOpKind.Subtraction and addition.left.kind == addition.kind
+assert addition.right.kind == Parser.mtcc_c_ast.CBinaryOpKind.Multiplication
+
+print(f"expression parser: {len(statements)} statements parsed the same both ways")
@@ -0,0 +1,39 @@
+import Parser.mtcc_lexer
+import Parser.mtcc_token as tk
+import pathlib
+
+for file_path in sorted(pathlib.Path('.').glob('**/*.c')):
+    character_lexer = Parser.mtcc_lexer.Lexer(str(file_path))
+    character_lexer.lex()
+
+    for engine in Parser.mtcc_lexer.LexerEngine:
+        lexer = Parser.mtcc_lexer.Lexer(str(file_path), engine)
+        lexer.lex()
+
+        assert [(token.kind, token.start, token.line, token.string) for token in lexer.tokens] == \
+               [(token.kind, token.start, token.line, token.string) for token in character_lexer.tokens], \
+               f"{engine.name} token stream differs on {file_path}"
+        assert [(comment.start, comment.line, comment.string) for comment in lexer.comments] == \
+               [(comment.start, comment.line, comment.string) for comment in character_lexer.comments], \
+               f"{engine.name} comments differ on {file_path}"
+
+    print(f"{file_path}: {len(character_lexer.tokens)} tokens, all lexer engines agree")
+
+# a non ascii digit is a number in every engine ('²' is numeric but not a decimal, '٣' is an arabic-indic digit)
+source: str = "int x = ² + ٣٤.٥ + 1²;\nint é1 = x² + 一;\n"
+character_lexer = Parser.mtcc_lexer.Lexer.from_string(source)
+character_lexer.lex()
+assert [(token.kind, token.string) for token in character_lexer.tokens
+        if token.kind in (tk.TokenKind.INTEGER_LITERAL, tk.TokenKind.FLOAT_LITERAL)] == \
+       [(tk.TokenKind.INTEGER_LITERAL, '²'), (tk.TokenKind.FLOAT_LITERAL, '٣٤.٥'),
+        (tk.TokenKind.INTEGER_LITERAL, '1²'), (tk.TokenKind.INTEGER_LITERAL, '一')]
+
+for engine in Parser.mtcc_lexer.LexerEngine:
+    lexer = Parser.mtcc_lexer.Lexer.from_string(source, engine)
+    lexer.lex()
+
+    assert [(token.kind, token.start, token.line, token.string) for token in lexer.tokens] == \
+           [(token.kind, token.start, token.line, token.string) for token in character_lexer.tokens], \
+           f"{engine.name} token stream differs on a non ascii source"
+
+print("a non ascii source: all lexer engines agree")
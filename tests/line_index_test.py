@@ -0,0 +1,19 @@
+import Parser.mtcc_source
+import pathlib
+
+for file_path in sorted(pathlib.Path('.').glob('**/*.c')):
+    source: str = file_path.read_text()
+    lines: list[str] = source.split('\n')
+
+    for line_index in [Parser.mtcc_source.LineIndex(source), Parser.mtcc_source.LineIndex(source.encode())]:
+        assert line_index.get_line_count() == len(lines)
+        assert [line_index.get_line_string(line) for line in range(len(lines))] == lines
+        assert line_index.get_line_string(len(lines)) == ""
+
+        for offset in range(len(source) + 1):
+            line: int = source.count('\n', 0, offset)
+            column: int = offset - (source.rfind('\n', 0, offset) + 1)
+            assert line_index.get_location(offset) == (line, column), f"{file_path}: offset {offset}"
+            assert line_index.get_line_substring_at_index(offset) == source[offset - column:offset]
+
+    print(f"{file_path}: {len(lines)} lines, the line index agrees")
@@ -0,0 +1,47 @@
+import Parser.mtcc_error_handler as eh
+import Parser.mtcc_lexer
+import Parser.mtcc_parser
+import Parser.mtcc_source
+
+# a source without a line splice is lexed as it is
+lexer = Parser.mtcc_lexer.Lexer('AI_generated_example.c')
+assert lexer.offset_map is None and lexer.file_string is lexer.physical_file_string
+
+source: str = ("int long_\\\nname = 1;\n"
+               "// a comment \\\nthat goes on\n"
+               "char *s = \"abc\\\ndef\";\n"
+               "int x = long_name\\\n  +\\\n\\\n1;\n")
+
+spliced_source, offset_map = Parser.mtcc_source.splice_lines(source)
+assert spliced_source == source.replace('\\\n', '') and len(offset_map.splices) == 6
+
+for engine in Parser.mtcc_lexer.LexerEngine:
+    lexer = Parser.mtcc_lexer.Lexer.from_string(source, engine)
+    lexer.lex()
+
+    spliced_lexer = Parser.mtcc_lexer.Lexer.from_string(spliced_source, engine)
+    spliced_lexer.lex()
+
+    # the same tokens as the spliced source, moved to where they start in the physical source
+    assert [(token.kind, token.string) for token in lexer.tokens] == \
+           [(token.kind, token.string) for token in spliced_lexer.tokens]
+    assert [comment.string for comment in lexer.comments] == ["// a comment that goes on\n"]
+
+    for token in lexer.tokens[:-1]:
+        assert source[token.start] == token.string[0], f"{token.string} start is not in the physical source"
+        if token.kind != Parser.mtcc_lexer.tk.TokenKind.STRING_LITERAL:
+            assert token.line == source.count('\n', 0, token.start)
+    assert lexer.tokens[-1].start == len(source) and lexer.tokens[-1].line == source.count('\n')
+    assert lexer.comments[0].start == source.index('//') and lexer.comments[0].line == 3
+
+# a diagnostic points at the physical line and column
+lexer = Parser.mtcc_lexer.Lexer.from_string(source)
+lexer.lex()
+parser = Parser.mtcc_parser.CParser(lexer.tokens, lexer.physical_file_string)
+one: int = [token.string for token in lexer.tokens].index('1', 4)
+try:
+    parser.fatal_token(one, "Expected an identifier", eh.TypedefNameNotFound)
+except eh.TypedefNameNotFound as error:
+    assert str(error) == "\nMTCC:10:1: Expected an identifier\n    | 1;\n    | ^", str(error)
+
+print(f"line splices: {len(offset_map.splices)} splices, the tokens start in the physical source")
@@ -0,0 +1,119 @@
+import pathlib
+import tempfile
+
+import Parser.mtcc_error_handler as eh
+import Parser.mtcc_preprocessor
+
+
+def preprocess(source: str) -> Parser.mtcc_preprocessor.Preprocessor:
+    with tempfile.TemporaryDirectory() as directory:
+        main_file_path: pathlib.Path = pathlib.Path(directory) / 'main.c'
+        main_file_path.write_text(source)
+        preprocessor = Parser.mtcc_preprocessor.Preprocessor(str(main_file_path))
+        preprocessor.preprocess()
+        return preprocessor
+
+
+def expand(source: str) -> str:
+    return ' '.join(token.string for token in preprocess(source).tokens[:-1])
+
+
+def expect_error(source: str, raise_exception, error_string: str) -> None:
+    try:
+        preprocess(source)
+    except raise_exception as error:
+        assert error_string in str(error), str(error)
+    else:
+        assert False, f"{source} was preprocessed"
+
+
+# the examples of the C standard (6.10.3.5), the string literals are decoded
+assert expand("#define x 3\n"
+              "#define f(a) f(x * (a))\n"
+              "#undef x\n"
+              "#define x 2\n"
+              "#define g f\n"
+              "#define z z[0]\n"
+              "#define h g(~\n"
+              "#define m(a) a(w)\n"
+              "#define w 0,1\n"
+              "#define t(a) a\n"
+              "#define p() int\n"
+              "#define q(x) x\n"
+              "#define r(x,y) x ## y\n"
+              "#define str(x) # x\n"
+              "f(y+1) + f(f(z)) % t(t(g)(0) + t)(1);\n"
+              "g(x+(3,4)-w) | h 5) & m\n"
+              "(f)^m(m);\n"
+              "p() i[q()] = { q(1), r(2,3), r(4,), r(,5), r(,) };\n"
+              "char c[2][6] = { str(hello), str() };\n") == \
+       "f ( 2 * ( y + 1 ) ) + f ( 2 * ( f ( 2 * ( z [ 0 ] ) ) ) ) % f ( 2 * ( 0 ) ) + t ( 1 ) ; " \
+       "f ( 2 * ( 2 + ( 3 , 4 ) - 0 , 1 ) ) | f ( 2 * ( ~ 5 ) ) & f ( 2 * ( 0 , 1 ) ) ^ m ( 0 , 1 ) ; " \
+       "int i [ ] = { 1 , 23 , 4 , 5 , } ; " \
+       "char c [ 2 ] [ 6 ] = { \"hello\" , \"\" } ;"
+
+assert expand("#define str(s) # s\n"
+              "#define xstr(s) str(s)\n"
+              "#define debug(s, t) printf(\"x\" # s \"= %d, x\" # t \"= %s\", \\\n"
+              " x ## s, x ## t)\n"
+              "#define INCFILE(n) vers ## n\n"
+              "#define glue(a, b) a ## b\n"
+              "#define xglue(a, b) glue(a, b)\n"
+              "#define HIGHLOW \"hello\"\n"
+              "#define LOW LOW \", world\"\n"
+              "debug(1, 2);\n"
+              "fputs(str(strncmp(\"abc\\0d\", \"abc\", '\\n') // this goes away\n"
+              " == 0) str(: x), s);\n"
+              "xstr(INCFILE(2).h)\n"
+              "glue(HIGH, LOW);\n"
+              "xglue(HIGH, LOW)\n") == \
+       "printf ( \"x\" \"1\" \"= %d, x\" \"2\" \"= %s\" , x1 , x2 ) ; " \
+       "fputs ( \"strncmp(\"abc\\0d\", \"abc\", '\\n') == 0\" \": x\" , s ) ; " \
+       "\"vers2.h\" \"hello\" ; \"hello\" \", world\""
+
+assert expand("#define debug(...) fprintf(stderr, __VA_ARGS__)\n"
+              "#define showlist(...) puts(#__VA_ARGS__)\n"
+              "#define report(test, ...) ((test)?puts(#test): printf(__VA_ARGS__))\n"
+              "#define eprintf(format, args...) fprintf(stderr, format, ## args)\n"
+              "debug(\"Flag\");\n"
+              "showlist(The first, second, and third items.);\n"
+              "report(x>y, \"x is %d but y is %d\", x, y);\n"
+              "eprintf(\"a\"); eprintf(\"b\", 1, 2);\n") == \
+       "fprintf ( stderr , \"Flag\" ) ; " \
+       "puts ( \"The first, second, and third items.\" ) ; " \
+       "( ( x > y ) ? puts ( \"x>y\" ) : printf ( \"x is %d but y is %d\" , x , y ) ) ; " \
+       "fprintf ( stderr , \"a\" ) ; fprintf ( stderr , \"b\" , 1 , 2 ) ;"
+
+# the macros are expanded in #if and #include, the operand of 'defined' is not
+assert expand("#define VERSION (0x10 + 2)\n"
+              "#if VERSION == 18 && defined(VERSION) && !defined VERSION_2\n"
+              "int version_18;\n"
+              "#endif\n"
+              "#define FOO (1 / 0)\n"
+              "#if defined(FOO) || FOO\n"
+              "int foo;\n"
+              "#endif\n") == "int version_18 ; int foo ;"
+
+# a macro with nothing to expand in its replacement list shares its tokens, the hotspots are counted
+# (an argument is expanded once, not once for every use of its parameter)
+preprocessor = preprocess("#define SIZE (4 * 1024)\n"
+                          "#define TWICE(x) ((x) + (x))\n"
+                          "#define self self + 1\n"
+                          "int a[SIZE], b[SIZE], c = TWICE(SIZE), d = self;\n")
+macro = preprocessor.expander.macros[Parser.mtcc_preprocessor.tk.symbol_table.lookup('SIZE')]
+assert preprocessor.tokens[3] is macro.body[0] and preprocessor.tokens[12] is macro.body[0]
+assert ' '.join(token.string for token in preprocessor.tokens[:-1]).endswith("d = self + 1 ;")
+assert preprocessor.expander.get_expansion_hotspots() == [('SIZE', 3), ('TWICE', 1), ('self', 1)]
+assert preprocessor.expander.get_expansion_hotspots(1) == [('SIZE', 3)]
+
+expect_error("#define f(a, b) a\nf(1);\n", eh.InvalidMacroInvocation,
+             "main.c:2:1: Macro 'f' requires 2 arguments, but 1 given")
+expect_error("#define f(a) a\nint x = f(1;\n", eh.InvalidMacroInvocation,
+             "main.c:2:9: Unterminated argument list invoking macro 'f'")
+expect_error("#define glue(a, b) a ## b\nglue(+, /);\n", eh.InvalidMacroInvocation,
+             "main.c:2:1: Pasting \"+\" and \"/\" does not give a valid preprocessing token")
+expect_error("#define str(a) # b\n", eh.InvalidDirective, "main.c:1:1: '#' is not followed by a macro parameter")
+expect_error("#define glue(a, b) ## b\n", eh.InvalidDirective, "'##' cannot appear at either end of a macro expansion")
+expect_error("#define f(a, a) a\n", eh.InvalidDirective, "Duplicate parameter 'a' of macro 'f'")
+
+print(f"macro: {len(preprocessor.tokens)} tokens, hotspots {preprocessor.expander.get_expansion_hotspots()}")
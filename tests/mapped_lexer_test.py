@@ -0,0 +1,64 @@
+import Parser.mtcc_lexer
+import Parser.mtcc_parser
+import json
+import pathlib
+import tempfile
+
+for file_path in sorted(pathlib.Path('.').glob('**/*.c')):
+    lexer = Parser.mtcc_lexer.Lexer(str(file_path))
+    lexer.lex()
+
+    mapped_lexer = Parser.mtcc_lexer.MappedLexer(str(file_path))
+    mapped_lexer.lex()
+
+    # the test sources are ascii, so the byte offsets are the char offsets
+    assert [(token.kind, token.start, token.line, token.string) for token in mapped_lexer.tokens] == \
+           [(token.kind, token.start, token.line, token.string) for token in lexer.tokens], \
+           f"mapped token stream differs on {file_path}"
+    assert [(comment.start, comment.line, comment.string) for comment in mapped_lexer.comments] == \
+           [(comment.start, comment.line, comment.string) for comment in lexer.comments], \
+           f"mapped comments differ on {file_path}"
+    assert mapped_lexer.file_string == lexer.file_string
+
+    print(f"{file_path}: {len(mapped_lexer.tokens)} tokens, the mapped lexer agrees")
+
+lexer = Parser.mtcc_lexer.Lexer("AI_generated_example.c")
+lexer.lex()
+parser = Parser.mtcc_parser.CParser(lexer.tokens, lexer.file_string)
+
+mapped_lexer = Parser.mtcc_lexer.MappedLexer("AI_generated_example.c")
+mapped_lexer.lex()
+mapped_parser = Parser.mtcc_parser.CParser(mapped_lexer.tokens, mapped_lexer.source)
+
+assert json.dumps([node.to_dict() for node in mapped_parser.peek_translation_unit()]) == \
+       json.dumps([node.to_dict() for node in parser.peek_translation_unit()])
+
+# the diagnostics read the line straight out of the mapped source
+assert mapped_parser.get_line_string(3) == parser.get_line_string(3)
+assert mapped_parser.get_line_substring_at_index(mapped_lexer.tokens[20].start) == \
+       parser.get_line_substring_at_index(lexer.tokens[20].start)
+
+print("parsing a mapped source gives the same tree")
+
+# a source with a line splice and a preprocessed source are lexed as Lexer lexes them
+with tempfile.TemporaryDirectory() as directory:
+    for source, preprocessed in [("int long_\\\nname = 1;\n// a comment \\\nthat goes on\nint x = long_name\\\n+ 1;\n", False),
+                                 ('# 1 "main.c"\n# 1 "/usr/include/size.h" 1 3 4\ntypedef unsigned long size_t;\n'
+                                  '# 3 "main.c" 2\nsize_t count = 1; // the count\n', True)]:
+        file_path: pathlib.Path = pathlib.Path(directory) / 'main.c'
+        file_path.write_text(source)
+
+        lexer = Parser.mtcc_lexer.Lexer(str(file_path), Parser.mtcc_lexer.LexerEngine.MASTER_PATTERN, preprocessed)
+        lexer.lex()
+        mapped_lexer = Parser.mtcc_lexer.MappedLexer(str(file_path), preprocessed)
+        mapped_lexer.lex()
+
+        assert [(token.kind, token.start, token.line, token.string, token.file_id) for token in mapped_lexer.tokens] == \
+               [(token.kind, token.start, token.line, token.string, token.file_id) for token in lexer.tokens]
+        assert [(comment.start, comment.line, comment.string) for comment in mapped_lexer.comments] == \
+               [(comment.start, comment.line, comment.string) for comment in lexer.comments]
+        assert mapped_lexer.source == lexer.physical_file_string and mapped_lexer.file_string == lexer.file_string
+        if preprocessed:
+            assert mapped_lexer.locations.file_names == lexer.locations.file_names
+
+print("a spliced and a preprocessed mapped source are lexed as Lexer lexes them")
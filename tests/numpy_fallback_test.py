@@ -0,0 +1,27 @@
+import sys
+
+sys.modules['numpy'] = None  # numpy can not be imported, before the lexer imports it
+
+import pathlib
+
+import Parser.mtcc_lexer
+
+assert Parser.mtcc_lexer.numpy is None
+
+# without numpy the vectorized engine is the character engine
+for file_path in sorted(pathlib.Path('.').glob('**/*.c')):
+    character_lexer = Parser.mtcc_lexer.Lexer(str(file_path))
+    character_lexer.lex()
+
+    lexer = Parser.mtcc_lexer.Lexer(str(file_path), Parser.mtcc_lexer.LexerEngine.VECTORIZED)
+    assert lexer.generate_tokens().__name__ == 'generate_character_tokens'
+    lexer.lex()
+
+    assert [(token.kind, token.start, token.line, token.string) for token in lexer.tokens] == \
+           [(token.kind, token.start, token.line, token.string) for token in character_lexer.tokens], \
+           f"VECTORIZED token stream differs on {file_path} without numpy"
+    assert [(comment.start, comment.line, comment.string) for comment in lexer.comments] == \
+           [(comment.start, comment.line, comment.string) for comment in character_lexer.comments], \
+           f"VECTORIZED comments differ on {file_path} without numpy"
+
+    print(f"{file_path}: {len(lexer.tokens)} tokens, the vectorized engine falls back to the character engine")
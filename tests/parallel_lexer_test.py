@@ -0,0 +1,29 @@
+import Parser.mtcc_lexer
+import pathlib
+
+
+def lexed(lexer: Parser.mtcc_lexer.Lexer) -> tuple[list, list]:
+    return ([(token.kind, token.start, token.line, token.string) for token in lexer.tokens],
+            [(comment.start, comment.line, comment.string) for comment in lexer.comments])
+
+
+if __name__ == '__main__':  # the worker processes import this script
+    for file_path in sorted(pathlib.Path('.').glob('**/*.c')):
+        lexer = Parser.mtcc_lexer.Lexer(str(file_path))
+        lexer.lex()
+
+        for chunk_count in [2, 7, 64]:
+            parallel_lexer = Parser.mtcc_lexer.Lexer(str(file_path), Parser.mtcc_lexer.LexerEngine.MASTER_PATTERN)
+            parallel_lexer.lex_parallel(workers=2, chunk_count=chunk_count)
+
+            assert lexed(parallel_lexer) == lexed(lexer), f"{chunk_count} chunks lex differs on {file_path}"
+
+        chunk_starts = [0] + Parser.mtcc_lexer.find_chunk_splits(lexer.file_string, 64)
+        print(f"{file_path}: {len(lexer.tokens)} tokens, the parallel lex agrees ({len(chunk_starts)} chunks)")
+
+    # an unterminated string literal is raised with its index in the whole source
+    try:
+        Parser.mtcc_lexer.Lexer.from_string("int a;\nchar *s = \"abc;\nint b;\n").lex_parallel(workers=2, chunk_count=3)
+        assert False, "an unterminated string literal must raise"
+    except SyntaxError as error:
+        assert str(error) == "An string/char literal ender in needed, file index: 30", str(error)
@@ -0,0 +1,79 @@
+import json
+import pathlib
+import tempfile
+
+import Parser.mtcc_error_handler as eh
+import Parser.mtcc_lexer
+import Parser.mtcc_parser
+import Parser.mtcc_preprocessor
+
+
+def parse(source: str, workers: int | None = None, **options) -> tuple[str, list, Parser.mtcc_parser.CParser]:
+    """the tree and the tags of a serial parse (no workers) or a parallel parse"""
+    lexer = Parser.mtcc_lexer.Lexer.from_string(source)
+    lexer.lex()
+    parser = Parser.mtcc_parser.CParser(lexer.tokens, lexer.file_string, **options)
+    if workers is None:
+        translation_unit = parser.peek_translation_unit()
+    else:
+        translation_unit = parser.peek_translation_unit_parallel(workers, chunk_count=5)
+    return (json.dumps([external_declaration.to_dict() for external_declaration in translation_unit]),
+            [tag.to_dict() for tag in parser.tags], parser)
+
+
+if __name__ == '__main__':  # the worker processes import this script
+    # a typedef of the file scope, hidden by a parameter and by a typedef of a block, a tag of a body before
+    # the tag of the file scope with its name
+    scopes: str = ("typedef int t;\n"
+                   "int f(int t) { t = 1; { typedef char t; t c; } return t; }\n"
+                   "int g(void) { t x; struct inner { int a; } y; x = 1; return x; }\n"
+                   "struct inner { long b; };\n"
+                   "typedef t u;\n"
+                   "u h(u v) { return v; }\n")
+    sources: list[str] = [scopes, pathlib.Path('AI_generated_example.c').read_text() * 3 + scopes]
+
+    for source in sources:
+        serial_tree, serial_tags, _ = parse(source)
+        for workers in [1, 2]:
+            tree, tags, _ = parse(source, workers)
+            assert tree == serial_tree and tags == serial_tags, f"the parse with {workers} workers differs"
+
+    # the tokens and the typedefs of the bodies are the ones of the parser
+    lexer = Parser.mtcc_lexer.Lexer.from_string(scopes)
+    lexer.lex()
+    parser = Parser.mtcc_parser.CParser(lexer.tokens, lexer.file_string)
+    g_declaration = parser.peek_translation_unit_parallel(2, chunk_count=5)[2].type.compound_statement.declarations[0]
+    assert g_declaration.identifier.token is lexer.tokens[g_declaration.identifier.token.index]
+    assert g_declaration.type is parser.typedefs.get(Parser.mtcc_parser.tk.symbol_table.lookup('t'))
+
+    # the tokens of a macro are shared by its uses, the tag of a body is still defined before the one of the file scope
+    with tempfile.TemporaryDirectory() as directory:
+        main_file_path: pathlib.Path = pathlib.Path(directory) / 'main.c'
+        main_file_path.write_text("#define INNER struct inner { int a; }\n"
+                                  "int f(void) { INNER x; return 0; }\n"
+                                  "INNER y;\n"
+                                  "int g(void) { INNER z; return 1; }\n")
+        tags: list = []
+        for workers in [None, 2]:
+            preprocessor = Parser.mtcc_preprocessor.Preprocessor(str(main_file_path))
+            parser = Parser.mtcc_parser.CParser(preprocessor.preprocess(), '',
+                                                source_files=Parser.mtcc_preprocessor.source_files)
+            translation_unit = parser.peek_translation_unit() if workers is None else \
+                parser.peek_translation_unit_parallel(workers, chunk_count=2)
+            tags.append(list(parser.tags))
+            assert tags[-1][0] is translation_unit[0].type.compound_statement.declarations[0].type
+        assert [tag.to_dict() for tag in tags[0]] == [tag.to_dict() for tag in tags[1]]
+
+    # an error of a body is raised as the serial parse raises it
+    try:
+        parse("int a;\nint f(void) { return 1 +; }\nint g(void) { return; }\n", 2)
+    except eh.PrimaryExpressionNotFound as error:
+        assert "MTCC:2:25: Expected a primary expression token" in str(error), str(error)
+    else:
+        assert False, "the body with an error was parsed"
+
+    # a parse that recovers from its errors has the errors of the serial parse
+    _, _, parser = parse("int a = ;\nint f(void) { return 1 +; }\nint g(void) { return; }\n", 2, recover_errors=True)
+    assert len(parser.diagnostics) == 2
+
+    print(f"parallel parser: {len(sources)} sources, the parallel parse agrees")
@@ -0,0 +1,77 @@
+import os
+import pathlib
+import subprocess
+import sys
+import tempfile
+
+import Parser.mtcc_c_ast
+import Parser.mtcc_parser
+import Parser.mtcc_pch
+import Parser.mtcc_preprocessor
+import Parser.mtcc_token
+
+
+def parse_with_snapshot(main_file_path: pathlib.Path, snapshot: Parser.mtcc_pch.Snapshot) -> list:
+    preprocessor = Parser.mtcc_preprocessor.Preprocessor(str(main_file_path))
+    snapshot.restore_preprocessor(preprocessor)
+    parser = Parser.mtcc_parser.CParser(preprocessor.preprocess(), '', source_files=Parser.mtcc_preprocessor.source_files)
+    snapshot.restore_parser(parser)
+    return snapshot.external_declarations + parser.peek_translation_unit()
+
+
+with tempfile.TemporaryDirectory() as directory:
+    root: pathlib.Path = pathlib.Path(directory)
+    (root / 'types.h').write_text('#pragma once\ntypedef unsigned long size_type;\n')
+    (root / 'prelude.h').write_text('#ifndef PRELUDE_H\n#define PRELUDE_H\n#include "types.h"\n'
+                                    '#define MAX_SIZE ((size_type)1 << 16)\n#define CLAMP(x) ((x) > MAX_SIZE ? MAX_SIZE : (x))\n'
+                                    'struct point { int x; int y; };\nenum color { RED, GREEN };\n'
+                                    'typedef struct point point_t;\nsize_type clamp(size_type size);\n#endif\n')
+    (root / 'main.c').write_text('#include "prelude.h"\npoint_t origin;\nsize_type limit = CLAMP(70000);\n')
+    prelude_path: str = str(root / 'prelude.h')
+    snapshot_path: str = str(root / 'prelude.pch')
+
+    # the snapshot is made (and saved) the first time, then it is read from its file
+    snapshot = Parser.mtcc_pch.get_snapshot(snapshot_path, prelude_path)
+    assert pathlib.Path(snapshot_path).read_bytes().startswith(Parser.mtcc_pch.PCH_MAGIC)
+    snapshot = Parser.mtcc_pch.load_snapshot(snapshot_path, prelude_path)
+    assert snapshot is not None
+    assert sorted(pathlib.Path(path).name for _, path, _ in snapshot.headers) == ['prelude.h', 'types.h']
+    assert sorted(macro.name for macro in snapshot.macros) == ['CLAMP', 'MAX_SIZE', 'PRELUDE_H']
+    assert all(macro.symbol == Parser.mtcc_token.symbol_table.lookup(macro.name) for macro in snapshot.macros)
+    assert sorted(str(tag.identifier) for tag in snapshot.tags) == ['color', 'point']
+
+    # the prelude is skipped (its include guard is defined) and its typedefs are known to the parser
+    translation_unit: list = parse_with_snapshot(root / 'main.c', snapshot)
+    assert [str(declarator.identifier) for declarator in translation_unit
+            if isinstance(declarator.identifier, Parser.mtcc_c_ast.CIdentifier)] == \
+           ['size_type', 'point_t', 'clamp', 'origin', 'limit']
+    typedef_token = snapshot.typedefs[0].declarator.identifier.token
+    assert Parser.mtcc_preprocessor.source_files[typedef_token.file_id].path == os.path.normpath(root / 'types.h')
+
+    # another process interns the symbols in another order, the snapshot is read with its symbols
+    code: str = ('import Parser.mtcc_token, Parser.mtcc_pch, sys\n'
+                 'Parser.mtcc_token.symbol_table.intern("a_symbol_first")\n'
+                 'snapshot = Parser.mtcc_pch.load_snapshot(sys.argv[1], sys.argv[2])\n'
+                 'print(sorted(str(typedef.declarator.identifier) for typedef in snapshot.typedefs))\n'
+                 'print(all(typedef.declarator.identifier.symbol == Parser.mtcc_token.symbol_table.lookup('
+                 'str(typedef.declarator.identifier)) for typedef in snapshot.typedefs))\n')
+    result = subprocess.run([sys.executable, '-c', code, snapshot_path, prelude_path], capture_output=True, text=True,
+                            env=dict(os.environ, PYTHONPATH=str(pathlib.Path(__file__).resolve().parent.parent)))
+    assert result.stdout == "['point_t', 'size_type']\nTrue\n", result.stdout + result.stderr
+
+    # a changed header, another prelude or another version makes the snapshot not valid
+    (root / 'types.h').write_text('#pragma once\ntypedef unsigned int size_type;\n')
+    assert Parser.mtcc_pch.load_snapshot(snapshot_path, prelude_path) is None
+    assert Parser.mtcc_pch.load_snapshot(snapshot_path, str(root / 'main.c')) is None
+    old_hashes: dict = {path: content_hash for _, path, content_hash in snapshot.headers}
+    snapshot = Parser.mtcc_pch.get_snapshot(snapshot_path, prelude_path)
+    assert Parser.mtcc_pch.load_snapshot(snapshot_path, prelude_path) is not None
+    assert {path: content_hash for _, path, content_hash in snapshot.headers} != old_hashes
+
+    data: bytearray = bytearray(pathlib.Path(snapshot_path).read_bytes())
+    data[len(Parser.mtcc_pch.PCH_MAGIC)] += 1
+    pathlib.Path(snapshot_path).write_bytes(bytes(data))
+    assert Parser.mtcc_pch.load_snapshot(snapshot_path, prelude_path) is None
+    assert Parser.mtcc_pch.load_snapshot(str(root / 'missing.pch'), prelude_path) is None
+
+print(f"pch: {len(snapshot.headers)} headers, {len(snapshot.macros)} macros, {len(snapshot.typedefs)} typedefs")
@@ -0,0 +1,80 @@
+import Parser.mtcc_error_handler as eh
+import Parser.mtcc_lexer
+import Parser.mtcc_parser
+
+# a cc -E output, the linemarkers tell the file and line of the lines after them (flag 1 enters a file,
+# 2 returns to it and 3 is a system header)
+source: str = ('# 1 "main.c"\n'
+               '# 1 "<built-in>"\n'
+               '# 1 "main.c"\n'
+               '# 1 "/usr/include/size.h" 1 3 4\n'
+               'typedef unsigned long size_t;\n'
+               '# 3 "main.c" 2\n'
+               '\n'
+               '  # pragma pack(1)\n'
+               'size_t count = 1; // the count\n'
+               '#line 20\n'
+               'int x = count + 2;\n')
+marked_source: str = 'int a; /* in main */\n# 1 "sys.h" 1 3\nint b; // in sys.h\n# 2 "<string>" 2\n'
+
+for engine in Parser.mtcc_lexer.LexerEngine:
+    lexer = Parser.mtcc_lexer.Lexer.from_string(source, engine, preprocessed=True)
+    lexer.lex()
+
+    # the directive lines make no tokens, the token lines are still the lines of the preprocessed source
+    assert [token.string for token in lexer.tokens[:5]] == ['typedef', 'unsigned', 'long', 'size_t', ';']
+    assert lexer.tokens[5].string == 'size_t' and lexer.tokens[5].line == 8
+
+    locations = lexer.locations
+    assert locations.file_names == ["<string>", "main.c", "<built-in>", "/usr/include/size.h"]
+    assert [locations.get_file_name(token.file_id) for token in (lexer.tokens[0], lexer.tokens[5])] == \
+           ["/usr/include/size.h", "main.c"]
+    assert locations.is_system_file(lexer.tokens[0].file_id) and not locations.is_system_file(lexer.tokens[5].file_id)
+    assert lexer.comments[0].file_id == lexer.tokens[5].file_id
+
+    assert locations.get_location(4) == (lexer.tokens[0].file_id, 0)
+    assert locations.get_location(8) == (lexer.tokens[5].file_id, 4)
+    assert locations.get_location(10) == (lexer.tokens[5].file_id, 19)  # a #line with no file name stays in main.c
+
+    # a comment is in the file it is in, not in the file of a linemarker between it and the next token
+    marked_lexer = Parser.mtcc_lexer.Lexer.from_string(marked_source, engine, preprocessed=True)
+    marked_lexer.lex()
+    assert [marked_lexer.locations.get_file_name(comment.file_id) for comment in marked_lexer.comments] == \
+           ["<string>", "sys.h"]
+    assert [marked_lexer.locations.get_file_name(token.file_id) for token in marked_lexer.tokens[:6]] == \
+           ["<string>"] * 3 + ["sys.h"] * 3
+
+    # a '#' that is not the first char of its line is not a directive
+    try:
+        Parser.mtcc_lexer.Lexer.from_string('int x; # 1 "a.h"\n', engine, preprocessed=True).lex()
+    except SyntaxError as error:
+        assert str(error) == "Unexpected character: #, file index: 7", str(error)
+    else:
+        assert False, "a '#' inside a line was lexed"
+
+# a diagnostic of a preprocessed source reports the file and line of the token, not the preprocessed line
+lexer = Parser.mtcc_lexer.Lexer.from_string(source, preprocessed=True)
+lexer.lex()
+parser = Parser.mtcc_parser.CParser(lexer.tokens, lexer.physical_file_string, locations=lexer.locations)
+two: int = [token.string for token in lexer.tokens].index('2')
+try:
+    parser.fatal_token(two, "Expected an identifier", eh.TypedefNameNotFound)
+except eh.TypedefNameNotFound as error:
+    assert str(error) == "\nMTCC:main.c:20:17: Expected an identifier\n    | int x = count + 2;\n    |                 ^", \
+        str(error)
+
+# the parallel lex makes the same linemarkers and the same token files
+if __name__ == '__main__':
+    lexer = Parser.mtcc_lexer.Lexer.from_string((source + marked_source) * 4, preprocessed=True)
+    lexer.lex()
+    parallel_lexer = Parser.mtcc_lexer.Lexer.from_string((source + marked_source) * 4, preprocessed=True)
+    parallel_lexer.lex_parallel(2, 6)
+
+    assert [(token.start, token.file_id) for token in parallel_lexer.tokens] == \
+           [(token.start, token.file_id) for token in lexer.tokens]
+    assert [(comment.start, comment.file_id) for comment in parallel_lexer.comments] == \
+           [(comment.start, comment.file_id) for comment in lexer.comments]
+    assert list(parallel_lexer.locations.offsets) == list(lexer.locations.offsets)
+    assert parallel_lexer.locations.file_names == lexer.locations.file_names
+
+    print(f"preprocessed: {len(lexer.locations.offsets)} linemarkers in {len(lexer.locations.file_names)} files")
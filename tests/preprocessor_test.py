@@ -0,0 +1,99 @@
+import os
+import pathlib
+import tempfile
+
+import Parser.mtcc_error_handler as eh
+import Parser.mtcc_parser
+import Parser.mtcc_preprocessor
+
+
+def preprocess(main_file_path: pathlib.Path, **paths) -> Parser.mtcc_preprocessor.Preprocessor:
+    preprocessor = Parser.mtcc_preprocessor.Preprocessor(str(main_file_path), **paths)
+    preprocessor.preprocess()
+    return preprocessor
+
+
+def expect_error(main_file_path: pathlib.Path, raise_exception, error_string: str) -> None:
+    try:
+        preprocess(main_file_path)
+    except raise_exception as error:
+        assert error_string in str(error), str(error)
+    else:
+        assert False, f"{main_file_path.name} was preprocessed"
+
+
+with tempfile.TemporaryDirectory() as directory:
+    root: pathlib.Path = pathlib.Path(directory)
+    (root / 'include').mkdir()
+    (root / 'system').mkdir()
+
+    (root / 'guarded.h').write_text("#ifndef GUARDED_H\n#define GUARDED_H\ntypedef int guarded_t;\n#endif /* GUARDED_H */\n")
+    (root / 'once.h').write_text("#pragma once\ntypedef char once_t;\n")
+    (root / 'include' / 'path.h').write_text("#if !defined(PATH_H)\n#define PATH_H\n#include_next <path.h>\n"
+                                             "typedef long path_t;\n#endif\n")
+    (root / 'system' / 'path.h').write_text("typedef char system_path_t;\n")
+    (root / 'main.c').write_text('#include "guarded.h"\n'
+                                 '#include "guarded.h"\n'
+                                 '# include "once.h" // once\n'
+                                 '#include "once.h"\n'
+                                 '#include <path.h>\n'
+                                 '#define LEVEL 2\n'
+                                 '#if defined LEVEL && (0x10 >> 4) * 2 == 2UL && !defined(OTHER)\n'
+                                 'int a;\n'
+                                 '#  ifdef OTHER\n'
+                                 'int b;\n'
+                                 '#  endif\n'
+                                 '#elif 1 / 0\n'
+                                 'int c;\n'
+                                 '#else\n'
+                                 'int d;\n'
+                                 '#endif\n'
+                                 '#undef LEVEL\n'
+                                 '#ifndef LEVEL\n'
+                                 'guarded_t e;\n'
+                                 '#endif\n')
+
+    paths: dict = {'include_paths': [str(root / 'include')], 'system_include_paths': [str(root / 'system')]}
+    preprocessor = preprocess(root / 'main.c', **paths)
+    assert [token.string for token in preprocessor.tokens] == \
+           ['typedef', 'int', 'guarded_t', ';', 'typedef', 'char', 'once_t', ';',
+            'typedef', 'char', 'system_path_t', ';', 'typedef', 'long', 'path_t', ';',
+            'int', 'a', ';', 'guarded_t', 'e', ';', '\0']
+    assert preprocessor.skipped_includes == 2  # the second guarded.h and once.h are not opened again
+    assert {macro.name for macro in preprocessor.expander.macros.values()} == {'GUARDED_H', 'PATH_H'}
+
+    source_files = Parser.mtcc_preprocessor.source_files
+    assert source_files[preprocessor.tokens[0].file_id].path == os.path.normpath(root / 'guarded.h')
+    assert Parser.mtcc_preprocessor.get_source_file(os.path.normpath(root / 'guarded.h')).include_guard == 'GUARDED_H'
+    assert Parser.mtcc_preprocessor.get_source_file(os.path.normpath(root / 'once.h')).include_guard is None
+
+    # a diagnostic of a token points into the file the token came from
+    parser = Parser.mtcc_parser.CParser(preprocessor.tokens, '', source_files=source_files)
+    try:
+        parser.fatal_token(14, "Expected an identifier", eh.TypedefNameNotFound)
+    except eh.TypedefNameNotFound as error:
+        assert str(error) == f"\nMTCC:{os.path.normpath(root / 'include' / 'path.h')}:4:14: Expected an identifier\n" \
+                             f"    | typedef long path_t;\n    |              ^~~~~~", str(error)
+    assert len(parser.peek_translation_unit()) == 6
+
+    # the files are cached, a changed file is lexed again
+    guarded_file = source_files[preprocessor.tokens[0].file_id]
+    assert preprocess(root / 'main.c', **paths).tokens[0] is guarded_file.get_group_tokens(2)[0]
+    (root / 'guarded.h').write_text("#ifndef GUARDED_H\n#define GUARDED_H\ntypedef unsigned guarded_t;\n#endif\n")
+    assert preprocess(root / 'main.c', **paths).tokens[1].string == 'unsigned'
+
+    (root / 'missing.c').write_text('int x;\n#include "missing.h"\n')
+    expect_error(root / 'missing.c', eh.IncludeFileNotFound, "missing.c:2:1: 'missing.h' file not found")
+    (root / 'else.c').write_text('#if 1\n#else\n#else\n#endif\n')
+    expect_error(root / 'else.c', eh.InvalidDirective, "else.c:3:1: #else after #else")
+    (root / 'endif.c').write_text('#endif\n')
+    expect_error(root / 'endif.c', eh.InvalidDirective, "endif.c:1:1: #endif without #if")
+    (root / 'unterminated.h').write_text('#ifdef X\n')
+    (root / 'unterminated.c').write_text('#include "unterminated.h"\n#endif\n')
+    expect_error(root / 'unterminated.c', eh.InvalidDirective, "unterminated.h:1:1: Unterminated #ifdef")
+    (root / 'error.c').write_text('#if 2 > 1\n#error two is more\n#endif\n')
+    expect_error(root / 'error.c', eh.InvalidDirective, "error.c:2:1: #error two is more")
+    (root / 'recursive.h').write_text('#include "recursive.h"\n')
+    expect_error(root / 'recursive.h', eh.InvalidDirective, "nested depth 200 exceeds maximum")
+
+print(f"preprocessor: {len(preprocessor.tokens)} tokens, {preprocessor.skipped_includes} includes skipped")
@@ -0,0 +1,49 @@
+import Parser.mtcc_lexer
+import pathlib
+import random
+import tempfile
+
+random.seed(0)
+
+insertions: list[str] = ['a', ' ', '\n', '/', '*', '/*', '*/', '//', '"', "'", '1', '.', '-', '=', '>>', 'int ', '(', ';']
+
+source: str = pathlib.Path('AI_generated_example.c').read_text()
+
+with tempfile.TemporaryDirectory() as directory:
+    edited_file_path: pathlib.Path = pathlib.Path(directory) / 'edited.c'
+    edited_file_path.write_text(source)
+
+    lexer = Parser.mtcc_lexer.Lexer(str(edited_file_path))
+    lexer.lex()
+
+    relexed: int = 0
+    for _ in range(500):
+        text: str = lexer.file_string[:-1]  # without the END_OF_FILE char
+        offset: int = random.randint(0, len(text))
+        removed_length: int = random.randint(0, min(4, len(text) - offset))
+        inserted_text: str = ''.join(random.choice(insertions) for _ in range(random.randint(0, 3)))
+
+        edited_file_path.write_text(text[:offset] + inserted_text + text[offset + removed_length:])
+        fresh_lexer = Parser.mtcc_lexer.Lexer(str(edited_file_path))
+        try:
+            fresh_lexer.lex()
+        except SyntaxError:  # an edit that does not lex (an unterminated literal) is undone by relex
+            try:
+                lexer.relex(offset, removed_length, inserted_text)
+                assert False, "relex of an edit that does not lex must raise"
+            except SyntaxError:
+                assert lexer.file_string[:-1] == text
+            continue
+
+        relexed_tokens: range = lexer.relex(offset, removed_length, inserted_text)
+        relexed += len(relexed_tokens)
+
+        assert lexer.file_string == fresh_lexer.file_string
+        assert [(token.kind, token.start, token.line, token.string) for token in lexer.tokens] == \
+               [(token.kind, token.start, token.line, token.string) for token in fresh_lexer.tokens], \
+               f"relex differs from a fresh lex, edit: {offset}, {removed_length}, {inserted_text!r}"
+        assert [(comment.start, comment.line, comment.string) for comment in lexer.comments] == \
+               [(comment.start, comment.line, comment.string) for comment in fresh_lexer.comments], \
+               f"relex comments differ from a fresh lex, edit: {offset}, {removed_length}, {inserted_text!r}"
+
+print(f"relex: every edit matches a fresh lex, {relexed} tokens lexed again in total")
@@ -0,0 +1,53 @@
+import pathlib
+
+import Parser.mtcc_c_ast
+import Parser.mtcc_lexer
+import Parser.mtcc_parser
+
+
+def parse(source: str, precedence_climbing: bool = True) -> Parser.mtcc_parser.CParser:
+    lexer = Parser.mtcc_lexer.Lexer.from_string(source)
+    lexer.lex()
+    parser = Parser.mtcc_parser.CParser(lexer.tokens, lexer.file_string, count_reparses=True,
+                                        precedence_climbing=precedence_climbing)
+    parser.peek_translation_unit()
+    return parser
+
+
+def nested(depth: int) -> str:
+    return 'int x, y = ' + '(' * depth + '(int)x + sizeof (x) * (y)++' + ')' * depth + ';'
+
+
+# no rule parses the tokens it already parsed: a ( that is not of a cast or a sizeof type is not peeked again
+parser: Parser.mtcc_parser.CParser = parse(pathlib.Path('AI_generated_example.c').read_text())
+assert parser.reparse_counts == {}, parser.reparse_counts
+assert parser.rule_counts['peek_external_declaration'] == 8
+
+# deeply nested parentheses are parsed in linear time, every level parses the same rules once
+# (the recursive chain, precedence climbing parses a parenthesis in its loop and not by a rule),
+# its rules recurse for every level, so the depths are kept under the recursion limit
+rule_counts: list[int] = []
+for depth in (0, 10, 20):
+    parser = parse(nested(depth), precedence_climbing=False)
+    assert parser.reparse_counts == {}, parser.reparse_counts
+    rule_counts.append(sum(parser.rule_counts.values()))
+assert rule_counts[2] - rule_counts[1] == rule_counts[1] - rule_counts[0] > 0, rule_counts
+
+# precedence climbing parses the same rules at every depth
+climbing_rule_counts: list[int] = []
+for depth in (0, 25, 50):
+    parser = parse(nested(depth))
+    assert parser.reparse_counts == {}, parser.reparse_counts
+    climbing_rule_counts.append(sum(parser.rule_counts.values()))
+assert climbing_rule_counts[0] == climbing_rule_counts[1] == climbing_rule_counts[2] > 0, climbing_rule_counts
+
+# the trees are the same as the ones of a parser without counting
+lexer = Parser.mtcc_lexer.Lexer.from_string(nested(2))
+lexer.lex()
+expression = Parser.mtcc_parser.CParser(lexer.tokens, lexer.file_string).peek_translation_unit()[1].initializer
+assert isinstance(expression.left, Parser.mtcc_c_ast.CCast)
+assert expression.right.kind == Parser.mtcc_c_ast.CBinaryOpKind.Multiplication
+assert expression.right.left.kind == Parser.mtcc_c_ast.CUnaryOpKind.Sizeof
+assert expression.right.right.kind == Parser.mtcc_c_ast.CUnaryOpKind.PostIncrease
+
+print(f"reparse: {rule_counts[2] - rule_counts[1]} rules parsed for every 10 nested parentheses, no reparse")
@@ -0,0 +1,46 @@
+import pathlib
+import tempfile
+
+import Parser.mtcc_preprocessor
+
+# a '#' in a comment, a literal or inside a line is not a directive, a line splice and a block comment make a directive longer
+source: str = ('#define A 1 /* a comment\n'
+               '   that ends here */ + 2\n'
+               'char *s = "# not a directive", c = \'#\'; // # nor this\n'
+               '/* # nor\n'
+               '# this */ int x; # y\n'
+               '  #  if A \\\n'
+               '  > 1\n'
+               '#endif')
+directive_lines: list[tuple[int, int]] = Parser.mtcc_preprocessor.scan_directive_lines(source)
+assert [source[start:end] for start, end in directive_lines] == \
+       ['#define A 1 /* a comment\n   that ends here */ + 2', '#  if A \\\n  > 1', '#endif']
+
+with tempfile.TemporaryDirectory() as directory:
+    main_file_path: pathlib.Path = pathlib.Path(directory) / 'main.c'
+    # the inactive groups are not lexed, so the text in them does not have to be tokens (@, ` and a lone ')
+    main_file_path.write_text('int a;\n'
+                              '#if 0\n'
+                              "don't @ ` lex \"this\n"
+                              '# error not run\n'
+                              '#elif defined(B)\n'
+                              'int b;\n'
+                              '#else\n'
+                              'int c;\n'
+                              '#ifdef C\n'
+                              'int d; ' + '@' * 72 + '\n'
+                              + '#endif\n'
+                              '#endif\n'
+                              'int e;\n')
+    preprocessor = Parser.mtcc_preprocessor.Preprocessor(str(main_file_path))
+    preprocessor.preprocess()
+    assert ' '.join(token.string for token in preprocessor.tokens[:-1]) == "int a ; int c ; int e ;"
+    assert [token.line for token in preprocessor.tokens[:-1:3]] == [0, 7, 12]
+
+    main_file = Parser.mtcc_preprocessor.get_source_file(str(main_file_path))
+    assert [tokens is not None for tokens in main_file.group_tokens] == [True, False, False, False, True, False, True, True]
+    assert preprocessor.skipped_bytes == len("\ndon't @ ` lex \"this\n" "\n" "\nint b;\n" "\nint d; \n") + 72
+    assert preprocessor.lexed_bytes == len("int a;\n" "\nint c;\n" "\n" "\nint e;\n")
+    assert preprocessor.get_skip_ratio() > 4
+
+print(f"skip scanner: {len(directive_lines)} directives, skip ratio {preprocessor.get_skip_ratio():.2f}")
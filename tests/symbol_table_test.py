@@ -0,0 +1,37 @@
+import Parser.mtcc_ast_validator
+import Parser.mtcc_lexer
+import Parser.mtcc_parser
+import Parser.mtcc_token as tk
+
+lexer = Parser.mtcc_lexer.Lexer('AI_generated_example.c')
+lexer.lex()
+
+for token in lexer.tokens:
+    if token.kind == tk.TokenKind.IDENTIFIER or token.string in tk.string_to_keyword:
+        assert token.symbol != tk.NO_SYMBOL and tk.symbol_table.strings[token.symbol] is token.string
+        assert tk.symbol_table.get_kind(token.symbol) == tk.string_to_keyword.get(token.string, tk.TokenKind.IDENTIFIER)
+    else:
+        assert token.symbol == tk.NO_SYMBOL
+
+# every lexer gives a spelling the same symbol
+for other_lexer in [Parser.mtcc_lexer.Lexer('AI_generated_example.c', engine) for engine in Parser.mtcc_lexer.LexerEngine] + \
+                   [Parser.mtcc_lexer.MappedLexer('AI_generated_example.c')]:
+    other_lexer.lex()
+    assert [token.symbol for token in other_lexer.tokens] == [token.symbol for token in lexer.tokens]
+assert [token.symbol for token in Parser.mtcc_lexer.Lexer('AI_generated_example.c').lex_token_buffer()] == [token.symbol for token in lexer.tokens]
+
+parser = Parser.mtcc_parser.CParser(lexer.tokens, lexer.file_string)
+translation_unit = parser.peek_translation_unit()
+
+for typedef in parser.typedefs:
+    name: str = typedef.declarator.identifier.token.string
+    assert parser.is_typedef_name_name(name) and parser.get_typedef_name(name) is typedef
+assert not parser.is_typedef_name_name("not_a_typedef_name")
+
+# an identifier is a duplicate only if it has the same name (not a name that contains it)
+lexer = Parser.mtcc_lexer.Lexer.from_string("int abc;\nint a;\nint bc;\n")
+lexer.lex()
+parser = Parser.mtcc_parser.CParser(lexer.tokens, lexer.file_string)
+Parser.mtcc_ast_validator.AstValidator(parser, parser.peek_translation_unit()).push_translation_unit_identifiers()
+
+print(f"symbol table: {len(tk.symbol_table.strings)} symbols, {tk.symbol_table.keyword_count} of them keywords")
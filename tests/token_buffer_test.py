@@ -0,0 +1,27 @@
+import Parser.mtcc_lexer
+import Parser.mtcc_parser
+import json
+
+lexer = Parser.mtcc_lexer.Lexer('AI_generated_example.c')
+lexer.lex()
+
+parser = Parser.mtcc_parser.CParser(lexer.tokens, lexer.file_string)
+
+translation_unit = parser.peek_translation_unit()
+
+for buffer_lexer in [Parser.mtcc_lexer.Lexer('AI_generated_example.c'),
+                     Parser.mtcc_lexer.MappedLexer('AI_generated_example.c')]:
+    token_buffer = buffer_lexer.lex_token_buffer()
+
+    assert [(token.kind, token.start, token.line, token.string, token.index) for token in token_buffer] == \
+           [(token.kind, token.start, token.line, token.string, token.index) for token in lexer.tokens]
+
+    buffer_parser = Parser.mtcc_parser.CParser(token_buffer, token_buffer.source)
+
+    buffer_translation_unit = buffer_parser.peek_translation_unit()
+
+    assert json.dumps([external_declaration.to_dict() for external_declaration in translation_unit]) == \
+           json.dumps([external_declaration.to_dict() for external_declaration in buffer_translation_unit])
+
+    print(f"{type(buffer_lexer).__name__}: {len(token_buffer)} tokens parsed from a token buffer, "
+          f"{len(token_buffer.strings)} of them keep their string")
@@ -0,0 +1,21 @@
+import Parser.mtcc_lexer
+import Parser.mtcc_parser
+import json
+
+lexer = Parser.mtcc_lexer.Lexer('AI_generated_example.c')
+lexer.lex()
+
+parser = Parser.mtcc_parser.CParser(lexer.tokens, lexer.file_string)
+
+translation_unit = parser.peek_translation_unit()
+
+streaming_lexer = Parser.mtcc_lexer.Lexer('AI_generated_example.c')
+
+streaming_parser = Parser.mtcc_parser.CParser(streaming_lexer.stream_tokens(window=32), streaming_lexer.file_string)
+
+streaming_translation_unit = streaming_parser.peek_translation_unit()
+
+assert json.dumps([external_declaration.to_dict() for external_declaration in translation_unit]) == \
+       json.dumps([external_declaration.to_dict() for external_declaration in streaming_translation_unit])
+
+print(f"token stream: {streaming_parser.tokens.end} tokens parsed through a window of {streaming_parser.tokens.window}")
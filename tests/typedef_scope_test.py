@@ -0,0 +1,35 @@
+import Parser.mtcc_c_ast
+import Parser.mtcc_error_handler as eh
+import Parser.mtcc_lexer
+import Parser.mtcc_parser
+
+
+def parse(source: str) -> tuple[Parser.mtcc_parser.CParser, list]:
+    lexer = Parser.mtcc_lexer.Lexer.from_string(source)
+    lexer.lex()
+    parser = Parser.mtcc_parser.CParser(lexer.tokens, lexer.file_string)
+    return parser, parser.peek_translation_unit()
+
+
+# a typedef of a block and an identifier that hides a typedef only change their own block
+parser, translation_unit = parse('typedef int T;\n'
+                                 'int f() { typedef char C; C c; { int C; C = 1; } { C d; d = c; } return c; }\n'
+                                 'int g(int T) { T = 1; return T; }\n'
+                                 'int h() { int T; T = 2; return T; }\n'
+                                 'T y;\n')
+assert [str(declarator.identifier) for declarator in translation_unit] == ['T', 'f', 'g', 'h', 'y']
+assert [str(typedef.declarator.identifier) for typedef in parser.typedefs] == ['T'] and parser.typedefs.scopes == []
+
+# the parameter T is a variable in the body of g, so 'T = 1' is an assignment and not a declaration
+g_body = translation_unit[2].type.compound_statement
+assert [type(statement) for statement in g_body.statements] == [Parser.mtcc_c_ast.CBinaryOp, Parser.mtcc_c_ast.CReturn]
+
+# a typedef of a function body is not known after it
+try:
+    parse('int f() { typedef long L; L x; return 0; }\nint g() { L z; return 0; }\n')
+except eh.TokenExpected as error:
+    assert "MTCC:2:13: A semicolon is needed" in str(error), str(error)
+else:
+    assert False, "a typedef of another function was found"
+
+print(f"typedef scope: {len(parser.typedefs)} typedef at file scope")